@@ -0,0 +1,307 @@
+"""
+Almacén en disco del historial: segmentos columnares de solo agregado
+
+Cada segmento es un directorio con un archivo binario de ancho fijo por
+columna (tiempo en float64 y un archivo por sensor en float32):
+
+    almacen/
+        almacen.json              columnas, tipo y muestras por segmento
+        segmento_000000/
+            tiempo.bin
+            humedad1.bin
+            ...
+        segmento_000001/
+            ...
+
+- Agregar escribe al final de los archivos del segmento activo; al llenarse
+  (muestras_por_segmento) se sincroniza y se abre el siguiente.
+- fsync por lotes: cada 'sincronizar_cada' muestras o cada
+  'intervalo_sincronizacion' segundos, no en cada muestra.
+- Tras un corte, las filas válidas de un segmento son las que están
+  completas en todas sus columnas; al abrir se truncan los restos.
+- Las lecturas usan np.memmap: una consulta por rango solo toca las
+  páginas de los segmentos que se solapan con el rango (búsqueda binaria
+  sobre los tiempos de cada segmento), sin cargar el resto en memoria.
+- agrupar() resume un rango en cubetas de tiempo (mínimo, promedio y
+  máximo), igual que HistorialSQLite.agrupar pero con NumPy.
+Las muestras deben llegar en orden de tiempo.
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+TIEMPO = 'tiempo'
+DTYPE_TIEMPO = np.dtype(np.float64)
+
+
+def agrupar_cubetas(tiempos, filas, cubeta):
+    """Mínimo, promedio y máximo por cubeta de 'cubeta' segundos (solo cubetas con muestras)
+
+    tiempos crecientes; las cubetas empiezan en múltiplos de 'cubeta'
+    (como los niveles de resumenes_tiempo.py). Devuelve un diccionario con
+    'tiempo' (inicio de cada cubeta), 'muestras' y matrices cubetas x
+    columnas 'minimo', 'promedio' y 'maximo'.
+    """
+    filas = np.asarray(filas, dtype=np.float64)
+    if not len(tiempos):
+        vacia = np.empty((0, filas.shape[1]))
+        return {'tiempo': np.empty(0), 'muestras': np.empty(0, dtype=np.int64),
+                'minimo': vacia, 'promedio': vacia, 'maximo': vacia}
+    indices = (np.asarray(tiempos) // cubeta).astype(np.int64)
+    cortes = np.flatnonzero(np.r_[True, indices[1:] != indices[:-1]])
+    muestras = np.diff(np.r_[cortes, len(indices)])
+    return {
+        'tiempo': indices[cortes] * float(cubeta),
+        'muestras': muestras,
+        'minimo': np.minimum.reduceat(filas, cortes),
+        'promedio': np.add.reduceat(filas, cortes) / muestras[:, None],
+        'maximo': np.maximum.reduceat(filas, cortes),
+    }
+
+
+class AlmacenSegmentos:
+    def __init__(self, directorio, columnas, muestras_por_segmento=86_400, sincronizar_cada=1_000,
+                 intervalo_sincronizacion=1.0, dtype=np.float32):
+        self.directorio = directorio
+        self.columnas = list(columnas)
+        self.indices = {nombre: i for i, nombre in enumerate(self.columnas)}
+        self.dtype = np.dtype(dtype)
+        self.muestras_por_segmento = muestras_por_segmento
+        self.sincronizar_cada = sincronizar_cada
+        self.intervalo_sincronizacion = intervalo_sincronizacion
+        self.lock = threading.Lock()
+
+        os.makedirs(directorio, exist_ok=True)
+        self._cargar_meta()
+
+        # Índice en memoria: filas y primer/último tiempo de cada segmento
+        # (un segmento vacío usa +inf en ambos para no romper el orden)
+        self.filas_segmento = []
+        self.tiempo_inicial = []
+        self.tiempo_final = []
+        for segmento in range(self._contar_segmentos()):
+            self._recuperar_segmento(segmento)
+
+        self.archivos = None
+        self.pendientes = 0
+        self.ultima_sincronizacion = time.monotonic()
+
+    def __len__(self):
+        return sum(self.filas_segmento)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    # --- Estructura en disco ---
+
+    def _cargar_meta(self):
+        """Crea almacen.json o verifica que coincide con las columnas pedidas"""
+        ruta = os.path.join(self.directorio, 'almacen.json')
+        meta = {'columnas': self.columnas, 'dtype': self.dtype.str,
+                'muestras_por_segmento': self.muestras_por_segmento}
+        if not os.path.exists(ruta):
+            with open(ruta, 'w') as f:
+                json.dump(meta, f)
+            return
+        with open(ruta) as f:
+            existente = json.load(f)
+        if existente['columnas'] != self.columnas or existente['dtype'] != self.dtype.str:
+            raise ValueError(f"El almacén {self.directorio} tiene otras columnas o tipo "
+                             f"({len(existente['columnas'])} columnas, {existente['dtype']})")
+        self.muestras_por_segmento = existente['muestras_por_segmento']
+
+    def _contar_segmentos(self):
+        return sum(1 for nombre in os.listdir(self.directorio) if nombre.startswith('segmento_'))
+
+    def _ruta(self, segmento, columna):
+        return os.path.join(self.directorio, f'segmento_{segmento:06d}', f'{columna}.bin')
+
+    def _tipo(self, columna):
+        return DTYPE_TIEMPO if columna == TIEMPO else self.dtype
+
+    def _recuperar_segmento(self, segmento):
+        """Registra un segmento existente, truncando filas incompletas de un corte
+
+        Un corte entre crear el directorio del segmento y sus archivos deja
+        columnas sin archivo: cuentan como vacías y se crean.
+        """
+        columnas = [TIEMPO] + self.columnas
+        rutas = {c: self._ruta(segmento, c) for c in columnas}
+        tamanos = {c: os.path.getsize(r) if os.path.exists(r) else 0 for c, r in rutas.items()}
+        filas = min(tamanos[c] // self._tipo(c).itemsize for c in columnas)
+        for c in columnas:
+            if not os.path.exists(rutas[c]):
+                open(rutas[c], 'ab').close()
+            elif tamanos[c] != filas * self._tipo(c).itemsize:
+                os.truncate(rutas[c], filas * self._tipo(c).itemsize)
+        tiempos = self._mapear(segmento, TIEMPO, filas)
+        self.filas_segmento.append(filas)
+        self.tiempo_inicial.append(float(tiempos[0]) if filas else np.inf)
+        self.tiempo_final.append(float(tiempos[-1]) if filas else np.inf)
+
+    def _abrir_activo(self):
+        """Abre (o crea) el último segmento para agregar al final"""
+        if not self.filas_segmento or self.filas_segmento[-1] >= self.muestras_por_segmento:
+            segmento = len(self.filas_segmento)
+            os.makedirs(os.path.dirname(self._ruta(segmento, TIEMPO)), exist_ok=True)
+            self.filas_segmento.append(0)
+            self.tiempo_inicial.append(np.inf)
+            self.tiempo_final.append(np.inf)
+        segmento = len(self.filas_segmento) - 1
+        self.archivos = {c: open(self._ruta(segmento, c), 'ab') for c in [TIEMPO] + self.columnas}
+
+    def _cerrar_activo(self):
+        if self.archivos is None:
+            return
+        self._sincronizar_sin_lock()
+        for archivo in self.archivos.values():
+            archivo.close()
+        self.archivos = None
+
+    # --- Escritura ---
+
+    def agregar(self, tiempo, fila):
+        """Agrega una muestra (fila en el orden de las columnas)"""
+        self.agregar_lote([tiempo], np.asarray(fila)[None, :])
+
+    def agregar_lote(self, tiempos, filas):
+        """Agrega varias muestras (tiempos crecientes, matriz filas x columnas)"""
+        tiempos = np.asarray(tiempos, dtype=DTYPE_TIEMPO)
+        filas = np.asarray(filas, dtype=self.dtype)
+        if len(tiempos) == 0:
+            return
+        if filas.shape != (len(tiempos), len(self.columnas)):
+            raise ValueError(f"Se esperaban {len(tiempos)} filas de {len(self.columnas)} columnas, "
+                             f"llegó {filas.shape}")
+        with self.lock:
+            if len(self) and tiempos[0] < self.ultimo_tiempo:
+                raise ValueError("Las muestras deben llegar en orden de tiempo")
+
+            inicio = 0
+            while inicio < len(tiempos):
+                if self.archivos is None:
+                    self._abrir_activo()
+                # Partir el lote en el límite del segmento
+                libres = self.muestras_por_segmento - self.filas_segmento[-1]
+                fin = min(len(tiempos), inicio + libres)
+                self.archivos[TIEMPO].write(tiempos[inicio:fin].tobytes())
+                for i, c in enumerate(self.columnas):
+                    self.archivos[c].write(np.ascontiguousarray(filas[inicio:fin, i]).tobytes())
+
+                if not self.filas_segmento[-1]:
+                    self.tiempo_inicial[-1] = float(tiempos[inicio])
+                self.tiempo_final[-1] = float(tiempos[fin - 1])
+                self.filas_segmento[-1] += fin - inicio
+                self.pendientes += fin - inicio
+                inicio = fin
+
+                # Rollover: el segmento lleno queda sincronizado y cerrado
+                if self.filas_segmento[-1] >= self.muestras_por_segmento:
+                    self._cerrar_activo()
+
+            if (self.pendientes >= self.sincronizar_cada
+                    or time.monotonic() - self.ultima_sincronizacion >= self.intervalo_sincronizacion):
+                self._sincronizar_sin_lock()
+
+    def sincronizar(self):
+        """Fuerza el fsync de todo lo agregado"""
+        with self.lock:
+            self._sincronizar_sin_lock()
+
+    def _sincronizar_sin_lock(self):
+        if self.archivos is not None and self.pendientes:
+            for archivo in self.archivos.values():
+                archivo.flush()
+                os.fsync(archivo.fileno())
+        self.pendientes = 0
+        self.ultima_sincronizacion = time.monotonic()
+
+    def cerrar(self):
+        with self.lock:
+            self._cerrar_activo()
+
+    # --- Lectura ---
+
+    def _vaciar(self):
+        """Pasa al sistema operativo lo escrito en el segmento activo (sin fsync) para que el memmap lo vea"""
+        if self.archivos is not None:
+            for archivo in self.archivos.values():
+                archivo.flush()
+
+    def _mapear(self, segmento, columna, filas):
+        """Vista memmap de una columna de un segmento (las primeras 'filas' muestras)"""
+        if not filas:
+            return np.empty(0, dtype=self._tipo(columna))
+        return np.memmap(self._ruta(segmento, columna), dtype=self._tipo(columna), mode='r', shape=(filas,))
+
+    def _leer(self, tramos, columnas):
+        """Copia los tramos (segmento, desde, hasta) de las columnas pedidas"""
+        total = sum(hasta - desde for _, desde, hasta in tramos)
+        tiempos = np.empty(total, dtype=DTYPE_TIEMPO)
+        filas = np.empty((total, len(columnas)), dtype=self.dtype)
+        pos = 0
+        for segmento, desde, hasta in tramos:
+            n = self.filas_segmento[segmento]
+            tiempos[pos:pos + hasta - desde] = self._mapear(segmento, TIEMPO, n)[desde:hasta]
+            for j, c in enumerate(columnas):
+                filas[pos:pos + hasta - desde, j] = self._mapear(segmento, c, n)[desde:hasta]
+            pos += hasta - desde
+        return tiempos, filas
+
+    def rango(self, inicio, fin, columnas=None):
+        """Muestras con inicio <= tiempo < fin: (tiempos, matriz filas x columnas)"""
+        columnas = self.columnas if columnas is None else list(columnas)
+        with self.lock:
+            self._vaciar()
+            tramos = []
+            # Segmentos que se solapan con el rango (tiempos crecientes entre segmentos)
+            primero = int(np.searchsorted(self.tiempo_final, inicio, side='left'))
+            for segmento in range(primero, len(self.filas_segmento)):
+                if self.tiempo_inicial[segmento] >= fin:
+                    break
+                tiempos = self._mapear(segmento, TIEMPO, self.filas_segmento[segmento])
+                desde = int(np.searchsorted(tiempos, inicio, side='left'))
+                hasta = int(np.searchsorted(tiempos, fin, side='left'))
+                if hasta > desde:
+                    tramos.append((segmento, desde, hasta))
+            return self._leer(tramos, columnas)
+
+    def ultimos(self, n, columnas=None):
+        """Últimas n muestras en orden cronológico: (tiempos, matriz filas x columnas)"""
+        columnas = self.columnas if columnas is None else list(columnas)
+        with self.lock:
+            self._vaciar()
+            tramos = []
+            restantes = n
+            for segmento in range(len(self.filas_segmento) - 1, -1, -1):
+                if restantes <= 0:
+                    break
+                filas = self.filas_segmento[segmento]
+                desde = max(0, filas - restantes)
+                if filas > desde:
+                    tramos.append((segmento, desde, filas))
+                restantes -= filas - desde
+            return self._leer(tramos[::-1], columnas)
+
+    def agrupar(self, inicio, fin, cubeta, columnas=None):
+        """Resumen por cubetas de un rango (ver agrupar_cubetas)"""
+        tiempos, filas = self.rango(inicio, fin, columnas)
+        return agrupar_cubetas(tiempos, filas, cubeta)
+
+    @property
+    def primer_tiempo(self):
+        return min(self.tiempo_inicial) if len(self) else None
+
+    @property
+    def ultimo_tiempo(self):
+        for filas, tiempo in zip(reversed(self.filas_segmento), reversed(self.tiempo_final)):
+            if filas:
+                return tiempo
+        return None
@@ -0,0 +1,117 @@
+"""
+Benchmark: almacén en disco por segmentos columnares
+
+Escribe seis meses de muestras cada 3 s (2 zonas) en un directorio temporal
+y mide:
+- escritura: muestra a muestra y por lotes, con fsync en cada muestra o
+  por lotes
+- apertura: reconstruir el índice de segmentos al reiniciar
+- consultas por rango (1 hora a 30 días) y últimas n muestras sobre
+  memmap, sin cargar el almacén en memoria
+
+Uso:
+    python3 benchmark_almacen.py
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from almacen_segmentos import AlmacenSegmentos
+from generador_historial import generar_historial
+from simulador_corregido import columnas_historial
+
+INTERVALO = 3.0
+MUESTRAS = 180 * 24 * 3600 // 3  # Seis meses
+LOTE = 1_000
+HORA = 3600
+
+
+def filas_sinteticas(n):
+    h = generar_historial(n, zonas=2, semilla=0, intervalo_min=INTERVALO / 60, dtype=np.float32)
+    return np.column_stack([h['humedad'], h['temperatura'], h['temp_planta'],
+                            h['humedad_relativa'], h['bombas']]).astype(np.float32)
+
+
+def tamano_mb(directorio):
+    return sum(os.path.getsize(os.path.join(raiz, f))
+               for raiz, _, archivos in os.walk(directorio) for f in archivos) / 1e6
+
+
+def medir_escritura(directorio, columnas, filas):
+    """Muestras por segundo: una a una con fsync, una a una con fsync por lotes y por lotes"""
+    resultados = []
+    for nombre, n, por_lote, sincronizar_cada in (
+        ("1 a 1, fsync cada muestra", 500, 1, 1),
+        ("1 a 1, fsync por lotes", 20_000, 1, 1_000),
+        (f"lotes de {LOTE}", 200_000, LOTE, 1_000),
+    ):
+        ruta = os.path.join(directorio, nombre.replace(' ', '_').replace(',', ''))
+        with AlmacenSegmentos(ruta, columnas, sincronizar_cada=sincronizar_cada) as almacen:
+            tiempos = np.arange(n) * INTERVALO
+            inicio = time.perf_counter()
+            for i in range(0, n, por_lote):
+                almacen.agregar_lote(tiempos[i:i + por_lote], filas[i % len(filas):][:por_lote])
+            almacen.sincronizar()
+            resultados.append((nombre, n / (time.perf_counter() - inicio)))
+        shutil.rmtree(ruta)
+    return resultados
+
+
+def main():
+    columnas = columnas_historial(2)
+    filas = filas_sinteticas(100_000)
+    directorio = tempfile.mkdtemp(prefix='almacen_')
+    try:
+        print("=" * 78)
+        print(f"💾 ALMACÉN EN DISCO: {MUESTRAS:,} muestras (6 meses cada {INTERVALO:.0f} s, 2 zonas)")
+        print("=" * 78)
+        for nombre, velocidad in medir_escritura(directorio, columnas, filas):
+            print(f"✍️  {nombre:<28s} {velocidad:>12,.0f} muestras/s")
+
+        ruta = os.path.join(directorio, 'seis_meses')
+        inicio = time.perf_counter()
+        with AlmacenSegmentos(ruta, columnas) as almacen:
+            for i in range(0, MUESTRAS, len(filas)):
+                n = min(len(filas), MUESTRAS - i)
+                almacen.agregar_lote((i + np.arange(n)) * INTERVALO, filas[:n])
+        t_carga = time.perf_counter() - inicio
+        print(f"📦 Carga de 6 meses: {t_carga:.1f} s, {tamano_mb(ruta):.0f} MB en disco")
+
+        inicio = time.perf_counter()
+        almacen = AlmacenSegmentos(ruta, columnas)
+        print(f"🔓 Apertura: {(time.perf_counter() - inicio) * 1e3:.1f} ms ({len(almacen.filas_segmento)} segmentos)")
+        print()
+
+        print(f"{'Consulta':>16s} | {'Muestras':>10s} | {'Todas las columnas':>19s} | {'Una columna':>12s}")
+        print("-" * 78)
+        rng = np.random.default_rng(0)
+        ultimo = almacen.ultimo_tiempo
+        for nombre, ventana in (("1 hora", HORA), ("1 día", 24 * HORA),
+                                ("1 semana", 7 * 24 * HORA), ("30 días", 30 * 24 * HORA)):
+            desdes = rng.uniform(0, ultimo - ventana, 10)
+            inicio = time.perf_counter()
+            for desde in desdes:
+                tiempos, _ = almacen.rango(desde, desde + ventana)
+            t_todas = (time.perf_counter() - inicio) / len(desdes) * 1e3
+            inicio = time.perf_counter()
+            for desde in desdes:
+                almacen.rango(desde, desde + ventana, ['humedad1'])
+            t_una = (time.perf_counter() - inicio) / len(desdes) * 1e3
+            print(f"{nombre:>16s} | {len(tiempos):>10,d} | {t_todas:>16.2f} ms | {t_una:>9.2f} ms")
+
+        inicio = time.perf_counter()
+        for _ in range(100):
+            tiempos, _ = almacen.ultimos(144)
+        print(f"{'últimas 144':>16s} | {len(tiempos):>10,d} | "
+              f"{(time.perf_counter() - inicio) / 100 * 1e3:>16.2f} ms | {'':>12s}")
+        almacen.cerrar()
+    finally:
+        shutil.rmtree(directorio)
+
+
+if __name__ == "__main__":
+    main()
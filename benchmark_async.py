@@ -0,0 +1,190 @@
+"""
+Benchmark: sondeo de una flota con el cliente bloqueante vs el cliente asyncio
+
+Lanza simulador_federado.py en un subproceso y consulta STATUS y
+ESTADISTICAS de cada sitio:
+
+- bloqueante: ControladorSimple, un sitio tras otro (lo que hace hoy el
+  controlador; se mide sobre una parte de la flota)
+- asyncio: sondear_flota() abriendo una conexión por sitio
+- asyncio persistente: sondear_flota() reutilizando las conexiones
+
+Con --colgado se agrega un sitio que acepta la conexión pero nunca responde:
+el cliente bloqueante queda detenido todo el timeout, el asyncio solo pierde
+ese sitio.
+
+Antes de medir se verifica que sitios defectuosos (cierran la conexión, no
+hablan el protocolo, envían bytes que no son texto o se cortan a mitad de
+una respuesta) quedan como error en su resultado sin interrumpir el sondeo
+del resto de la flota.
+
+Uso:
+    python3 benchmark_async.py --sitios 1000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from benchmark_servidor import esperar_servidor, subir_limite_descriptores
+from controlador_async import cerrar_conexiones, sondear_flota
+from controlador_corregido import ControladorSimple
+from protocolo import enmarcar
+
+SALUDO = enmarcar("DATOS:50.0,50.0,20.0,20.0,0,0")
+
+
+async def cerrar_al_conectar(reader, writer):
+    writer.close()
+
+
+async def responder_http(reader, writer):
+    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+    await writer.drain()
+    writer.close()
+
+
+async def enviar_binario(reader, writer):
+    writer.write(b"\x00\x00\x00\x04\xff\xfe\xfd\xfc")
+    await writer.drain()
+
+
+async def cortar_respuesta(reader, writer):
+    """Saluda bien y, al primer comando, envía media trama y cierra"""
+    writer.write(SALUDO)
+    await reader.readline()
+    writer.write(b"\x00\x00\x01\x00DATOS:")
+    await writer.drain()
+    writer.close()
+
+
+async def verificar_sitios_defectuosos(host, port):
+    """Sondea un sitio sano junto a sitios defectuosos; devuelve el número de fallos"""
+    servidores = [await asyncio.start_server(manejador, host, 0)
+                  for manejador in (cerrar_al_conectar, responder_http, enviar_binario, cortar_respuesta)]
+    defectuosos = [(host, s.sockets[0].getsockname()[1]) for s in servidores]
+    try:
+        resultados = await sondear_flota([(host, port, 0)] + defectuosos + [(host, port, 1)], timeout=2.0)
+    finally:
+        for servidor in servidores:
+            servidor.close()
+    fallos = 0
+    for nombre, r in zip(['sano', 'cierra', 'http', 'binario', 'corta', 'sano'], resultados):
+        esperado = nombre == 'sano'
+        correcto = r['ok'] == esperado and (esperado or r['error'])
+        fallos += not correcto
+        print(f"{'✅' if correcto else '❌'} {nombre:8s} ok={r['ok']} error={r['error']}")
+    return fallos
+
+
+def sondear_bloqueante(sitios, timeout):
+    """Consulta los sitios uno por uno con ControladorSimple; devuelve los que respondieron"""
+    correctos = 0
+    for host, port, sitio in sitios:
+        controlador = ControladorSimple(host, port, timeout=timeout)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                controlador.abrir_conexion()
+                _, estado, estadisticas = controlador.send_commands_raw([f"SITIO {sitio}", "STATUS", "ESTADISTICAS"])
+                correctos += bool(controlador.parsear_cuerpo_estado(estado)
+                                  and controlador.parsear_estadisticas(estadisticas.decode('utf-8')))
+        except OSError:
+            pass
+        finally:
+            if controlador.connected:
+                controlador.socket.close()
+    return correctos
+
+
+def cronometrar(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del cliente asyncio frente al bloqueante")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9997)
+    parser.add_argument('--sitios', type=int, default=1000)
+    parser.add_argument('--muestra-bloqueante', type=int, default=200,
+                        help='Sitios consultados con el cliente bloqueante')
+    parser.add_argument('--concurrencia', type=int, default=256)
+    parser.add_argument('--timeout', type=float, default=2.0)
+    parser.add_argument('--colgado', action='store_true', help='Agrega un sitio que nunca responde')
+    args = parser.parse_args()
+
+    subir_limite_descriptores()
+    proceso = subprocess.Popen(
+        [sys.executable, 'simulador_federado.py', '--sitios', str(args.sitios), '--motor', 'asyncio',
+         '--host', args.host, '--port', str(args.port), '--silencioso'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    colgado = None
+    try:
+        if not asyncio.run(esperar_servidor(args.host, args.port, timeout=60.0)):
+            print("❌ El simulador federado no respondió")
+            return
+
+        if asyncio.run(verificar_sitios_defectuosos(args.host, args.port)):
+            print("❌ Un sitio defectuoso interrumpió el sondeo o no quedó como error")
+            sys.exit(1)
+        print()
+
+        sitios = [(args.host, args.port, k) for k in range(args.sitios)]
+        if args.colgado:
+            # Acepta conexiones (backlog del sistema) pero nunca envía nada
+            colgado = socket.create_server((args.host, 0))
+            sitios.insert(0, (args.host, colgado.getsockname()[1], None))
+
+        print("=" * 80)
+        print(f"📡 SONDEO DE FLOTA: {len(sitios)} sitios, STATUS + ESTADISTICAS, timeout {args.timeout:.1f} s")
+        print("=" * 80)
+        print(f"{'Cliente':24s} | {'Sitios OK':>10s} | {'Tiempo':>9s} | {'Sitios/s':>9s}")
+        print("-" * 80)
+
+        muestra = sitios[:args.muestra_bloqueante]
+        t, correctos = cronometrar(lambda: sondear_bloqueante(muestra, args.timeout))
+        print(f"{'bloqueante':24s} | {correctos:>4d}/{len(muestra):<5d} | {t:>7.2f} s | {len(muestra) / t:>9,.0f}")
+
+        async def asincrono():
+            t, r = await medir(sondear_flota(sitios, args.concurrencia, timeout=args.timeout))
+            fila("asyncio (conexión nueva)", r, t)
+
+            conexiones = {}
+            await sondear_flota(sitios, args.concurrencia, timeout=args.timeout, conexiones=conexiones)
+            t, r = await medir(sondear_flota(sitios, args.concurrencia, timeout=args.timeout,
+                                             conexiones=conexiones))
+            fila("asyncio persistente", r, t)
+            await cerrar_conexiones(conexiones)
+
+        async def medir(corrutina):
+            inicio = time.perf_counter()
+            resultado = await corrutina
+            return time.perf_counter() - inicio, resultado
+
+        def fila(nombre, resultados, t):
+            correctos = sum(r['ok'] for r in resultados)
+            print(f"{nombre:24s} | {correctos:>4d}/{len(resultados):<5d} | {t:>7.2f} s | {len(resultados) / t:>9,.0f}")
+
+        asyncio.run(asincrono())
+        print()
+        print(f"El cliente bloqueante se mide sobre los primeros {len(muestra)} sitios. En localhost no hay latencia "
+              f"de red\nque solapar: con un RTT r por sitio el bloqueante tarda al menos sitios x r y el asyncio "
+              f"~ sitios / concurrencia x r.")
+    finally:
+        if colgado is not None:
+            colgado.close()
+        proceso.terminate()
+        proceso.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: protocolo de texto vs formato binario
+
+Compara bytes en la red y tiempo de parseo en el cliente para STATUS e
+historiales de distintos tamaños, usando el mismo código que el
+simulador (generación) y ControladorSimple (parseo).
+
+Uso:
+    python3 benchmark_binario.py
+"""
+
+import contextlib
+import io
+import time
+
+from codificacion_binaria import decodificar_estado, decodificar_historial
+from controlador_corregido import ControladorSimple
+from simulador_corregido import SistemaRiegoSimulator
+
+
+def cronometrar(funcion, repeticiones):
+    """Tiempo medio por llamada en microsegundos"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def main():
+    tamanos = [1, 24, 144, 1_000, 10_000, 100_000]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Historial completo precargado para poder pedir cualquier tamaño
+        simulador = SistemaRiegoSimulator(verbose=False, capacidad_historial=max(tamanos), precarga=max(tamanos))
+        simulador.running = False
+        controlador = ControladorSimple()
+
+    print("=" * 88)
+    print("📦 TEXTO vs BINARIO: BYTES EN LA RED Y TIEMPO DE PARSEO")
+    print("=" * 88)
+
+    texto = simulador.generar_respuesta_estado().encode('utf-8')
+    binario = simulador.generar_respuesta_estado_binaria()
+    with contextlib.redirect_stdout(io.StringIO()):
+        t_texto = cronometrar(lambda: controlador.parsear_estado(texto.decode('utf-8')), 20_000)
+    t_binario = cronometrar(lambda: decodificar_estado(binario), 20_000)
+    print(f"STATUS: texto {len(texto)} B / {t_texto:.2f} µs  |  binario {len(binario)} B / {t_binario:.2f} µs")
+    print()
+
+    print(f"{'Filas':>8s} | {'Texto (B)':>11s} | {'Binario (B)':>11s} | {'Ratio':>6s} | "
+          f"{'Parseo texto':>14s} | {'Parseo binario':>14s} | {'Speedup':>8s}")
+    print("-" * 88)
+    for n in tamanos:
+        texto = simulador.generar_respuesta_historial(n).encode('utf-8')
+        binario = simulador.generar_respuesta_historial_binaria(n)
+        repeticiones = max(3, 20_000 // n)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            t_texto = cronometrar(lambda: controlador.parsear_historial(texto.decode('utf-8')), repeticiones)
+        t_binario = cronometrar(lambda: decodificar_historial(binario), repeticiones)
+
+        print(f"{n:>8d} | {len(texto):>11d} | {len(binario):>11d} | {len(texto) / len(binario):>6.1f} | "
+              f"{t_texto:>11.1f} µs | {t_binario:>11.1f} µs | {t_texto / t_binario:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
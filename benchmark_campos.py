@@ -0,0 +1,94 @@
+"""
+Benchmark: campos 3D del terreno (simulación interactiva del dashboard)
+
+Compara, para varias resoluciones y números de plantas:
+- el cálculo original con un bucle por planta (distancias y exp en cada llamada)
+- calcular_campos con los núcleos de distancia cacheados (primera llamada y
+  llamadas siguientes, que es lo que cuesta mover un slider)
+- la figura completa: crear_simulacion_3d_interactiva + to_json (lo que
+  Streamlit envía al navegador), con la plantilla de la figura ya cacheada,
+  y lo que cuesta armar esa plantilla cuando no está en el caché
+
+y comprueba que ambos cálculos dan los mismos campos.
+
+Uso:
+    python3 benchmark_campos.py
+"""
+
+import time
+
+import numpy as np
+
+from campos_terreno import calcular_campos, malla_terreno, nucleos_distancia, posiciones_plantas
+
+RESOLUCIONES = [15, 100, 200]
+PLANTAS = [2, 8, 24, 48]
+OBJETIVO_MS = 100
+
+
+def campos_bucle(temperaturas, humedades, bombas, resolucion):
+    """Cálculo original: una pasada por planta sobre toda la malla"""
+    x_range, y_range = malla_terreno(len(temperaturas), resolucion)
+    X, Y = np.meshgrid(x_range, y_range)
+    Z_temp = np.ones_like(X) * 20.0
+    Z_humedad = np.ones_like(X) * 30.0
+    for (px, py), temp, hum, bomba in zip(posiciones_plantas(len(temperaturas)), temperaturas, humedades, bombas):
+        distancia = np.sqrt((X - px)**2 + (Y - py)**2)
+        Z_temp += np.exp(-distancia / 1.5) * (temp - 20)
+        Z_humedad += np.exp(-distancia / 1.2) * (hum - 30)
+        if bomba:
+            Z_temp -= np.exp(-distancia / 0.8) * 3
+            Z_humedad += np.exp(-distancia / 1.0) * 35
+    return Z_temp, np.clip(Z_humedad, 0, 100)
+
+
+def cronometrar(funcion, repeticiones):
+    """Tiempo medio por llamada en milisegundos"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e3, resultado
+
+
+def main():
+    from dashboard_streamlit import crear_simulacion_3d_interactiva, plantilla_simulacion_3d
+
+    rng = np.random.default_rng(0)
+    print("=" * 105)
+    print("🌱 CAMPOS 3D DEL TERRENO: bucle por planta vs núcleos cacheados")
+    print("=" * 105)
+    print(f"{'Malla':>9s} | {'Plantas':>7s} | {'Bucle':>9s} | {'1ª llamada':>10s} | {'Cacheado':>9s} | "
+          f"{'Mejora':>7s} | {'Plantilla':>9s} | {'Figura+JSON':>11s} | {'JSON':>8s}")
+    print("-" * 105)
+    for resolucion in RESOLUCIONES:
+        for n in PLANTAS:
+            temperaturas = rng.uniform(15, 40, n)
+            humedades = rng.uniform(0, 100, n)
+            bombas = rng.random(n) < 0.5
+            repeticiones = 20 if resolucion * resolucion * n < 1e6 else 5
+
+            t_bucle, esperado = cronometrar(lambda: campos_bucle(temperaturas, humedades, bombas, resolucion),
+                                            repeticiones)
+            nucleos_distancia.cache_clear()
+            t_primera, _ = cronometrar(lambda: calcular_campos(temperaturas, humedades, bombas, resolucion), 1)
+            t_cache, obtenido = cronometrar(lambda: calcular_campos(temperaturas, humedades, bombas, resolucion),
+                                            repeticiones)
+            for a, b in zip(esperado, obtenido):
+                assert np.allclose(a, b), "Los campos no coinciden con el cálculo por planta"
+
+            plantilla_simulacion_3d.clear()
+            t_plantilla, _ = cronometrar(lambda: plantilla_simulacion_3d(n), 1)
+
+            def figura():
+                return crear_simulacion_3d_interactiva(temperaturas, humedades, bombas, resolucion).to_json()
+            t_figura, json = cronometrar(figura, 3)
+            marca = "✅" if t_figura < OBJETIVO_MS else "⚠️"
+            print(f"{resolucion:>4d}x{resolucion:<4d} | {n:>7d} | {t_bucle:>6.2f} ms | {t_primera:>7.2f} ms | "
+                  f"{t_cache:>6.2f} ms | {t_bucle / t_cache:>6.1f}x | {t_plantilla:>6.1f} ms | "
+                  f"{t_figura:>6.1f} ms {marca} | {len(json) / 1024:>5.0f} KB")
+    print()
+    print(f"✅ Campos idénticos al cálculo por planta (objetivo por figura: < {OBJETIVO_MS} ms)")
+
+
+if __name__ == "__main__":
+    main()
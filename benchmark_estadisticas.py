@@ -0,0 +1,144 @@
+"""
+Verificación y benchmark de EstadisticasIncrementales
+
+1. Verifica, muestra a muestra, que promedio/mínimo/máximo incrementales
+   coinciden con el cálculo por fuerza bruta sobre toda la ventana
+   (incluyendo vueltas completas del buffer, cargas por lotes y series que
+   solo suben o solo bajan).
+2. Mide el coste de una consulta ESTADISTICAS con ambos métodos según
+   crece la capacidad del historial, y el de agregar una muestra con datos
+   ruidosos y con tendencia.
+
+Uso:
+    python3 benchmark_estadisticas.py
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from estadisticas_incrementales import EstadisticasIncrementales
+from historial_circular import HistorialCircular
+
+COLUMNAS = ['humedad1', 'humedad2', 'temperatura1', 'temperatura2', 'bomba1_estados', 'bomba2_estados']
+ANALOGICAS = COLUMNAS[:4]
+BOMBAS = COLUMNAS[4:]
+
+
+def filas_aleatorias(rng, n):
+    """Genera n filas con valores redondeados a 0.1 y bombas 0/1"""
+    analogicas = np.round(rng.uniform(0, 100, size=(n, len(ANALOGICAS))), 1)
+    bombas = rng.integers(0, 2, size=(n, len(BOMBAS)))
+    return np.hstack([analogicas, bombas])
+
+
+def filas_tendencia(rng, n, inicio=0):
+    """Como filas_aleatorias pero las analógicas suben (columnas pares) o bajan (impares) sin parar"""
+    filas = filas_aleatorias(rng, n)
+    rampa = np.arange(inicio, inicio + n)[:, None] * 0.1
+    filas[:, :len(ANALOGICAS)] = np.where(np.arange(len(ANALOGICAS)) % 2, -rampa, rampa)
+    return filas
+
+
+def fuerza_bruta(historial):
+    """Promedios, mínimos, máximos y porcentajes recorriendo toda la ventana"""
+    filas = historial.ultimos().astype(np.float64)
+    return {
+        'promedio': filas.mean(axis=0),
+        'minimo': filas[:, :len(ANALOGICAS)].min(axis=0),
+        'maximo': filas[:, :len(ANALOGICAS)].max(axis=0),
+    }
+
+
+def incremental(estadisticas):
+    return {
+        'promedio': np.array([estadisticas.promedio(c) for c in COLUMNAS]),
+        'minimo': np.array([estadisticas.minimo(c) for c in ANALOGICAS]),
+        'maximo': np.array([estadisticas.maximo(c) for c in ANALOGICAS]),
+    }
+
+
+def coinciden(a, b):
+    return all(np.allclose(a[k], b[k], atol=1e-6) for k in a)
+
+
+def verificar(capacidades=(1, 2, 7, 144), pasos=2000, semilla=0):
+    """Compara ambos métodos tras cada muestra; devuelve el número de fallos"""
+    rng = np.random.default_rng(semilla)
+    fallos = 0
+    for nombre, generar in (('ruido', filas_aleatorias), ('tendencia', filas_tendencia)):
+        for capacidad in capacidades:
+            for lote in (capacidad // 2 + 1, capacidad + 3):
+                historial = HistorialCircular(COLUMNAS, capacidad, dtype=np.float64)
+                estadisticas = EstadisticasIncrementales(historial, columnas_extremos=ANALOGICAS)
+
+                # Carga inicial por lotes (ruta de al_reconstruir), que no siempre llena el buffer
+                historial.agregar_lote(generar(rng, lote))
+                if not coinciden(incremental(estadisticas), fuerza_bruta(historial)):
+                    print(f"❌ {nombre}, capacidad {capacidad}: discrepancia tras carga por lotes de {lote}")
+                    fallos += 1
+
+                for paso, fila in enumerate(generar(rng, pasos)):
+                    historial.agregar(fila)
+                    if not coinciden(incremental(estadisticas), fuerza_bruta(historial)):
+                        print(f"❌ {nombre}, capacidad {capacidad}: discrepancia en el paso {paso}")
+                        fallos += 1
+                        break
+            print(f"✅ {nombre:9s} capacidad {capacidad:>4d}: {pasos} muestras verificadas (2 cargas iniciales)")
+    return fallos
+
+
+def medir(capacidades=(144, 10_000, 100_000, 1_000_000), consultas=50, semilla=1):
+    """Tiempo medio por consulta de estadísticas con cada método"""
+    rng = np.random.default_rng(semilla)
+    print()
+    print(f"{'Capacidad':>10s} | {'Fuerza bruta (µs)':>18s} | {'Incremental (µs)':>17s} | {'Agregar (µs)':>13s} | "
+          f"{'Agregar tendencia (µs)':>22s}")
+    print("-" * 95)
+    for capacidad in capacidades:
+        historial = HistorialCircular(COLUMNAS, capacidad)
+        estadisticas = EstadisticasIncrementales(historial, columnas_extremos=ANALOGICAS)
+        historial.agregar_lote(filas_aleatorias(rng, capacidad))
+
+        nuevas = filas_aleatorias(rng, consultas)
+        inicio = time.perf_counter()
+        for fila in nuevas:
+            historial.agregar(fila)
+        t_agregar = (time.perf_counter() - inicio) / consultas
+
+        inicio = time.perf_counter()
+        for _ in range(consultas):
+            fuerza_bruta(historial)
+        t_bruta = (time.perf_counter() - inicio) / consultas
+
+        inicio = time.perf_counter()
+        for _ in range(consultas):
+            incremental(estadisticas)
+        t_incremental = (time.perf_counter() - inicio) / consultas
+
+        # Con tendencia: promedio sobre una vuelta completa del buffer (incluye el cierre de bloque)
+        vuelta = capacidad
+        historial.agregar_lote(filas_tendencia(rng, capacidad))
+        nuevas = filas_tendencia(rng, vuelta, inicio=capacidad)
+        inicio = time.perf_counter()
+        for fila in nuevas:
+            historial.agregar(fila)
+        t_tendencia = (time.perf_counter() - inicio) / vuelta
+
+        print(f"{capacidad:>10d} | {t_bruta * 1e6:>18.1f} | {t_incremental * 1e6:>17.1f} | {t_agregar * 1e6:>13.1f} | "
+              f"{t_tendencia * 1e6:>22.1f}")
+
+
+def main():
+    print("=" * 95)
+    print("📊 ESTADÍSTICAS INCREMENTALES: VERIFICACIÓN Y BENCHMARK")
+    print("=" * 95)
+    fallos = verificar()
+    if fallos:
+        sys.exit(1)
+    medir()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: simulador federado
+
+Para distintos números de sitios mide el arranque (historial inicial de
+cada sitio), el costo de un tick que avanza todos los sitios y de las
+respuestas de un sitio, y estima cuántos sitios caben en un núcleo con el
+intervalo de 3 s del simulador.
+
+Uso:
+    python3 benchmark_federado.py
+"""
+
+import contextlib
+import io
+import time
+
+from simulador_federado import SimuladorFederado
+
+SITIOS = [100, 1_000, 10_000, 50_000]
+INTERVALO_S = 3.0
+
+
+def cronometrar(funcion, repeticiones):
+    """Tiempo medio por llamada en microsegundos"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def main():
+    print("=" * 100)
+    print(f"🏡 SIMULADOR FEDERADO (2 zonas por sitio, historial de 144 muestras, tick cada {INTERVALO_S:.0f} s)")
+    print("=" * 100)
+    print(f"{'Sitios':>8s} | {'Arranque':>9s} | {'Tick':>10s} | {'por sitio':>10s} | "
+          f"{'STATUS':>8s} | {'HIST 24':>8s} | {'STATS':>8s} | {'Sitios/núcleo':>14s}")
+    print("-" * 100)
+
+    for sitios in SITIOS:
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            federado = SimuladorFederado(sitios=sitios, verbose=False, intervalo=1e9)
+        t_arranque = time.perf_counter() - inicio
+
+        t_tick = cronometrar(federado.tick, 50)
+        sitio = federado.sitio(sitios // 2)
+        t_estado = cronometrar(sitio.generar_respuesta_estado, 2_000)
+        t_historial = cronometrar(lambda: sitio.generar_respuesta_historial(24), 500)
+        t_stats = cronometrar(sitio.generar_estadisticas, 500)
+        capacidad = INTERVALO_S / (t_tick / 1e6 / sitios)
+
+        print(f"{sitios:>8d} | {t_arranque:>7.2f} s | {t_tick / 1e3:>7.2f} ms | {t_tick / sitios * 1e3:>7.1f} ns | "
+              f"{t_estado:>5.1f} µs | {t_historial:>5.0f} µs | {t_stats:>5.0f} µs | {capacidad:>14,.0f}")
+        federado.running = False
+
+    print()
+    print(f"Sitios/núcleo: sitios que un núcleo avanza cada {INTERVALO_S:.0f} s (solo el tick, sin atender clientes)")
+
+
+if __name__ == "__main__":
+    main()
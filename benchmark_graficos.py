@@ -0,0 +1,89 @@
+"""
+Benchmark: reducción de puntos en los gráficos del dashboard
+
+Para historiales de 144 a 100 000 muestras (2 y 16 zonas) compara
+crear_grafico_tendencias y crear_grafico_actividad_bombas sin reducir y con
+el presupuesto de puntos por traza (LTTB para sensores, transiciones para
+bombas): tiempo de construir la figura y tamaño del JSON que recibe el
+navegador. Verifica además que la reducción de las bombas es exacta (la
+línea escalonada pasa por todas las muestras).
+
+Uso:
+    python3 benchmark_graficos.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+from reduccion_series import PUNTOS_POR_TRAZA, indices_transiciones
+
+# El dashboard se importa sin `streamlit run` (modo bare): silenciar sus avisos
+os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+with contextlib.redirect_stdout(io.StringIO()):
+    import dashboard_streamlit as dashboard
+
+MUESTRAS = [144, 1_000, 10_000, 100_000]
+ZONAS = [2, 16]
+SIN_REDUCIR = 10 ** 9
+
+
+def medir(funcion, historial, max_puntos):
+    """(ms, KB de JSON) de construir y serializar una figura"""
+    inicio = time.perf_counter()
+    figura = funcion(historial, max_puntos).to_json()
+    return (time.perf_counter() - inicio) * 1e3, len(figura) / 1024
+
+
+def transiciones_exactas(historial, zonas):
+    """La línea escalonada (line_shape='hv') por los puntos elegidos reproduce cada muestra"""
+    for k in range(1, zonas + 1):
+        estados = np.asarray(historial[f'bomba{k}'], dtype=bool)
+        idx = indices_transiciones(estados, len(estados))
+        reconstruida = estados[idx][np.searchsorted(idx, np.arange(len(estados)), side='right') - 1]
+        if not np.array_equal(reconstruida, estados):
+            return False
+    return True
+
+
+def main():
+    print("=" * 100)
+    print(f"📉 REDUCCIÓN DE PUNTOS EN GRÁFICOS ({PUNTOS_POR_TRAZA} puntos por traza)")
+    print("=" * 100)
+    print(f"{'Zonas':>5s} | {'Muestras':>8s} | {'Tendencias: sin límite':>22s} | {'con presupuesto':>18s} | "
+          f"{'Bombas: sin límite':>20s} | {'con presupuesto':>16s}")
+    print("-" * 100)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        sistema = dashboard.SistemaRiegoStreamlit()
+        sistema.generar_datos_fake(144)
+    dashboard.crear_grafico_tendencias(sistema.historial).to_json()
+
+    exactas = True
+    for zonas in ZONAS:
+        for muestras in MUESTRAS:
+            with contextlib.redirect_stdout(io.StringIO()):
+                sistema.generar_datos_fake(muestras, zonas=zonas)
+            historial = sistema.historial
+            exactas &= transiciones_exactas(historial, zonas)
+            celdas = []
+            for funcion in (dashboard.crear_grafico_tendencias, dashboard.crear_grafico_actividad_bombas):
+                for max_puntos in (SIN_REDUCIR, PUNTOS_POR_TRAZA):
+                    ms, kb = medir(funcion, historial, max_puntos)
+                    celdas.append(f"{ms:>7.0f} ms / {kb:>6.0f} KB")
+            print(f"{zonas:>5d} | {muestras:>8,d} | {celdas[0]:>22s} | {celdas[1]:>18s} | "
+                  f"{celdas[2]:>20s} | {celdas[3]:>16s}")
+
+    print()
+    if not exactas:
+        print("❌ La reducción de las bombas pierde cambios de estado")
+        sys.exit(1)
+    print("✅ La reducción de las bombas conserva todos los cambios de estado")
+
+
+if __name__ == "__main__":
+    main()
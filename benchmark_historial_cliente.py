@@ -0,0 +1,100 @@
+"""
+Benchmark: historial del controlador, lista de diccionarios vs columnas
+
+Para respuestas HISTORIAL_RECIENTE de distintos tamaños y zonas compara:
+- el parser anterior (un diccionario por línea HR:) y el columnar
+  (ControladorSimple.parsear_historial)
+- la memoria de cada representación (tracemalloc)
+- extraer las últimas 20 lecturas de un sensor (gráficos ASCII) y el
+  promedio de una columna completa (estadísticas)
+
+y comprueba que ambas representaciones tienen los mismos valores.
+
+Uso:
+    python3 benchmark_historial_cliente.py
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+
+from controlador_corregido import ControladorSimple, zonas_en_respuesta
+from simulador_corregido import SistemaRiegoSimulator
+
+TAMANOS = [1_000, 10_000, 50_000]
+ZONAS = [2, 8]
+
+
+def parsear_diccionarios(data):
+    """Parser anterior: un diccionario por línea HR:"""
+    historial = []
+    for line in data.split('\n'):
+        line = line.strip()
+        if line.startswith('HR:'):
+            parts = line.split(':')[1].split(',')
+            z, extras = zonas_en_respuesta(len(parts) - 1)
+            entrada = {'indice': int(parts[0])}
+            for k in range(z):
+                entrada[f'humedad{k + 1}'] = float(parts[1 + k])
+                entrada[f'temperatura{k + 1}'] = float(parts[1 + z + k])
+                entrada[f'bomba{k + 1}'] = bool(int(parts[1 + 2 * z + k]))
+            entrada['temp_planta'] = float(parts[1 + 3 * z]) if extras else 0.0
+            entrada['humedad_relativa'] = float(parts[2 + 3 * z]) if extras else 0.0
+            historial.append(entrada)
+    return historial
+
+
+def medir(funcion):
+    """(milisegundos, bytes asignados que siguen vivos, resultado); tracemalloc solo en la segunda pasada"""
+    inicio = time.perf_counter()
+    funcion()
+    t = (time.perf_counter() - inicio) * 1e3
+    tracemalloc.start()
+    resultado = funcion()
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return t, memoria, resultado
+
+
+def cronometrar(funcion, repeticiones=200):
+    """Tiempo medio por llamada en microsegundos"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def main():
+    print("=" * 100)
+    print("📋 HISTORIAL DEL CONTROLADOR: diccionarios por fila vs columnas")
+    print("=" * 100)
+    print(f"{'Zonas':>5s} | {'Filas':>6s} | {'Parseo dict':>11s} | {'Parseo col':>10s} | {'Memoria dict':>12s} | "
+          f"{'Memoria col':>11s} | {'Ahorro':>6s} | {'Últimas 20':>14s} | {'Promedio':>16s}")
+    print("-" * 100)
+    for zonas in ZONAS:
+        simulador = SistemaRiegoSimulator(verbose=False, zonas=zonas, capacidad_historial=max(TAMANOS),
+                                          precarga=max(TAMANOS))
+        for n in TAMANOS:
+            respuesta = simulador.generar_respuesta_historial(n)
+            controlador = ControladorSimple()
+            t_dict, m_dict, filas = medir(lambda: parsear_diccionarios(respuesta))
+            t_col, m_col, _ = medir(lambda: controlador.parsear_historial(respuesta))
+            historial = controlador.historial
+
+            for nombre in ('humedad1', f'temperatura{zonas}', 'humedad_relativa', f'bomba{zonas}'):
+                assert np.allclose([f[nombre] for f in filas], historial.columna(nombre), atol=1e-4)
+
+            u_dict = cronometrar(lambda: [h['humedad1'] for h in filas[-20:]])
+            u_col = cronometrar(lambda: historial.columna('humedad1', 20))
+            p_dict = cronometrar(lambda: sum(h['humedad1'] for h in filas) / len(filas), 20)
+            p_col = cronometrar(lambda: historial.columna('humedad1').mean(), 20)
+            print(f"{zonas:>5d} | {n:>6d} | {t_dict:>8.1f} ms | {t_col:>7.1f} ms | {m_dict / 1e6:>9.2f} MB | "
+                  f"{m_col / 1e6:>8.2f} MB | {m_dict / m_col:>5.1f}x | {u_dict:>5.1f}/{u_col:>4.1f} µs | "
+                  f"{p_dict:>7.0f}/{p_col:>5.0f} µs")
+    print()
+    print("✅ Mismos valores en ambas representaciones (tiempos: diccionarios/columnas)")
+
+
+if __name__ == "__main__":
+    main()
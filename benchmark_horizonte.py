@@ -0,0 +1,110 @@
+"""
+Benchmark: simulación acelerada y repetición determinista
+
+1. Verifica que dos corridas con la misma semilla producen exactamente el
+   mismo historial y estado (bit a bit), que avanzar de a un tick o por
+   lotes da el mismo resultado y que otra semilla da otro.
+2. Simula horizontes largos (de un día a un año) sin esperas con el reloj
+   virtual y mide el tiempo real, la velocidad lograda respecto al tiempo
+   real y el costo de ESTADISTICAS sobre el historial resultante.
+
+Uso:
+    python3 benchmark_horizonte.py
+"""
+
+import contextlib
+import hashlib
+import io
+import math
+import sys
+import time
+
+from simulador_corregido import SistemaRiegoSimulator
+
+DIA = 24 * 3600
+INICIO = 1_700_000_000  # Instante simulado fijo para que los registros también se repitan
+CAPACIDAD = 7 * DIA // 3  # Una semana de muestras cada 3 s
+
+# (nombre, duración simulada en segundos, intervalo entre muestras)
+HORIZONTES = [
+    ("1 día", DIA, 3.0),
+    ("1 semana", 7 * DIA, 3.0),
+    ("30 días", 30 * DIA, 3.0),
+    ("1 año", 365 * DIA, 600.0),
+]
+
+
+def crear(semilla, intervalo=3.0, capacidad=CAPACIDAD, zonas=2):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return SistemaRiegoSimulator(verbose=False, capacidad_historial=capacidad, zonas=zonas,
+                                     intervalo=intervalo, velocidad=math.inf, semilla=semilla,
+                                     inicio=INICIO, en_segundo_plano=False)
+
+
+def huella(simulador):
+    """Resumen SHA-256 del historial y del estado actual"""
+    h = hashlib.sha256()
+    h.update(simulador.historial.ultimos().tobytes())
+    h.update(simulador.estado.tobytes())
+    return h.hexdigest()[:16]
+
+
+def verificar():
+    """Devuelve el número de fallos de la repetición determinista"""
+    fallos = 0
+    huellas = []
+    for lote in (1000, 1000, 1):
+        simulador = crear(semilla=42, capacidad=50_000, zonas=4)
+        with contextlib.redirect_stdout(io.StringIO()) as registro:
+            simulador.ejecutar(DIA, lote=lote)
+        huellas.append((huella(simulador), registro.getvalue()))
+
+    otra = crear(semilla=43, capacidad=50_000, zonas=4)
+    with contextlib.redirect_stdout(io.StringIO()):
+        otra.ejecutar(DIA)
+
+    for descripcion, ok in (
+        ("Misma semilla, dos corridas: historial y registros idénticos", huellas[0] == huellas[1]),
+        ("Un tick a la vez = ticks por lotes", huellas[0] == huellas[2]),
+        ("Otra semilla: historial distinto", huella(otra) != huellas[0][0]),
+    ):
+        print(f"{'✅' if ok else '❌'} {descripcion}")
+        fallos += not ok
+    print(f"   huella semilla 42: {huellas[0][0]}")
+    return fallos
+
+
+def main():
+    print("=" * 84)
+    print("⏩ SIMULACIÓN ACELERADA Y REPETICIÓN DETERMINISTA")
+    print("=" * 84)
+    if verificar():
+        sys.exit(1)
+    print()
+
+    print(f"{'Horizonte':>10s} | {'Intervalo':>9s} | {'Muestras':>10s} | {'Tiempo real':>11s} | "
+          f"{'Velocidad':>12s} | {'STATS':>8s} | {'Riego':>6s}")
+    print("-" * 84)
+    for nombre, duracion, intervalo in HORIZONTES:
+        simulador = crear(semilla=1, intervalo=intervalo)
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            muestras = simulador.ejecutar(duracion)
+        t_real = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        for _ in range(1_000):
+            simulador.generar_estadisticas()
+        t_stats = (time.perf_counter() - inicio) * 1e3
+        riego = simulador.estadisticas.promedios()[-simulador.zonas:].mean() * 100
+
+        print(f"{nombre:>10s} | {intervalo:>7.0f} s | {muestras:>10,d} | {t_real:>9.2f} s | "
+              f"{duracion / t_real:>11,.0f}x | {t_stats:>5.1f} µs | {riego:>5.1f}%")
+
+    print()
+    print(f"Historial de {CAPACIDAD:,} muestras (una semana a 3 s); Riego = % de tiempo con bomba "
+          f"encendida en la ventana")
+
+
+if __name__ == "__main__":
+    main()
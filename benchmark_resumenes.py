@@ -0,0 +1,102 @@
+"""
+Benchmark: resúmenes por niveles (crudas, 1 min, 10 min, 1 h)
+
+Carga 90 días de muestras cada 3 s (2 zonas) en ResumenesTiempo y en un
+almacén por segmentos temporal y mide:
+- ingesta: muestra a muestra (como el tick del simulador) y por lotes
+- consultas con el nivel elegido automáticamente (cubeta y puntos por
+  ventana) frente a agrupar el almacén en disco con la misma cubeta
+- que ambas respuestas coincidan cuando la ventana está alineada
+
+Uso:
+    python3 benchmark_resumenes.py
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from almacen_segmentos import AlmacenSegmentos
+from generador_historial import generar_historial
+from resumenes_tiempo import ResumenesTiempo
+from simulador_corregido import columnas_historial
+
+INTERVALO = 3.0
+MUESTRAS = 90 * 24 * 3600 // 3
+LOTE = 1_000
+HORA = 3600
+DIA = 24 * HORA
+
+VENTANAS = [("1 hora", HORA), ("1 día", DIA), ("1 semana", 7 * DIA), ("30 días", 30 * DIA), ("90 días", 90 * DIA)]
+
+
+def cronometrar(funcion, repeticiones):
+    """Tiempo medio por llamada en milisegundos"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e3, resultado
+
+
+def main():
+    columnas = columnas_historial(2)
+    h = generar_historial(MUESTRAS, zonas=2, semilla=0, intervalo_min=INTERVALO / 60)
+    filas = np.column_stack([h['humedad'], h['temperatura'], h['temp_planta'],
+                             h['humedad_relativa'], h['bombas']])
+    tiempos = np.arange(MUESTRAS) * INTERVALO
+    directorio = tempfile.mkdtemp(prefix='resumenes_')
+    try:
+        print("=" * 84)
+        print(f"🪜 RESÚMENES POR NIVELES: {MUESTRAS:,} muestras (90 días cada {INTERVALO:.0f} s, 2 zonas)")
+        print("=" * 84)
+
+        prueba = ResumenesTiempo(columnas)
+        n = 20_000
+        inicio = time.perf_counter()
+        for i in range(n):
+            prueba.agregar_lote(tiempos[i:i + 1], filas[i:i + 1])
+        t_una = (time.perf_counter() - inicio) / n * 1e6
+        print(f"✍️  Muestra a muestra: {t_una:.1f} µs por muestra ({1e6 / t_una:,.0f} muestras/s)")
+
+        resumenes = ResumenesTiempo(columnas)
+        inicio = time.perf_counter()
+        for i in range(0, MUESTRAS, LOTE):
+            resumenes.agregar_lote(tiempos[i:i + LOTE], filas[i:i + LOTE])
+        t_lotes = time.perf_counter() - inicio
+        print(f"✍️  Lotes de {LOTE}: {MUESTRAS / t_lotes:,.0f} muestras/s")
+
+        almacen = AlmacenSegmentos(os.path.join(directorio, 'segmentos'), columnas)
+        almacen.agregar_lote(tiempos, filas)
+        print()
+
+        print(f"{'Ventana':>9s} | {'Cubeta':>7s} | {'Puntos':>6s} | {'Niveles':>9s} | {'Disco':>9s} | "
+              f"{'Aceleración':>11s} | {'Coinciden':>9s}")
+        print("-" * 84)
+        fin = tiempos[-1] + INTERVALO
+        todas_coinciden = True
+        for nombre, ventana in VENTANAS:
+            t_niveles, resumen = cronometrar(lambda: resumenes.consultar(fin - ventana, fin), 20)
+            cubeta = resumen['cubeta']
+            if cubeta:
+                t_disco, referencia = cronometrar(lambda: almacen.agrupar(fin - ventana, fin, cubeta), 3)
+            else:
+                t_disco, (t_ref, f_ref) = cronometrar(lambda: almacen.rango(fin - ventana, fin), 3)
+                referencia = {'tiempo': t_ref, 'promedio': f_ref}
+            coinciden = (np.array_equal(resumen['tiempo'], referencia['tiempo'])
+                         and np.allclose(resumen['promedio'], referencia['promedio'], atol=1e-4))
+            todas_coinciden &= coinciden
+            print(f"{nombre:>9s} | {cubeta:>5d} s | {len(resumen['tiempo']):>6d} | {t_niveles:>6.2f} ms | "
+                  f"{t_disco:>6.1f} ms | {t_disco / t_niveles:>10.0f}x | {'✅' if coinciden else '❌':>8s}")
+
+        print()
+        print("✅ Los niveles coinciden con el almacén" if todas_coinciden else "❌ Diferencias con el almacén")
+        almacen.cerrar()
+    finally:
+        shutil.rmtree(directorio)
+
+
+if __name__ == "__main__":
+    main()
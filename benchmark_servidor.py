@@ -0,0 +1,163 @@
+"""
+Benchmark de carga: motor de hilos vs motor asyncio del simulador
+
+Lanza el simulador en un subproceso con cada motor, abre muchas conexiones
+inactivas (gateways/dashboards conectados) y mide, con algunos clientes
+activos haciendo STATUS, el throughput, la latencia y el consumo del servidor.
+
+Uso:
+    python3 benchmark_servidor.py --inactivas 2000 --activos 20 --segundos 5
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from protocolo import leer_trama_async
+
+
+def subir_limite_descriptores():
+    """Sube el límite de descriptores abiertos (lo heredan los subprocesos)"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or hard > soft:
+        objetivo = 65536 if hard == resource.RLIM_INFINITY else hard
+        resource.setrlimit(resource.RLIMIT_NOFILE, (objetivo, hard))
+
+
+def leer_proc_status(pid):
+    """Lee memoria residente (kB) e hilos del proceso servidor (solo Linux)"""
+    info = {'rss_kb': 0, 'hilos': 0}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    info['rss_kb'] = int(linea.split()[1])
+                elif linea.startswith('Threads:'):
+                    info['hilos'] = int(linea.split()[1])
+    except OSError:
+        pass
+    return info
+
+
+async def esperar_servidor(host, port, timeout=10.0):
+    """Espera a que el servidor acepte conexiones"""
+    limite = time.perf_counter() + timeout
+    while time.perf_counter() < limite:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            await leer_trama_async(reader)
+            writer.close()
+            return True
+        except (OSError, asyncio.IncompleteReadError):
+            await asyncio.sleep(0.1)
+    return False
+
+
+async def abrir_inactivas(host, port, cantidad):
+    """Abre conexiones que solo leen el estado inicial y quedan ociosas"""
+    conexiones = []
+    for _ in range(cantidad):
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            await leer_trama_async(reader)
+            conexiones.append(writer)
+        except OSError as e:
+            print(f"⚠️ Solo se abrieron {len(conexiones)} conexiones inactivas: {e}")
+            break
+    return conexiones
+
+
+async def cliente_activo(host, port, fin, latencias):
+    """Envía STATUS en bucle hasta el instante fin"""
+    reader, writer = await asyncio.open_connection(host, port)
+    await leer_trama_async(reader)
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        writer.write(b"STATUS\n")
+        await writer.drain()
+        await leer_trama_async(reader)
+        latencias.append(time.perf_counter() - inicio)
+    writer.close()
+
+
+async def medir_motor(motor, args):
+    """Ejecuta el escenario completo contra un motor"""
+    proceso = subprocess.Popen(
+        [sys.executable, 'simulador_corregido.py', '--motor', motor,
+         '--host', args.host, '--port', str(args.port), '--silencioso'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    try:
+        if not await esperar_servidor(args.host, args.port):
+            print(f"❌ El servidor ({motor}) no respondió")
+            return None
+
+        inicio_conexiones = time.perf_counter()
+        inactivas = await abrir_inactivas(args.host, args.port, args.inactivas)
+        tiempo_conexiones = time.perf_counter() - inicio_conexiones
+
+        latencias = []
+        fin = time.perf_counter() + args.segundos
+        await asyncio.gather(*[
+            cliente_activo(args.host, args.port, fin, latencias)
+            for _ in range(args.activos)
+        ])
+
+        info = leer_proc_status(proceso.pid)
+        for writer in inactivas:
+            writer.close()
+
+        latencias.sort()
+        return {
+            'motor': motor,
+            'inactivas': len(inactivas),
+            'conexion_s': tiempo_conexiones,
+            'req_s': len(latencias) / args.segundos,
+            'p50_ms': latencias[len(latencias) // 2] * 1000 if latencias else 0.0,
+            'p99_ms': latencias[int(len(latencias) * 0.99)] * 1000 if latencias else 0.0,
+            'rss_mb': info['rss_kb'] / 1024,
+            'hilos': info['hilos'],
+        }
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de motores del simulador")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9998)
+    parser.add_argument('--inactivas', type=int, default=1000)
+    parser.add_argument('--activos', type=int, default=10)
+    parser.add_argument('--segundos', type=float, default=5.0)
+    parser.add_argument('--motores', nargs='+', default=['hilos', 'asyncio'])
+    args = parser.parse_args()
+
+    subir_limite_descriptores()
+
+    print("=" * 90)
+    print(f"🏁 BENCHMARK SERVIDOR: {args.inactivas} inactivas + {args.activos} activos, {args.segundos:.0f}s")
+    print("=" * 90)
+
+    resultados = []
+    for motor in args.motores:
+        print(f"⏳ Midiendo motor '{motor}'...")
+        resultado = asyncio.run(medir_motor(motor, args))
+        if resultado:
+            resultados.append(resultado)
+
+    print()
+    print(f"{'Motor':8s} | {'Inactivas':>9s} | {'Conex(s)':>8s} | {'Req/s':>9s} | {'p50(ms)':>8s} | {'p99(ms)':>8s} | {'RSS(MB)':>8s} | {'Hilos':>6s}")
+    print("-" * 90)
+    for r in resultados:
+        print(f"{r['motor']:8s} | {r['inactivas']:9d} | {r['conexion_s']:8.2f} | {r['req_s']:9.0f} | "
+              f"{r['p50_ms']:8.2f} | {r['p99_ms']:8.2f} | {r['rss_mb']:8.1f} | {r['hilos']:6d}")
+
+
+if __name__ == "__main__":
+    main()
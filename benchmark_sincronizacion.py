@@ -0,0 +1,109 @@
+"""
+Benchmark: sincronizar el historial del controlador
+
+Con el simulador en proceso (sin red) compara, por actualización:
+- volver a descargar y parsear todo el historial (HISTORIAL_RECIENTE n)
+- pedir solo lo nuevo (HISTORIAL_DESDE <seq>) y agregarlo al historial local
+
+para distintas cantidades de muestras nuevas entre actualizaciones, y
+comprueba que el historial incremental queda igual al del simulador,
+también cuando el buffer del simulador da la vuelta o el simulador se
+reinicia y su nuevo total ya supera la secuencia del controlador
+(resincronización).
+
+Uso:
+    python3 benchmark_sincronizacion.py
+"""
+
+import math
+import time
+
+import numpy as np
+
+import controlador_corregido
+from controlador_corregido import ControladorSimple
+from simulador_corregido import SistemaRiegoSimulator
+
+CAPACIDAD = 10_000
+NUEVAS = [1, 10, 100, 1000]
+ZONAS = [2, 8]
+
+
+def cronometrar(funcion, repeticiones):
+    """Tiempo medio por llamada en milisegundos"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e3
+
+
+def sincronizar(simulador, controlador):
+    """Un HISTORIAL_DESDE aplicado al controlador; devuelve los bytes de la respuesta"""
+    respuesta = simulador.procesar_comando(controlador.comando_historial_desde()).encode('utf-8')
+    controlador.aplicar_historial_desde(respuesta)
+    return len(respuesta)
+
+
+def comprobar(simulador, controlador):
+    filas, total = simulador.historial.instantanea(len(controlador.historial))
+    assert controlador.historial.ultima_seq == total - 1
+    assert np.allclose(controlador.historial.columna('humedad1'), filas[:, 0], atol=0.051)
+    assert np.array_equal(controlador.historial.columna('indice'), np.arange(total - len(filas), total))
+    # La hora de cada muestra es la del simulador (creciente, sin marcas inventadas por el cliente)
+    tiempos = simulador.historial.desde(total - len(filas) - 1)[1]
+    assert np.allclose(controlador.historial.columna('tiempo'), tiempos, atol=1e-3)
+    assert (np.diff(controlador.historial.columna('tiempo')) > 0).all()
+
+
+def main():
+    controlador_corregido.CAPACIDAD_HISTORIAL = CAPACIDAD
+    print("=" * 84)
+    print(f"🔄 SINCRONIZACIÓN DEL HISTORIAL ({CAPACIDAD:,} muestras en el simulador y en el controlador)")
+    print("=" * 84)
+    print(f"{'Zonas':>5s} | {'Nuevas':>6s} | {'Completo':>10s} | {'Bytes':>9s} | {'Incremental':>11s} | "
+          f"{'Bytes':>9s} | {'Mejora':>7s}")
+    print("-" * 84)
+    for zonas in ZONAS:
+        simulador = SistemaRiegoSimulator(verbose=False, zonas=zonas, capacidad_historial=CAPACIDAD,
+                                          precarga=CAPACIDAD, en_segundo_plano=False, velocidad=math.inf)
+        completo = ControladorSimple()
+        incremental = ControladorSimple()
+        sincronizar(simulador, incremental)
+        for nuevas in NUEVAS:
+            def recarga():
+                respuesta = simulador.procesar_comando(f"HISTORIAL_RECIENTE {CAPACIDAD}")
+                completo.parsear_historial(respuesta)
+                return len(respuesta)
+
+            bytes_completo = recarga()
+            t_completo = cronometrar(recarga, 3)
+            tiempos = []
+            for _ in range(3):
+                simulador.tick(nuevas)
+                inicio = time.perf_counter()
+                bytes_delta = sincronizar(simulador, incremental)
+                tiempos.append((time.perf_counter() - inicio) * 1e3)
+                comprobar(simulador, incremental)
+            t_delta = sum(tiempos) / len(tiempos)
+            print(f"{zonas:>5d} | {nuevas:>6d} | {t_completo:>7.1f} ms | {bytes_completo / 1024:>6.0f} KB | "
+                  f"{t_delta:>8.2f} ms | {bytes_delta / 1024:>6.1f} KB | {t_completo / max(t_delta, 1e-3):>6.0f}x")
+
+        # El simulador avanza más que su capacidad: hueco y resincronización completa
+        simulador.tick(CAPACIDAD + 500)
+        sincronizar(simulador, incremental)
+        comprobar(simulador, incremental)
+
+        # Otro arranque del simulador cuyo total ya pasó la secuencia del controlador:
+        # el arranque distinto fuerza la resincronización completa
+        reiniciado = SistemaRiegoSimulator(verbose=False, zonas=zonas, capacidad_historial=CAPACIDAD,
+                                           precarga=CAPACIDAD, en_segundo_plano=False, velocidad=math.inf)
+        reiniciado.tick(incremental.historial.ultima_seq - CAPACIDAD + 100)
+        sincronizar(reiniciado, incremental)
+        comprobar(reiniciado, incremental)
+        assert len(incremental.historial) == CAPACIDAD
+    print()
+    print("✅ Historial incremental igual al del simulador (también tras dar la vuelta el buffer y tras un reinicio)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: HISTORIAL por cubetas con SQLite
+
+Carga 30 días de muestras cada 3 s (2 zonas) en una base SQLite temporal
+y, para varias ventanas y tamaños de cubeta, compara:
+- el resumen mín/prom/máx calculado en SQL (HistorialSQLite.agrupar)
+- el mismo resumen con NumPy sobre el almacén por segmentos
+- los bytes de la respuesta HISTORIAL frente a enviar las muestras crudas
+  con el formato de HISTORIAL_RECIENTE
+
+Uso:
+    python3 benchmark_sqlite.py
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from almacen_segmentos import AlmacenSegmentos
+from generador_historial import generar_historial
+from historial_sqlite import HistorialSQLite
+from simulador_corregido import columnas_historial, formatear_historial, formatear_historial_agrupado
+
+INTERVALO = 3.0
+MUESTRAS = 30 * 24 * 3600 // 3
+HORA = 3600
+DIA = 24 * HORA
+
+# (ventana, segundos, cubeta)
+CONSULTAS = [
+    ("1 hora", HORA, 60),
+    ("1 día", DIA, 600),
+    ("1 semana", 7 * DIA, HORA),
+    ("30 días", 30 * DIA, HORA),
+]
+
+
+def cronometrar(funcion, repeticiones):
+    """Tiempo medio por llamada en milisegundos"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e3, resultado
+
+
+def main():
+    columnas = columnas_historial(2)
+    h = generar_historial(MUESTRAS, zonas=2, semilla=0, intervalo_min=INTERVALO / 60)
+    filas = np.column_stack([h['humedad'], h['temperatura'], h['temp_planta'],
+                             h['humedad_relativa'], h['bombas']])
+    tiempos = np.arange(MUESTRAS) * INTERVALO
+    directorio = tempfile.mkdtemp(prefix='historial_sqlite_')
+    try:
+        print("=" * 96)
+        print(f"🗃️ HISTORIAL POR CUBETAS: {MUESTRAS:,} muestras (30 días cada {INTERVALO:.0f} s, 2 zonas)")
+        print("=" * 96)
+
+        base = HistorialSQLite(os.path.join(directorio, 'historial.db'), columnas)
+        inicio = time.perf_counter()
+        for i in range(0, MUESTRAS, 10_000):
+            base.agregar_lote(tiempos[i:i + 10_000], filas[i:i + 10_000])
+        t_sqlite = time.perf_counter() - inicio
+        segmentos = AlmacenSegmentos(os.path.join(directorio, 'segmentos'), columnas)
+        segmentos.agregar_lote(tiempos, filas)
+        tamano = os.path.getsize(os.path.join(directorio, 'historial.db')) / 1e6
+        print(f"✍️  Carga SQLite: {t_sqlite:.1f} s ({MUESTRAS / t_sqlite:,.0f} muestras/s, {tamano:.0f} MB)")
+        print()
+
+        print(f"{'Ventana':>9s} | {'Cubeta':>7s} | {'Cubetas':>7s} | {'SQL':>9s} | {'NumPy':>9s} | "
+              f"{'HISTORIAL':>10s} | {'Crudo':>10s} | {'Reducción':>9s}")
+        print("-" * 96)
+        fin = tiempos[-1] + INTERVALO
+        for nombre, ventana, cubeta in CONSULTAS:
+            repeticiones = 3 if ventana > DIA else 20
+            t_sql, resumen = cronometrar(lambda: base.agrupar(fin - ventana, fin, cubeta), repeticiones)
+            t_numpy, _ = cronometrar(lambda: segmentos.agrupar(fin - ventana, fin, cubeta), repeticiones)
+            respuesta = formatear_historial_agrupado(resumen, 2, cubeta)
+            _, crudas = segmentos.rango(fin - ventana, fin)
+            bytes_crudos = len(formatear_historial(crudas, 2, 0))
+            print(f"{nombre:>9s} | {cubeta:>5d} s | {len(resumen['tiempo']):>7d} | {t_sql:>6.1f} ms | "
+                  f"{t_numpy:>6.1f} ms | {len(respuesta) / 1024:>7.1f} KB | {bytes_crudos / 1024:>7.0f} KB | "
+                  f"{bytes_crudos / len(respuesta):>8.0f}x")
+
+        base.cerrar()
+        segmentos.cerrar()
+    finally:
+        shutil.rmtree(directorio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: tick del simulador por número de zonas
+
+Compara el tick vectorizado de SistemaRiegoSimulator (ruido, límites y
+riego sobre el vector de estado) con el bucle zona por zona anterior
+(random.uniform y round por sensor), y mide cuántas muestras por segundo
+admite un tick por muestra y un tick por lotes.
+
+Uso:
+    python3 benchmark_tick.py
+"""
+
+import contextlib
+import io
+import random
+import time
+
+from simulador_corregido import SistemaRiegoSimulator
+
+ZONAS = [2, 8, 32, 128, 512, 2048]
+LOTE = 1_000
+
+
+def cronometrar(funcion, repeticiones):
+    """Tiempo medio por llamada en microsegundos"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def tick_escalar(humedad, temperatura, ambiente, bombas):
+    """Bucle anterior: variación, límites, redondeo y riego zona por zona"""
+    for i in range(len(humedad)):
+        humedad[i] = round(max(0, min(100, humedad[i] + random.uniform(-1, 1))), 1)
+        temperatura[i] = round(max(15, min(40, temperatura[i] + random.uniform(-0.3, 0.3))), 1)
+    ambiente[0] = round(max(12, min(35, ambiente[0] + random.uniform(-0.2, 0.2))), 1)
+    ambiente[1] = round(max(30, min(95, ambiente[1] + random.uniform(-2, 2))), 1)
+    for i in range(len(humedad)):
+        if humedad[i] < 30.0 and not bombas[i]:
+            bombas[i] = True
+        elif humedad[i] > 70.0 and bombas[i]:
+            bombas[i] = False
+
+
+def main():
+    print("=" * 86)
+    print(f"⏱️ TICK DEL SIMULADOR POR NÚMERO DE ZONAS (lotes de {LOTE} muestras)")
+    print("=" * 86)
+    print(f"{'Zonas':>6s} | {'Bucle por zona':>14s} | {'tick()':>12s} | "
+          f"{'tick(lote)':>14s} | {'Speedup':>8s} | {'Muestras/s':>12s}")
+    print("-" * 86)
+
+    for zonas in ZONAS:
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulador = SistemaRiegoSimulator(verbose=False, zonas=zonas)
+            simulador.running = False
+
+            estado = simulador.estado.tolist()
+            humedad, temperatura = estado[:zonas], estado[zonas:2 * zonas]
+            ambiente, bombas = estado[2 * zonas:2 * zonas + 2], [False] * zonas
+            repeticiones = max(20, 100_000 // zonas)
+            t_escalar = cronometrar(lambda: tick_escalar(humedad, temperatura, ambiente, bombas), repeticiones)
+            t_vector = cronometrar(simulador.tick, 2_000)
+            t_lote = cronometrar(lambda: simulador.tick(LOTE), 5) / LOTE
+
+        print(f"{zonas:>6d} | {t_escalar:>11.1f} µs | {t_vector:>9.1f} µs | "
+              f"{t_lote:>11.1f} µs | {t_escalar / t_lote:>7.1f}x | {1e6 / t_lote:>12,.0f}")
+
+    print()
+    print("Bucle por zona: solo sensores y riego (sin historial)")
+    print("tick(): además agrega la muestra al historial y actualiza las estadísticas incrementales")
+    print(f"tick(lote): costo por muestra avanzando {LOTE} muestras por llamada (Speedup frente al bucle)")
+
+
+if __name__ == "__main__":
+    main()
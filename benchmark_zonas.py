@@ -0,0 +1,99 @@
+"""
+Benchmark: costo por número de zonas
+
+Para N zonas (de 2 a 256) mide, con el mismo código que el simulador, el
+controlador y el dashboard:
+- STATUS, HISTORIAL_RECIENTE y ESTADISTICAS: tiempo de generación, bytes y
+  tiempo de parseo en ControladorSimple
+- dashboard: tiempo de construir las figuras (tendencias, bombas,
+  estadísticas, tiempo de riego) y tamaño del JSON que se envía al
+  navegador
+
+Uso:
+    python3 benchmark_zonas.py
+"""
+
+import contextlib
+import io
+import os
+import time
+
+from controlador_corregido import ControladorSimple
+from simulador_corregido import SistemaRiegoSimulator
+
+# El dashboard se importa sin `streamlit run` (modo bare): silenciar sus avisos
+os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+with contextlib.redirect_stdout(io.StringIO()):
+    import dashboard_streamlit as dashboard
+
+ZONAS = [2, 8, 32, 64, 128, 256]
+MUESTRAS = 144
+
+
+def cronometrar(funcion, repeticiones):
+    """Tiempo medio por llamada en microsegundos"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def figuras_dashboard(sistema):
+    """Construye las figuras del dashboard y devuelve sus JSON"""
+    return [
+        dashboard.crear_grafico_tendencias(sistema.historial).to_json(),
+        dashboard.crear_grafico_actividad_bombas(sistema.historial).to_json(),
+        dashboard.go.Figure(data=dashboard.barras_estadisticas(sistema.estadisticas, 'hum', 'Zona',
+                                                               dashboard.COLORES_HUMEDAD)).to_json(),
+        dashboard.crear_grafico_tiempo_riego(sistema.estadisticas).to_json(),
+    ]
+
+
+def main():
+    print("=" * 104)
+    print(f"🌱 COSTO POR NÚMERO DE ZONAS (historial de {MUESTRAS} muestras)")
+    print("=" * 104)
+    print(f"{'Zonas':>6s} | {'STATUS':>16s} | {'HISTORIAL':>22s} | {'ESTADISTICAS':>12s} | "
+          f"{'Parseo ctrl':>14s} | {'Figuras':>20s}")
+    print(f"{'':>6s} | {'gen µs / bytes':>16s} | {'gen ms / KB':>22s} | {'gen µs':>12s} | "
+          f"{'STATUS/HR µs':>14s} | {'ms / KB JSON':>20s}")
+    print("-" * 104)
+
+    # Primera figura fuera de la medición (carga de plantillas de Plotly)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sistema = dashboard.SistemaRiegoStreamlit()
+        sistema.generar_datos_fake(MUESTRAS)
+    figuras_dashboard(sistema)
+
+    for zonas in ZONAS:
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulador = SistemaRiegoSimulator(verbose=False, capacidad_historial=MUESTRAS,
+                                              precarga=MUESTRAS, zonas=zonas)
+            simulador.running = False
+            controlador = ControladorSimple()
+            sistema = dashboard.SistemaRiegoStreamlit()
+            sistema.generar_datos_fake(MUESTRAS, zonas=zonas)
+
+        repeticiones = max(20, 20_000 // zonas)
+        estado = simulador.generar_respuesta_estado()
+        historial = simulador.generar_respuesta_historial(MUESTRAS)
+        t_estado = cronometrar(simulador.generar_respuesta_estado, repeticiones)
+        t_historial = cronometrar(lambda: simulador.generar_respuesta_historial(MUESTRAS), max(5, repeticiones // 50))
+        t_stats = cronometrar(simulador.generar_estadisticas, repeticiones)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            p_estado = cronometrar(lambda: controlador.parsear_estado(estado), repeticiones)
+            p_historial = cronometrar(lambda: controlador.parsear_historial(historial), max(5, repeticiones // 50))
+        assert controlador.zonas == zonas
+
+        inicio = time.perf_counter()
+        figuras = figuras_dashboard(sistema)
+        t_figuras = (time.perf_counter() - inicio) * 1e3
+        kb_figuras = sum(len(f) for f in figuras) / 1024
+
+        print(f"{zonas:>6d} | {t_estado:>7.1f} / {len(estado):>6d} | {t_historial / 1e3:>9.2f} / {len(historial) / 1024:>10.1f} | "
+              f"{t_stats:>12.1f} | {p_estado:>5.0f} / {p_historial / 1e3:>5.1f}ms | {t_figuras:>9.1f} / {kb_figuras:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
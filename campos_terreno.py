@@ -0,0 +1,73 @@
+"""
+Campos de temperatura y humedad del terreno para la simulación 3D
+
+Cada planta suma sobre el terreno una influencia que decae con la distancia
+(exp(-d / escala)) y, con el riego encendido, otra que enfría y humedece.
+Las distancias de cada planta a cada punto de la malla no dependen de los
+sliders: los cuatro núcleos exp(-d / escala) se calculan una vez por número
+de plantas y resolución (lru_cache), y cada cambio de slider son dos
+productos matriz-vector (plantas x puntos de la malla) para todas las
+plantas a la vez. Los núcleos se guardan en float32 y solo los de las dos
+últimas configuraciones: con 48 plantas y 200x200 puntos son ~31 MB cada
+una.
+"""
+
+import functools
+import math
+
+import numpy as np
+
+RESOLUCION_TERRENO = 200     # Puntos por lado de la malla
+SEPARACION_PLANTAS = 3.0     # Metros entre plantas vecinas
+MARGEN_TERRENO = 2.0         # Metros de terreno alrededor de las plantas
+
+# Escalas (m) de las influencias: temperatura, enfriamiento por riego, humedad, humedad por riego
+ESCALAS = (1.5, 0.8, 1.2, 1.0)
+TEMPERATURA_BASE = 20.0
+HUMEDAD_BASE = 30.0
+ENFRIAMIENTO_RIEGO = 3.0
+HUMEDAD_RIEGO = 35.0
+
+
+def posiciones_plantas(n):
+    """Plantas en una cuadrícula (hasta 4 en fila; con 2: (0, 0) y (3, 0))"""
+    columnas = n if n <= 4 else math.ceil(math.sqrt(n))
+    k = np.arange(n)
+    return np.column_stack([k % columnas, k // columnas]) * SEPARACION_PLANTAS
+
+
+@functools.lru_cache(maxsize=8)
+def malla_terreno(n_plantas, resolucion):
+    """Ejes x e y del terreno que rodea a las plantas"""
+    posiciones = posiciones_plantas(n_plantas)
+    minimos = posiciones.min(axis=0) - MARGEN_TERRENO
+    maximos = posiciones.max(axis=0) + MARGEN_TERRENO
+    return (np.linspace(minimos[0], maximos[0], resolucion),
+            np.linspace(minimos[1], maximos[1], resolucion))
+
+
+@functools.lru_cache(maxsize=2)
+def nucleos_distancia(n_plantas, resolucion):
+    """exp(-distancia / escala) de cada planta a cada punto: (escalas, plantas, puntos) en float32"""
+    x, y = malla_terreno(n_plantas, resolucion)
+    X, Y = np.meshgrid(x, y)
+    posiciones = posiciones_plantas(n_plantas)
+    distancia = np.hypot(X.ravel() - posiciones[:, :1], Y.ravel() - posiciones[:, 1:]).astype(np.float32)
+    nucleos = np.exp(-distancia / np.array(ESCALAS, dtype=np.float32)[:, None, None])
+    nucleos.setflags(write=False)
+    return nucleos
+
+
+def calcular_campos(temperaturas, humedades, bombas, resolucion=RESOLUCION_TERRENO):
+    """Campos de temperatura y humedad (resolucion x resolucion, filas = y) de todas las plantas"""
+    # Vectores en float32 como los núcleos: el producto no convierte la matriz a float64
+    temperaturas = np.asarray(temperaturas, dtype=np.float32)
+    humedades = np.asarray(humedades, dtype=np.float32)
+    riego = np.asarray(bombas, dtype=np.float32)
+    nucleos = nucleos_distancia(len(temperaturas), resolucion)
+
+    temperatura = (TEMPERATURA_BASE + (temperaturas - TEMPERATURA_BASE) @ nucleos[0]
+                   - ENFRIAMIENTO_RIEGO * riego @ nucleos[1])
+    humedad = HUMEDAD_BASE + (humedades - HUMEDAD_BASE) @ nucleos[2] + HUMEDAD_RIEGO * riego @ nucleos[3]
+    np.clip(humedad, 0, 100, out=humedad)
+    return temperatura.reshape(resolucion, resolucion), humedad.reshape(resolucion, resolucion)
@@ -0,0 +1,112 @@
+"""
+Codificación binaria compacta para STATUS e HISTORIAL
+
+Se activa por conexión con el comando "FORMATO BINARIO" (y se vuelve al
+texto con "FORMATO TEXTO"). El cuerpo de la trama es:
+
+Estado ('D'):
+    cabecera '<cHH'  -> b'D', n_analogicos, n_bombas
+    n_analogicos float32
+    bits de bombas empaquetados (1 bit por bomba)
+
+Historial ('H'):
+    cabecera '<cIHH' -> b'H', n_filas, n_analogicos, n_bombas
+    n_analogicos columnas float32 de n_filas (orden por columnas)
+    n_bombas columnas de bits empaquetados de ceil(n_filas / 8) bytes
+
+Historial desde una secuencia ('S', respuesta de HISTORIAL_DESDE):
+    cabecera '<cqqI' -> b'S', secuencia de la primera fila, secuencia de la última muestra, arranque
+    float64 con la hora de cada fila (seq_final - primera + 1 valores)
+    trama de historial ('H')
+
+Las columnas analógicas se decodifican sin copia con np.frombuffer.
+"""
+
+import struct
+
+import numpy as np
+
+CABECERA_ESTADO = struct.Struct('<cHH')
+CABECERA_HISTORIAL = struct.Struct('<cIHH')
+CABECERA_DESDE = struct.Struct('<cqqI')
+FLOAT = np.dtype('<f4')
+TIEMPO = np.dtype('<f8')
+
+
+class ErrorCodificacion(Exception):
+    """Cuerpo binario inválido"""
+
+
+def codificar_estado(analogicos, bombas):
+    """Empaqueta valores analógicos (float32) y bombas (bits)"""
+    analogicos = np.asarray(analogicos, dtype=FLOAT)
+    bombas = np.asarray(bombas, dtype=bool)
+    return (CABECERA_ESTADO.pack(b'D', len(analogicos), len(bombas))
+            + analogicos.tobytes() + np.packbits(bombas).tobytes())
+
+
+def decodificar_estado(cuerpo):
+    """Devuelve (analogicos float32, bombas bool) de una trama 'D'"""
+    marca, n_analogicos, n_bombas = CABECERA_ESTADO.unpack_from(cuerpo)
+    if marca != b'D':
+        raise ErrorCodificacion(f"Marca de estado inválida: {marca!r}")
+    offset = CABECERA_ESTADO.size
+    analogicos = np.frombuffer(cuerpo, dtype=FLOAT, count=n_analogicos, offset=offset)
+    offset += n_analogicos * FLOAT.itemsize
+    bits = np.frombuffer(cuerpo, dtype=np.uint8, offset=offset)
+    bombas = np.unpackbits(bits, count=n_bombas).astype(bool)
+    return analogicos, bombas
+
+
+def codificar_historial(analogicas, bombas):
+    """Empaqueta un historial: analogicas (filas x n) y bombas (filas x m)"""
+    analogicas = np.asarray(analogicas)
+    bombas = np.asarray(bombas, dtype=bool)
+    n_filas = len(analogicas)
+    partes = [
+        CABECERA_HISTORIAL.pack(b'H', n_filas, analogicas.shape[1], bombas.shape[1]),
+        np.ascontiguousarray(analogicas.T, dtype=FLOAT).tobytes(),
+        np.packbits(bombas.T, axis=1).tobytes(),
+    ]
+    return b''.join(partes)
+
+
+def decodificar_historial(cuerpo, offset=0):
+    """Devuelve (analogicas float32 n x filas, bombas bool m x filas) de una trama 'H'
+
+    Las columnas analógicas son vistas sobre el buffer recibido (sin copia).
+    """
+    marca, n_filas, n_analogicos, n_bombas = CABECERA_HISTORIAL.unpack_from(cuerpo, offset)
+    if marca != b'H':
+        raise ErrorCodificacion(f"Marca de historial inválida: {marca!r}")
+    offset += CABECERA_HISTORIAL.size
+    analogicas = np.frombuffer(cuerpo, dtype=FLOAT, count=n_analogicos * n_filas, offset=offset)
+    analogicas = analogicas.reshape(n_analogicos, n_filas)
+    offset += analogicas.nbytes
+    bytes_por_bomba = (n_filas + 7) // 8
+    bits = np.frombuffer(cuerpo, dtype=np.uint8, count=n_bombas * bytes_por_bomba, offset=offset)
+    bombas = np.unpackbits(bits.reshape(n_bombas, bytes_por_bomba), axis=1, count=n_filas).astype(bool)
+    return analogicas, bombas
+
+def codificar_historial_desde(primera, seq_final, arranque, tiempos, analogicas, bombas):
+    """Empaqueta la respuesta de HISTORIAL_DESDE: secuencias, arranque, horas y trama de historial"""
+    tiempos = np.asarray(tiempos, dtype=TIEMPO)
+    if len(tiempos) != seq_final - primera + 1:
+        raise ErrorCodificacion("Debe haber una hora por fila")
+    return (CABECERA_DESDE.pack(b'S', primera, seq_final, arranque) + tiempos.tobytes()
+            + codificar_historial(analogicas, bombas))
+
+
+def decodificar_historial_desde(cuerpo):
+    """Devuelve (primera, seq_final, arranque, tiempos, analogicas, bombas) de una trama 'S'"""
+    marca, primera, seq_final, arranque = CABECERA_DESDE.unpack_from(cuerpo)
+    if marca != b'S':
+        raise ErrorCodificacion(f"Marca de historial desde inválida: {marca!r}")
+    n_filas = seq_final - primera + 1
+    if n_filas < 0:
+        raise ErrorCodificacion(f"Secuencias inválidas: {primera}..{seq_final}")
+    tiempos = np.frombuffer(cuerpo, dtype=TIEMPO, count=n_filas, offset=CABECERA_DESDE.size)
+    analogicas, bombas = decodificar_historial(cuerpo, CABECERA_DESDE.size + n_filas * TIEMPO.itemsize)
+    if analogicas.shape[1] != n_filas:
+        raise ErrorCodificacion(f"Filas del historial ({analogicas.shape[1]}) distintas de las secuencias ({n_filas})")
+    return primera, seq_final, arranque, tiempos, analogicas, bombas
@@ -0,0 +1,282 @@
+"""
+Cliente asyncio del simulador de riego
+
+ControladorAsync tiene las operaciones de ControladorSimple (estado,
+historial, estadísticas y bombas) sin bloquear el hilo: la conexión es un
+StreamReader/StreamWriter y las respuestas se parsean con el código del
+controlador. Cada comando se escribe en cuanto se pide y una tarea lectora
+entrega las respuestas en orden, así varias peticiones concurrentes sobre
+la misma conexión viajan en pipelining. Un timeout descarta la respuesta
+que llegue tarde sin desordenar las siguientes. Los errores de parseo y
+los avisos de resincronización no se imprimen: quedan en
+controlador.avisos y las respuestas inválidas lanzan ErrorControlador.
+
+sondear_flota() consulta muchos simuladores desde un solo bucle de eventos
+con un límite de conexiones simultáneas y un timeout por sitio. Un sitio
+puede ser un sitio de simulador_federado.py (se selecciona con SITIO <id>
+al conectar).
+
+Uso:
+    async with ControladorAsync('localhost', 9999) as controlador:
+        datos = await controlador.estado()
+        historial = await controlador.historial()
+
+    resultados = asyncio.run(sondear_flota([('localhost', 9999), ('10.0.0.2', 9999)]))
+"""
+
+import asyncio
+import collections
+import time
+
+from controlador_corregido import ControladorSimple
+from protocolo import ErrorProtocolo, codificar_comandos, leer_trama_async
+
+TIMEOUT = 5.0          # Segundos para conectar y para cada respuesta
+CONCURRENCIA = 256     # Sitios consultados a la vez por sondear_flota
+AVISOS = 20            # Avisos del parser que conserva cada ControladorAsync
+
+
+class ErrorControlador(Exception):
+    """El simulador no respondió, rechazó un comando o cerró la conexión"""
+
+
+class ControladorAsync:
+    def __init__(self, host='localhost', port=9999, binario=False, timeout=TIMEOUT, sitio=None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sitio = sitio               # Sitio de un simulador federado (None = simulador simple)
+        # Errores de parseo y resincronizaciones del parser: se guardan en lugar de
+        # imprimirlos (con muchos sitios ensuciarían la consola del monitor)
+        self.avisos = collections.deque(maxlen=AVISOS)
+        # Estado y parseo del controlador bloqueante (sin abrir su socket)
+        self.parser = ControladorSimple(host, port, binario=binario, timeout=timeout,
+                                        avisar=self.avisos.append)
+        self.reader = None
+        self.writer = None
+        self.pendientes = collections.deque()   # Futuros de los comandos enviados, en orden
+        self.lectora = None
+        self.lock_historial = asyncio.Lock()
+
+    def __repr__(self):
+        sitio = "" if self.sitio is None else f"/{self.sitio}"
+        return f"ControladorAsync({self.host}:{self.port}{sitio})"
+
+    async def __aenter__(self):
+        return await self.conectar()
+
+    async def __aexit__(self, *exc):
+        await self.cerrar()
+
+    @property
+    def conectado(self):
+        return self.writer is not None and not self.writer.is_closing()
+
+    @property
+    def binario(self):
+        return self.parser.binario
+
+    @property
+    def zonas(self):
+        return self.parser.zonas
+
+    @property
+    def datos(self):
+        return self.parser.datos
+
+    @property
+    def estadisticas_actuales(self):
+        return self.parser.estadisticas
+
+    @property
+    def historial_local(self):
+        return self.parser.historial
+
+    async def conectar(self):
+        """Abre la conexión, lee el estado inicial, selecciona el sitio y negocia el formato"""
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        try:
+            # El servidor envía el estado al conectar (siempre en texto)
+            saludo = await asyncio.wait_for(leer_trama_async(self.reader), self.timeout)
+            if not self.parser.parsear_estado(self._texto(saludo)):
+                raise ErrorControlador(f"{self!r}: saludo inválido ({saludo[:20]!r})")
+            self.lectora = asyncio.create_task(self._leer_respuestas())
+
+            if self.sitio is not None:
+                respuesta = self._texto(await self.enviar(f"SITIO {self.sitio}"))
+                if not respuesta.startswith("SITIO:"):
+                    raise ErrorControlador(f"{self!r}: {respuesta}")
+                self.parser.zonas = int(respuesta.split(',')[1])
+            if self.binario and await self.enviar("FORMATO BINARIO") != b"FORMATO_BINARIO":
+                self.parser.binario = False
+        except (asyncio.IncompleteReadError, ErrorProtocolo, ValueError, IndexError) as e:
+            # Cerró la conexión a medias o no habla el protocolo
+            await self.cerrar()
+            raise ErrorControlador(f"{self!r}: {e!r}") from e
+        except BaseException:
+            await self.cerrar()
+            raise
+        return self
+
+    def _texto(self, cuerpo):
+        """Decodifica una respuesta de texto (ErrorControlador si no es UTF-8)"""
+        try:
+            return cuerpo.decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise ErrorControlador(f"{self!r}: respuesta no es texto ({cuerpo[:20]!r})") from e
+
+    def _parsear_estado(self, cuerpo):
+        """Parsea la respuesta de STATUS en el formato negociado"""
+        valido = (self.parser.parsear_estado_binario(cuerpo) if self.binario
+                  else self.parser.parsear_estado(self._texto(cuerpo).strip()))
+        if not valido:
+            raise ErrorControlador(f"{self!r}: respuesta de STATUS inválida")
+
+    async def _leer_respuestas(self):
+        """Entrega cada trama recibida al comando más antiguo que espera respuesta"""
+        error = ErrorControlador(f"{self!r}: conexión cerrada")
+        try:
+            while True:
+                cuerpo = await leer_trama_async(self.reader)
+                if not self.pendientes:
+                    raise ErrorProtocolo("Respuesta sin comando pendiente")
+                futuro = self.pendientes.popleft()
+                # Si quien lo pidió ya no espera (timeout) la respuesta se descarta
+                if not futuro.done():
+                    futuro.set_result(cuerpo)
+        except (asyncio.IncompleteReadError, OSError, ErrorProtocolo) as e:
+            error = ErrorControlador(f"{self!r}: {e!r}")
+        finally:
+            while self.pendientes:
+                futuro = self.pendientes.popleft()
+                if not futuro.done():
+                    futuro.set_exception(error)
+            self.writer.close()
+
+    async def enviar_varios(self, comandos):
+        """Envía los comandos en una sola escritura y devuelve los cuerpos de las respuestas en orden"""
+        if not self.conectado:
+            raise ErrorControlador(f"{self!r}: no conectado")
+        bucle = asyncio.get_running_loop()
+        futuros = [bucle.create_future() for _ in comandos]
+        self.pendientes.extend(futuros)
+        self.writer.write(codificar_comandos(comandos))
+        await asyncio.wait_for(self.writer.drain(), self.timeout)
+        return await asyncio.wait_for(asyncio.gather(*futuros), self.timeout)
+
+    async def enviar(self, comando):
+        """Envía un comando y devuelve el cuerpo de la respuesta"""
+        return (await self.enviar_varios([comando]))[0]
+
+    async def estado(self):
+        """STATUS: devuelve el diccionario de datos actuales"""
+        self._parsear_estado(await self.enviar("STATUS"))
+        return self.datos
+
+    async def historial(self):
+        """Trae solo las muestras nuevas (HISTORIAL_DESDE) y devuelve el historial local"""
+        # Dos pedidos a la vez con la misma secuencia se verían como un hueco
+        async with self.lock_historial:
+            cuerpo = await self.enviar(self.parser.comando_historial_desde())
+            if not self.parser.aplicar_historial_desde(cuerpo):
+                raise ErrorControlador(f"{self!r}: respuesta de HISTORIAL_DESDE inválida")
+        return self.historial_local
+
+    async def estadisticas(self):
+        """ESTADISTICAS: devuelve el diccionario de estadísticas por zona"""
+        if not self.parser.parsear_estadisticas(self._texto(await self.enviar("ESTADISTICAS"))):
+            raise ErrorControlador(f"{self!r}: respuesta de ESTADISTICAS inválida")
+        return self.estadisticas_actuales
+
+    async def bomba(self, zona, encender):
+        """BOMBA<zona>_ON / _OFF: devuelve la respuesta (BOMBA<zona>_ACTIVADA / _DESACTIVADA)"""
+        respuesta = self._texto(await self.enviar(f"BOMBA{zona}_{'ON' if encender else 'OFF'}"))
+        if not respuesta.startswith(f"BOMBA{zona}_"):
+            raise ErrorControlador(f"{self!r}: {respuesta}")
+        return respuesta
+
+    async def actualizar(self, historial=False):
+        """STATUS, ESTADISTICAS y opcionalmente HISTORIAL_DESDE en un solo viaje de red"""
+        if historial:
+            async with self.lock_historial:
+                estado, estadisticas, cuerpo = await self.enviar_varios(
+                    ["STATUS", "ESTADISTICAS", self.parser.comando_historial_desde()]
+                )
+                self.parser.aplicar_historial_desde(cuerpo)
+        else:
+            estado, estadisticas = await self.enviar_varios(["STATUS", "ESTADISTICAS"])
+        self._parsear_estado(estado)
+        self.parser.parsear_estadisticas(self._texto(estadisticas))
+        return self.datos
+
+    async def cerrar(self):
+        """Cierra la conexión (los comandos pendientes fallan con ErrorControlador)"""
+        if self.lectora is not None:
+            self.lectora.cancel()
+            await asyncio.gather(self.lectora, return_exceptions=True)
+            self.lectora = None
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+
+async def sondear_sitio(host, port, sitio=None, binario=False, timeout=TIMEOUT, historial=False,
+                        conexiones=None):
+    """Consulta STATUS y ESTADISTICAS de un sitio; devuelve un diccionario con el resultado
+
+    Con 'conexiones' (diccionario) la conexión queda abierta para el
+    siguiente sondeo y se reabre si se cayó. Nunca lanza: los errores quedan
+    en 'error'.
+    """
+    clave = (host, port, sitio)
+    resultado = {'host': host, 'port': port, 'sitio': sitio, 'ok': False, 'latencia': None,
+                 'zonas': 0, 'datos': {}, 'estadisticas': {}, 'muestras': 0, 'error': None}
+    inicio = time.perf_counter()
+    controlador = conexiones.get(clave) if conexiones is not None else None
+    try:
+        if controlador is None or not controlador.conectado:
+            controlador = await ControladorAsync(host, port, binario, timeout, sitio).conectar()
+            if conexiones is not None:
+                conexiones[clave] = controlador
+        await controlador.actualizar(historial)
+        resultado.update(ok=True, zonas=controlador.zonas, datos=dict(controlador.datos),
+                         estadisticas=dict(controlador.estadisticas_actuales),
+                         muestras=len(controlador.historial_local))
+    except (OSError, asyncio.TimeoutError, ErrorControlador) as e:
+        resultado['error'] = type(e).__name__ if isinstance(e, asyncio.TimeoutError) else str(e) or type(e).__name__
+        if controlador is not None:
+            await controlador.cerrar()
+            if conexiones is not None:
+                conexiones.pop(clave, None)
+    finally:
+        resultado['latencia'] = (time.perf_counter() - inicio) * 1e3
+        if conexiones is None and controlador is not None:
+            await controlador.cerrar()
+    return resultado
+
+
+async def sondear_flota(sitios, concurrencia=CONCURRENCIA, binario=False, timeout=TIMEOUT, historial=False,
+                        conexiones=None):
+    """Consulta todos los sitios ((host, port) o (host, port, sitio)) en un solo bucle de eventos
+
+    A lo sumo 'concurrencia' sitios a la vez. Devuelve los resultados de
+    sondear_sitio en el orden de 'sitios'.
+    """
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def uno(host, port, sitio=None):
+        async with semaforo:
+            return await sondear_sitio(host, port, sitio, binario, timeout, historial, conexiones)
+
+    return await asyncio.gather(*(uno(*s) for s in sitios))
+
+
+async def cerrar_conexiones(conexiones):
+    """Cierra las conexiones que dejó abiertas sondear_flota(conexiones=...)"""
+    await asyncio.gather(*(c.cerrar() for c in conexiones.values()))
+    conexiones.clear()
@@ -2,69 +2,185 @@
 Controlador Simple con Historial - VERSION CORREGIDA
 """
 
+import argparse
 import socket
 import time
 import os
 
+import numpy as np
+
+from codificacion_binaria import decodificar_estado, decodificar_historial, decodificar_historial_desde
+from historial_columnar import HistorialColumnar
+from protocolo import ErrorProtocolo, LectorTramas, codificar_comando, codificar_comandos
+
+# Zonas que se muestran en las vistas de consola (el resto se resume)
+ZONAS_VISIBLES = 4
+
+# Muestras que conserva el historial local (la primera sincronización trae hasta estas)
+CAPACIDAD_HISTORIAL = 1440
+
+
+def columnas_analogicas(zonas=2):
+    """Orden de las columnas analógicas en las respuestas: h1..hN, t1..tN, temp_planta, hum_relativa"""
+    return ([f'humedad{k}' for k in range(1, zonas + 1)]
+            + [f'temperatura{k}' for k in range(1, zonas + 1)]
+            + ['temp_planta', 'humedad_relativa'])
+
+
+def columnas_bombas(zonas=2):
+    return [f'bomba{k}' for k in range(1, zonas + 1)]
+
+
+def tipos_historial(zonas=2):
+    """Columnas del historial del controlador: índice, hora simulada, sensores en float32 (como el formato binario) y bombas"""
+    tipos = {'indice': np.int32, 'tiempo': np.float64}
+    tipos.update({nombre: np.float32 for nombre in columnas_analogicas(zonas)})
+    tipos.update({nombre: bool for nombre in columnas_bombas(zonas)})
+    return tipos
+
+
+def comando_historial_desde(historial, n):
+    """HISTORIAL_DESDE con la última secuencia de 'historial' (-1 = todo), a lo sumo n muestras y su arranque"""
+    comando = f"HISTORIAL_DESDE {historial.ultima_seq} {n}"
+    return comando if historial.arranque is None else f"{comando} {historial.arranque}"
+
+
+def zonas_en_respuesta(n_valores, por_zona=3):
+    """Número de zonas de una línea DATOS/HR con n_valores campos y si trae los 2 sensores extra"""
+    if (n_valores - 2) % por_zona == 0:
+        return (n_valores - 2) // por_zona, True
+    return n_valores // por_zona, False
+
+
 class ControladorSimple:
-    def __init__(self, host='localhost', port=9999):
+    def __init__(self, host='localhost', port=9999, binario=False, timeout=None, avisar=print):
         self.host = host
         self.port = port
+        self.binario = binario
+        self.timeout = timeout           # Segundos para conectar/leer (None = bloqueante)
+        self.avisar = avisar             # Destino de los errores de parseo y avisos de resincronización
         self.connected = False
+        self.zonas = 2                   # Se actualiza con cada respuesta del simulador
         self.datos = {}
-        self.historial = []
+        self.historial = HistorialColumnar(tipos_historial(2), capacidad=CAPACIDAD_HISTORIAL)
+        self.historial_agrupado = []     # Cubetas de HISTORIAL <inicio> <fin> [cubeta]
         self.estadisticas = {}
         
     def connect(self):
         """Conecta al simulador"""
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((self.host, self.port))
-            self.connected = True
+            self.abrir_conexion()
             print(f"✅ Conectado en {self.host}:{self.port}")
             
-            # Cargar datos iniciales
-            self.obtener_estado()
-            self.obtener_historial()
-            self.obtener_estadisticas()
+            # Cargar datos iniciales en un solo viaje de red (del historial, solo lo nuevo)
+            estado, historial, estadisticas = self.send_commands_raw(
+                ["STATUS", self.comando_historial_desde(), "ESTADISTICAS"]
+            )
+            self.parsear_cuerpo_estado(estado)
+            if historial:
+                self.aplicar_historial_desde(historial)
+            if estadisticas:
+                self.parsear_estadisticas(estadisticas.decode('utf-8'))
             return True
         except Exception as e:
             print(f"❌ Error: {e}")
             return False
     
+    def abrir_conexion(self):
+        """Abre el socket, lee el estado inicial y negocia el formato"""
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.settimeout(self.timeout)
+        self.socket.connect((self.host, self.port))
+        self.lector = LectorTramas(self.socket)
+        self.connected = True
+        
+        # El servidor envía el estado al conectar (siempre en texto)
+        saludo = self.lector.leer_respuesta()
+        if not self.parsear_estado(saludo):
+            raise ErrorProtocolo(f"Saludo inválido: {(saludo or '')[:20]!r}")
+        
+        if self.binario and self.send_command_raw("FORMATO BINARIO") != b"FORMATO_BINARIO":
+            print("⚠️ El simulador no soporta formato binario, usando texto")
+            self.binario = False
+    
     def send_command(self, command):
         """Envía comando"""
+        response = self.send_command_raw(command)
+        return response.decode('utf-8').strip() if response is not None else None
+    
+    def send_command_raw(self, command):
+        """Envía comando y devuelve el cuerpo de la respuesta sin decodificar"""
         if not self.connected:
             return None
         
         try:
-            self.socket.send(command.encode('utf-8'))
-            response = self.socket.recv(8192).decode('utf-8').strip()
-            return response
+            self.socket.sendall(codificar_comando(command))
+            return self.lector.leer_trama()
         except Exception as e:
             print(f"❌ Error comunicación: {e}")
             return None
     
+    def send_commands(self, commands):
+        """Envía varios comandos en un solo envío y lee las respuestas en orden"""
+        return [r.decode('utf-8').strip() if r is not None else None
+                for r in self.send_commands_raw(commands)]
+    
+    def send_commands_raw(self, commands):
+        """Como send_commands pero devuelve los cuerpos sin decodificar"""
+        if not self.connected:
+            return [None] * len(commands)
+        
+        try:
+            self.socket.sendall(codificar_comandos(commands))
+            return [self.lector.leer_trama() for _ in commands]
+        except Exception as e:
+            print(f"❌ Error comunicación: {e}")
+            return [None] * len(commands)
+    
     def obtener_estado(self):
         """Obtiene estado actual"""
-        response = self.send_command("STATUS")
+        return self.parsear_cuerpo_estado(self.send_command_raw("STATUS"))
+    
+    def parsear_cuerpo_estado(self, cuerpo):
+        """Parsea una respuesta de STATUS en el formato negociado"""
+        if cuerpo is None:
+            return False
+        if self.binario:
+            return self.parsear_estado_binario(cuerpo)
+        return self.parsear_estado(cuerpo.decode('utf-8').strip())
+    
+    def parsear_estado_binario(self, cuerpo):
+        """Parsea una respuesta de estado binaria"""
+        try:
+            analogicos, bombas = decodificar_estado(cuerpo)
+            self.zonas = len(bombas)
+            self.datos = {k: round(v, 1) for k, v in zip(columnas_analogicas(self.zonas), analogicos.tolist())}
+            for k, activa in enumerate(bombas.tolist(), 1):
+                self.datos[f'bomba{k}_activa'] = activa
+            return True
+        except Exception as e:
+            self.avisar(f"❌ Error parseando datos: {e}")
+            return False
+    
+    def parsear_estado(self, response):
+        """Parsea una respuesta DATOS:"""
         if response and response.startswith("DATOS:"):
             try:
                 datos_raw = response.replace("DATOS:", "").split(",")
-                # Estructura actualizada para incluir nuevos sensores
-                self.datos = {
-                    'humedad1': float(datos_raw[0]),
-                    'humedad2': float(datos_raw[1]),
-                    'temperatura1': float(datos_raw[2]),
-                    'temperatura2': float(datos_raw[3]),
-                    'bomba1_activa': bool(int(datos_raw[4])),
-                    'bomba2_activa': bool(int(datos_raw[5]))
-                }
+                # h1..hN, t1..tN, b1..bN y, si están, temp_planta y humedad_relativa
+                z, extras = zonas_en_respuesta(len(datos_raw))
+                datos = {}
+                for k in range(z):
+                    datos[f'humedad{k + 1}'] = float(datos_raw[k])
+                    datos[f'temperatura{k + 1}'] = float(datos_raw[z + k])
+                    datos[f'bomba{k + 1}_activa'] = bool(int(datos_raw[2 * z + k]))
+                self.datos = datos
+                self.zonas = z
                 
                 # Añadir nuevos sensores si están disponibles
-                if len(datos_raw) >= 8:
-                    self.datos['temp_planta'] = float(datos_raw[6])
-                    self.datos['humedad_relativa'] = float(datos_raw[7])
+                if extras:
+                    self.datos['temp_planta'] = float(datos_raw[3 * z])
+                    self.datos['humedad_relativa'] = float(datos_raw[3 * z + 1])
                 else:
                     # Valores por defecto si no están disponibles
                     self.datos['temp_planta'] = 0.0
@@ -72,83 +188,216 @@ class ControladorSimple:
                 
                 return True
             except Exception as e:
-                print(f"❌ Error parseando datos: {e}")
+                self.avisar(f"❌ Error parseando datos: {e}")
         return False
     
+    def comando_historial_desde(self):
+        """HISTORIAL_DESDE con la última secuencia recibida (-1 = todo) y lo que cabe en el historial"""
+        return comando_historial_desde(self.historial, CAPACIDAD_HISTORIAL)
+    
     def obtener_historial(self):
-        """Obtiene historial"""
+        """Obtiene solo las muestras nuevas del historial (HISTORIAL_DESDE)"""
         print("📊 Obteniendo historial...")
-        response = self.send_command("HISTORIAL_RECIENTE")
+        response = self.send_command_raw(self.comando_historial_desde())
         
         if response:
-            print(f"📥 Respuesta recibida: {len(response)} chars")
-            self.parsear_historial(response)
+            print(f"📥 Respuesta recibida: {len(response)} bytes")
+            self.aplicar_historial_desde(response)
             return len(self.historial) > 0
         else:
             print("❌ No se recibió historial")
             return False
     
+    def aplicar_historial_desde(self, cuerpo):
+        """Agrega al historial la respuesta de HISTORIAL_DESDE (ver sincronizar_historial)"""
+        historial = self.sincronizar_historial(self.historial, cuerpo)
+        if historial is None:
+            return False
+        self.historial = historial
+        return True
+    
+    def sincronizar_historial(self, historial, cuerpo):
+        """Aplica una respuesta de HISTORIAL_DESDE a 'historial' y devuelve el historial resultante
+        
+        Si la primera muestra recibida no sigue a la última guardada (el
+        buffer del simulador dio la vuelta) o cambió el arranque (el
+        simulador se reinició) hay un hueco: se devuelve un historial nuevo,
+        de la misma capacidad, con lo recibido, que es todo lo que el
+        simulador conserva. Si sin hueco cambiaron las zonas, lo recibido no
+        alcanza para rehacerlo: se devuelve uno vacío y la próxima consulta
+        lo trae todo. None si la respuesta no es válida.
+        """
+        try:
+            if self.binario:
+                primera, seq_final, arranque, tiempos, analogicas, bombas = decodificar_historial_desde(cuerpo)
+                zonas = len(bombas)
+                columnas = self.columnas_binarias(analogicas, bombas, primera, tiempos)
+            else:
+                data = cuerpo.decode('utf-8')
+                if not data.startswith("HISTORIAL_DESDE_INICIO:"):
+                    self.avisar(f"❌ Historial no disponible: {data}")
+                    return None
+                primera, seq_final, arranque = (int(v) for v in data.split('\n', 1)[0].split(':')[1].split(','))
+                columnas, zonas = self.columnas_hr(data, con_tiempo=True)
+        except Exception as e:
+            self.avisar(f"❌ Error parseando: {e}")
+            return None
+        
+        if columnas is not None:
+            self.zonas = zonas
+        zonas_historial = sum(1 for nombre in historial.tipos if nombre.startswith('bomba'))
+        previa = historial.ultima_seq
+        rehacer = True
+        if previa >= 0 and arranque != historial.arranque:
+            self.avisar(f"⚠️ El simulador se reinició (arranque {historial.arranque} -> {arranque}): resincronizando")
+        elif primera != previa + 1:
+            if previa >= 0:
+                self.avisar(f"⚠️ Hueco en el historial (última {previa}, recibida desde {primera}): resincronizando")
+        elif self.zonas == zonas_historial:
+            rehacer = False
+        elif previa >= 0:
+            self.avisar(f"⚠️ Cambiaron las zonas ({zonas_historial} -> {self.zonas}): se pedirá todo el historial")
+            return HistorialColumnar(tipos_historial(self.zonas), capacidad=historial.capacidad)
+        
+        if rehacer:
+            historial = HistorialColumnar(tipos_historial(self.zonas), capacidad=historial.capacidad)
+        if columnas is not None:
+            historial.agregar(columnas, seq_final)
+        historial.ultima_seq = seq_final
+        historial.arranque = arranque
+        return historial
+    
+    def parsear_cuerpo_historial(self, cuerpo):
+        """Parsea una respuesta de historial en el formato negociado"""
+        if self.binario:
+            self.parsear_historial_binario(cuerpo)
+        else:
+            self.parsear_historial(cuerpo.decode('utf-8'))
+    
+    def cargar_historial(self, columnas):
+        """Reemplaza el historial por las columnas parseadas ({nombre: array})"""
+        historial = HistorialColumnar(tipos_historial(self.zonas), capacidad=max(1, len(columnas['indice'])))
+        historial.agregar(columnas)
+        self.historial = historial
+    
+    def columnas_binarias(self, analogicas, bombas, primera=0, tiempos=None):
+        """Columnas de una trama de historial binaria; el índice cuenta desde primera (sin tiempos, hora NaN)"""
+        zonas = len(bombas)
+        columnas = {'indice': np.arange(primera, primera + analogicas.shape[1]),
+                    'tiempo': np.full(analogicas.shape[1], np.nan) if tiempos is None else tiempos}
+        columnas.update(zip(columnas_analogicas(zonas), analogicas))
+        columnas.update(zip(columnas_bombas(zonas), bombas))
+        return columnas
+    
+    def parsear_historial_binario(self, cuerpo):
+        """Parsea historial binario: las columnas del buffer recibido pasan directo al historial"""
+        try:
+            analogicas, bombas = decodificar_historial(cuerpo)
+            self.zonas = len(bombas)
+            self.cargar_historial(self.columnas_binarias(analogicas, bombas))
+            print(f"✅ Historial parseado: {len(self.historial)} entradas")
+        except Exception as e:
+            print(f"❌ Error parseando: {e}")
+    
+    def columnas_hr(self, data, con_tiempo=False):
+        """Líneas HR: de una respuesta como columnas ({nombre: array}) y número de zonas (None, 0 si no hay)
+        
+        con_tiempo: las líneas traen la hora simulada tras el índice (HISTORIAL_DESDE).
+        """
+        filas = [line.strip()[3:] for line in data.split('\n') if line.strip().startswith('HR:')]
+        if not filas:
+            return None, 0
+        
+        # indice, [tiempo,] h1..hN, t1..tN, b1..bN y opcionalmente temp_planta, humedad_relativa
+        c = 2 if con_tiempo else 1
+        z, extras = zonas_en_respuesta(len(filas[0].split(',')) - c)
+        if z < 1:
+            return None, 0
+        valores = np.array([fila.split(',') for fila in filas], dtype=np.float64)
+        columnas = {'indice': valores[:, 0],
+                    'tiempo': valores[:, 1] if con_tiempo else np.full(len(filas), np.nan)}
+        for k in range(z):
+            columnas[f'humedad{k + 1}'] = valores[:, c + k]
+            columnas[f'temperatura{k + 1}'] = valores[:, c + z + k]
+            columnas[f'bomba{k + 1}'] = valores[:, c + 2 * z + k] > 0
+        
+        # Añadir nuevos sensores si están disponibles
+        sin_dato = np.zeros(len(filas))
+        columnas['temp_planta'] = valores[:, c + 3 * z] if extras else sin_dato
+        columnas['humedad_relativa'] = valores[:, c + 1 + 3 * z] if extras else sin_dato
+        return columnas, z
+    
     def parsear_historial(self, data):
-        """Parsea historial"""
+        """Parsea historial completo (HISTORIAL_RECIENTE): todas las líneas HR: a columnas"""
         try:
-            self.historial = []
-            lines = data.split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith('HR:'):
-                    parts = line.split(':')[1].split(',')
-                    if len(parts) >= 7:
-                        entrada = {
-                            'indice': int(parts[0]),
-                            'humedad1': float(parts[1]),
-                            'humedad2': float(parts[2]),
-                            'temperatura1': float(parts[3]),
-                            'temperatura2': float(parts[4]),
-                            'bomba1': bool(int(parts[5])),
-                            'bomba2': bool(int(parts[6]))
-                        }
-                        
-                        # Añadir nuevos sensores si están disponibles
-                        if len(parts) >= 9:
-                            entrada['temp_planta'] = float(parts[7])
-                            entrada['humedad_relativa'] = float(parts[8])
-                        else:
-                            entrada['temp_planta'] = 0.0
-                            entrada['humedad_relativa'] = 0.0
-                            
-                        self.historial.append(entrada)
+            columnas, z = self.columnas_hr(data)
+            if columnas is None:
+                columnas = {nombre: np.empty(0, dtype=tipo) for nombre, tipo in tipos_historial(self.zonas).items()}
+            else:
+                self.zonas = z
+            self.cargar_historial(columnas)
             
             print(f"✅ Historial parseado: {len(self.historial)} entradas")
             
         except Exception as e:
             print(f"❌ Error parseando: {e}")
     
+    def obtener_historial_agrupado(self, inicio, fin, cubeta=None):
+        """Obtiene mín/prom/máx por cubeta (tiempos <= 0 relativos a la hora del simulador; sin cubeta la elige el simulador)"""
+        comando = f"HISTORIAL {inicio} {fin}" if cubeta is None else f"HISTORIAL {inicio} {fin} {cubeta}"
+        return self.parsear_historial_agrupado(self.send_command(comando))
+    
+    def parsear_historial_agrupado(self, response):
+        """Parsea HISTORIAL_INICIO / HB:... / HISTORIAL_FIN"""
+        if not response or not response.startswith("HISTORIAL_INICIO"):
+            print(f"❌ Historial por cubetas no disponible: {response}")
+            return False
+        try:
+            self.historial_agrupado = []
+            for line in response.split('\n'):
+                if not line.startswith('HB:'):
+                    continue
+                parts = line[3:].split(',')
+                # tiempo, muestras, (mín, prom, máx) de 2N+2 sensores y fracción de N bombas
+                z = (len(parts) - 8) // 7
+                entrada = {'tiempo': float(parts[0]), 'muestras': int(parts[1])}
+                for k, nombre in enumerate(columnas_analogicas(z)):
+                    entrada[f'{nombre}_min'] = float(parts[2 + 3 * k])
+                    entrada[f'{nombre}_prom'] = float(parts[3 + 3 * k])
+                    entrada[f'{nombre}_max'] = float(parts[4 + 3 * k])
+                for k, nombre in enumerate(columnas_bombas(z)):
+                    entrada[f'{nombre}_fraccion'] = float(parts[8 + 6 * z + k])
+                self.zonas = z
+                self.historial_agrupado.append(entrada)
+            return True
+        except Exception as e:
+            print(f"❌ Error parseando historial por cubetas: {e}")
+            return False
+    
     def obtener_estadisticas(self):
         """Obtiene estadísticas"""
-        response = self.send_command("ESTADISTICAS")
+        return self.parsear_estadisticas(self.send_command("ESTADISTICAS"))
+    
+    def parsear_estadisticas(self, response):
+        """Parsea una respuesta STATS:"""
         if response and response.startswith("STATS:"):
             try:
-                datos = response.replace("STATS:", "").split(",")
-                self.estadisticas = {
-                    'hum1_prom': float(datos[0]),
-                    'hum2_prom': float(datos[1]),
-                    'temp1_prom': float(datos[2]),
-                    'temp2_prom': float(datos[3]),
-                    'hum1_min': float(datos[4]),
-                    'hum1_max': float(datos[5]),
-                    'hum2_min': float(datos[6]),
-                    'hum2_max': float(datos[7]),
-                    'temp1_min': float(datos[8]),
-                    'temp1_max': float(datos[9]),
-                    'temp2_min': float(datos[10]),
-                    'temp2_max': float(datos[11]),
-                    'bomba1_tiempo': float(datos[12]),
-                    'bomba2_tiempo': float(datos[13])
-                }
+                datos = [float(v) for v in response.replace("STATS:", "").split(",")]
+                # Por zona: promedios hum/temp, (mín, máx) de hum/temp y % de riego
+                z = len(datos) // 7
+                estadisticas = {}
+                for k in range(z):
+                    estadisticas[f'hum{k + 1}_prom'] = datos[k]
+                    estadisticas[f'temp{k + 1}_prom'] = datos[z + k]
+                    estadisticas[f'hum{k + 1}_min'] = datos[2 * z + 2 * k]
+                    estadisticas[f'hum{k + 1}_max'] = datos[2 * z + 2 * k + 1]
+                    estadisticas[f'temp{k + 1}_min'] = datos[4 * z + 2 * k]
+                    estadisticas[f'temp{k + 1}_max'] = datos[4 * z + 2 * k + 1]
+                    estadisticas[f'bomba{k + 1}_tiempo'] = datos[6 * z + k]
+                self.estadisticas = estadisticas
                 return True
             except Exception as e:
-                print(f"❌ Error parseando estadísticas: {e}")
+                self.avisar(f"❌ Error parseando estadísticas: {e}")
         return False
     
     def mostrar_dashboard(self):
@@ -166,8 +415,9 @@ class ControladorSimple:
         # Estado actual
         print("📊 ESTADO ACTUAL")
         print("-" * 40)
-        print(f"🌡️ Temperaturas: Zona1={self.datos['temperatura1']:.1f}°C  Zona2={self.datos['temperatura2']:.1f}°C")
-        print(f"💧 Humedad:      Zona1={self.datos['humedad1']:.1f}%   Zona2={self.datos['humedad2']:.1f}%")
+        zonas = self.zonas_visibles()
+        print("🌡️ Temperaturas: " + "  ".join(f"Zona{k}={self.datos[f'temperatura{k}']:.1f}°C" for k in zonas) + self.zonas_ocultas())
+        print("💧 Humedad:      " + "   ".join(f"Zona{k}={self.datos[f'humedad{k}']:.1f}%" for k in zonas) + self.zonas_ocultas())
         
         # Mostrar nuevos sensores si están disponibles
         if 'temp_planta' in self.datos and self.datos['temp_planta'] > 0:
@@ -176,23 +426,28 @@ class ControladorSimple:
         if 'humedad_relativa' in self.datos and self.datos['humedad_relativa'] > 0:
             print(f"🌫️ Hum. Relativa: {self.datos['humedad_relativa']:.1f}%")
             
-        print(f"🚿 Bombas:       Zona1={'🟢ON' if self.datos['bomba1_activa'] else '🔴OFF'}     Zona2={'🟢ON' if self.datos['bomba2_activa'] else '🔴OFF'}")
+        print("🚿 Bombas:       " + "     ".join(f"Zona{k}={'🟢ON' if self.datos[f'bomba{k}_activa'] else '🔴OFF'}" for k in zonas) + self.zonas_ocultas())
+        if self.zonas > len(zonas):
+            activas = sum(self.datos[f'bomba{k}_activa'] for k in range(1, self.zonas + 1))
+            print(f"🚿 Bombas activas: {activas} de {self.zonas} zonas")
         print()
         
         # Estadísticas
         if self.estadisticas:
+            e = self.estadisticas
+            zonas = [k for k in self.zonas_visibles() if f'hum{k}_prom' in e]
             print("📈 ESTADÍSTICAS (24 HORAS)")
             print("-" * 40)
-            print(f"🌡️ Temp promedio:  Z1={self.estadisticas['temp1_prom']:.1f}°C  Z2={self.estadisticas['temp2_prom']:.1f}°C")
-            print(f"💧 Hum promedio:   Z1={self.estadisticas['hum1_prom']:.1f}%   Z2={self.estadisticas['hum2_prom']:.1f}%")
+            print("🌡️ Temp promedio:  " + "  ".join(f"Z{k}={e[f'temp{k}_prom']:.1f}°C" for k in zonas))
+            print("💧 Hum promedio:   " + "   ".join(f"Z{k}={e[f'hum{k}_prom']:.1f}%" for k in zonas))
             
             # Mostrar estadísticas de nuevos sensores si están disponibles
             if 'temp_planta_prom' in self.estadisticas:
                 print(f"🌿 Temp. Planta:   Promedio={self.estadisticas['temp_planta_prom']:.1f}°C")
                 print(f"🌫️ Hum. Relativa:  Promedio={self.estadisticas.get('humedad_relativa_prom', 0):.1f}%")
             
-            print(f"🚿 Tiempo riego:   Z1={self.estadisticas['bomba1_tiempo']:.1f}%    Z2={self.estadisticas['bomba2_tiempo']:.1f}%")
-            print(f"📊 Rangos humedad: Z1=[{self.estadisticas['hum1_min']:.1f}-{self.estadisticas['hum1_max']:.1f}%] Z2=[{self.estadisticas['hum2_min']:.1f}-{self.estadisticas['hum2_max']:.1f}%]")
+            print("🚿 Tiempo riego:   " + "    ".join(f"Z{k}={e[f'bomba{k}_tiempo']:.1f}%" for k in zonas))
+            print("📊 Rangos humedad: " + " ".join(f"Z{k}=[{e[f'hum{k}_min']:.1f}-{e[f'hum{k}_max']:.1f}%]" for k in zonas))
             print()
         
         # Historial
@@ -201,24 +456,26 @@ class ControladorSimple:
             print("-" * 95)
             
             # Verificar si hay nuevos sensores en el historial
-            tiene_nuevos_sensores = any('temp_planta' in h and h['temp_planta'] > 0 for h in self.historial[-5:])
+            tiene_nuevos_sensores = bool((self.historial.columna('temp_planta', 5) > 0).any())
             
+            zonas = self.zonas_visibles()
+            cab_h = " ".join(f"H{k}(%)" for k in zonas)
+            cab_t = " ".join(f"T{k}(°C)" for k in zonas)
+            cab_b = "  ".join(f"B{k}" for k in zonas)
             if tiene_nuevos_sensores:
-                print(" #  | H1(%)  H2(%)  | T1(°C) T2(°C) | 🌿TP  🌫️HR  | B1  B2")
+                print(f" #  | {cab_h}  | {cab_t} | 🌿TP  🌫️HR  | {cab_b}")
                 print("-" * 65)
                 for i, h in enumerate(self.historial[-10:]):
-                    b1 = "🟢" if h['bomba1'] else "🔴"
-                    b2 = "🟢" if h['bomba2'] else "🔴"
                     tp = h.get('temp_planta', 0)
                     hr = h.get('humedad_relativa', 0)
-                    print(f"{i+1:2d}. | {h['humedad1']:5.1f} {h['humedad2']:5.1f} | {h['temperatura1']:5.1f} {h['temperatura2']:5.1f} | {tp:4.1f} {hr:5.1f} | {b1}  {b2}")
+                    hum, temp, bombas = self.fila_zonas(h, zonas)
+                    print(f"{i+1:2d}. | {hum} | {temp} | {tp:4.1f} {hr:5.1f} | {bombas}")
             else:
-                print(" #  | H1(%)  H2(%)  | T1(°C) T2(°C) | B1  B2")
+                print(f" #  | {cab_h}  | {cab_t} | {cab_b}")
                 print("-" * 50)
                 for i, h in enumerate(self.historial[-10:]):
-                    b1 = "🟢" if h['bomba1'] else "🔴"
-                    b2 = "🟢" if h['bomba2'] else "🔴"
-                    print(f"{i+1:2d}. | {h['humedad1']:5.1f} {h['humedad2']:5.1f} | {h['temperatura1']:5.1f} {h['temperatura2']:5.1f} | {b1}  {b2}")
+                    hum, temp, bombas = self.fila_zonas(h, zonas)
+                    print(f"{i+1:2d}. | {hum} | {temp} | {bombas}")
             print()
             
             # Gráfico simple
@@ -228,11 +485,32 @@ class ControladorSimple:
         print("=" * 80)
         print("🎮 OPCIONES:")
         print("1. 🔄 Actualizar     5. ⏹️ Bomba 1 OFF    9. 📈 Gráfico humedad")
-        print("2. 🤖 Modo auto      6. 🚿 Bomba 2 ON    10. 🌡️ Gráfico temperatura")
-        print("3. 📊 Actualizar     7. ⏹️ Bomba 2 OFF    11. 📋 Ver historial completo")
-        print("4. 🚿 Bomba 1 ON     8. 📊 Estadísticas   0. 🚪 Salir")
+        # Con una sola zona no hay bomba 2 (el simulador respondería COMANDO_DESCONOCIDO)
+        bomba2_on, bomba2_off = ("6. 🚿 Bomba 2 ON    ", "7. ⏹️ Bomba 2 OFF    ") if self.zonas >= 2 else (" " * 20, " " * 20)
+        print(f"2. 🤖 Modo auto      {bomba2_on}10. 🌡️ Gráfico temperatura")
+        print(f"3. 📊 Actualizar     {bomba2_off}11. 📋 Ver historial completo")
+        print("4. 🚿 Bomba 1 ON     8. 📊 Estadísticas  12. 📡 En vivo (SUBSCRIBE)")
+        if self.zonas > 2:
+            print(f"13. 🚿 Bomba de otra zona (1-{self.zonas})")
+        print("0. 🚪 Salir")
         print("=" * 80)
     
+    def zonas_visibles(self):
+        """Zonas (1..N) que caben en las vistas de consola"""
+        return range(1, min(self.zonas, ZONAS_VISIBLES) + 1)
+    
+    def zonas_ocultas(self):
+        """Aviso de las zonas que no se muestran"""
+        ocultas = self.zonas - ZONAS_VISIBLES
+        return f"  (+{ocultas} zonas)" if ocultas > 0 else ""
+    
+    def fila_zonas(self, h, zonas):
+        """Humedades, temperaturas y bombas de una entrada del historial como texto"""
+        hum = " ".join(f"{h[f'humedad{k}']:5.1f}" for k in zonas)
+        temp = " ".join(f"{h[f'temperatura{k}']:5.1f}" for k in zonas)
+        bombas = "  ".join("🟢" if h[f'bomba{k}'] else "🔴" for k in zonas)
+        return hum, temp, bombas
+    
     def mostrar_grafico_simple(self):
         """Gráfico simple de humedad"""
         if len(self.historial) < 5:
@@ -241,27 +519,19 @@ class ControladorSimple:
         print("📈 GRÁFICO HUMEDAD (ÚLTIMAS 12 LECTURAS)")
         print("-" * 50)
         
-        # Tomar últimas 12
-        datos = self.historial[-12:] if len(self.historial) >= 12 else self.historial
-        
-        # Zona 1
-        valores1 = [h['humedad1'] for h in datos]
-        print("💧 Zona 1:")
-        self.dibujar_grafico(valores1)
-        
-        # Zona 2
-        valores2 = [h['humedad2'] for h in datos]
-        print("💧 Zona 2:")
-        self.dibujar_grafico(valores2)
+        # Últimas 12 de cada zona (vistas de las columnas, sin copia)
+        for k in self.zonas_visibles():
+            print(f"💧 Zona {k}:")
+            self.dibujar_grafico(self.historial.columna(f'humedad{k}', 12))
         print()
     
     def dibujar_grafico(self, valores):
         """Dibuja gráfico simple"""
-        if not valores:
+        if len(valores) == 0:
             return
         
-        min_val = min(valores)
-        max_val = max(valores)
+        min_val = float(np.min(valores))
+        max_val = float(np.max(valores))
         rango = max_val - min_val if max_val != min_val else 1
         
         # Escala visual simple
@@ -284,22 +554,16 @@ class ControladorSimple:
         print("=" * 60)
         
         if tipo == "humedad":
-            datos1 = [h['humedad1'] for h in self.historial[-20:]]
-            datos2 = [h['humedad2'] for h in self.historial[-20:]]
             print("💧 EVOLUCIÓN HUMEDAD (ÚLTIMAS 20 LECTURAS)")
-            print("Zona 1:")
-            self.dibujar_grafico_avanzado(datos1, 0, 100)
-            print("Zona 2:")
-            self.dibujar_grafico_avanzado(datos2, 0, 100)
+            for k in self.zonas_visibles():
+                print(f"Zona {k}:")
+                self.dibujar_grafico_avanzado(self.historial.columna(f'humedad{k}', 20), 0, 100)
         
         elif tipo == "temperatura":
-            datos1 = [h['temperatura1'] for h in self.historial[-20:]]
-            datos2 = [h['temperatura2'] for h in self.historial[-20:]]
             print("🌡️ EVOLUCIÓN TEMPERATURA (ÚLTIMAS 20 LECTURAS)")
-            print("Zona 1:")
-            self.dibujar_grafico_avanzado(datos1, 15, 40)
-            print("Zona 2:")
-            self.dibujar_grafico_avanzado(datos2, 15, 40)
+            for k in self.zonas_visibles():
+                print(f"Zona {k}:")
+                self.dibujar_grafico_avanzado(self.historial.columna(f'temperatura{k}', 20), 15, 40)
         
         input("\nPresiona Enter...")
     
@@ -311,9 +575,8 @@ class ControladorSimple:
         # Crear matriz
         grafico = [[' ' for _ in range(len(valores))] for _ in range(altura)]
         
-        for i, valor in enumerate(valores):
-            y = altura - 1 - int(((valor - min_escala) / rango) * (altura - 1))
-            y = max(0, min(altura - 1, y))
+        filas = altura - 1 - ((np.asarray(valores, dtype=np.float64) - min_escala) / rango * (altura - 1)).astype(int)
+        for i, y in enumerate(np.clip(filas, 0, altura - 1).tolist()):
             grafico[y][i] = '●'
         
         # Mostrar
@@ -324,13 +587,62 @@ class ControladorSimple:
         print(f"      └{'─' * len(valores)}")
         print(f"Últimos valores: {' '.join([f'{v:4.1f}' for v in valores[-10:]])}")
     
+    def suscribir(self, politica='coalescer', capacidad=64):
+        """Pasa la conexión a modo push: el simulador envía cada muestra nueva"""
+        response = self.send_command(f"SUBSCRIBE {politica} {capacidad}")
+        if response and response.startswith("SUSCRITO:"):
+            return True
+        print(f"❌ Suscripción rechazada: {response}")
+        return False
+    
+    def recibir_muestra(self):
+        """Espera la siguiente muestra empujada tras suscribir(); devuelve self.datos o None"""
+        try:
+            cuerpo = self.lector.leer_trama()
+        except Exception as e:
+            print(f"❌ Error comunicación: {e}")
+            return None
+        if cuerpo is None or not self.parsear_cuerpo_estado(cuerpo):
+            return None
+        return self.datos
+    
+    def mostrar_en_vivo(self):
+        """Muestra las lecturas empujadas por el simulador hasta Ctrl+C"""
+        # La suscripción usa una conexión propia para no bloquear los comandos del menú
+        vivo = ControladorSimple(self.host, self.port, binario=self.binario)
+        try:
+            vivo.abrir_conexion()
+            if not vivo.suscribir():
+                return
+            
+            print("\n📡 EN VIVO (Ctrl+C para volver)")
+            print("-" * 60)
+            while True:
+                d = vivo.recibir_muestra()
+                if d is None:
+                    print("🔌 Suscripción cerrada")
+                    break
+                zonas = vivo.zonas_visibles()
+                hum = " ".join(f"H{k}:{d[f'humedad{k}']:5.1f}%" for k in zonas)
+                temp = " ".join(f"T{k}:{d[f'temperatura{k}']:4.1f}°C" for k in zonas)
+                bombas = " ".join(f"B{k}:{'🟢' if d[f'bomba{k}_activa'] else '🔴'}" for k in zonas)
+                print(f"[{time.strftime('%H:%M:%S')}] {hum} {temp} {bombas}{vivo.zonas_ocultas()}")
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            print(f"❌ Error: {e}")
+        finally:
+            vivo.disconnect()
+    
     def ejecutar_comando_bomba(self, bomba, accion):
         """Controla bomba"""
         comando = f"BOMBA{bomba}_{accion}"
         response = self.send_command(comando)
-        if response:
+        if response and response.startswith(f"BOMBA{bomba}_"):
             estado = "activada" if accion == "ON" else "desactivada"
             print(f"✅ Bomba {bomba} {estado}")
+        else:
+            print(f"❌ Bomba {bomba}: {response or 'sin respuesta'}")
         time.sleep(1)
     
     def disconnect(self):
@@ -340,9 +652,16 @@ class ControladorSimple:
             self.connected = False
 
 def main():
+    parser = argparse.ArgumentParser(description="Controlador del sistema de riego")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=9999)
+    parser.add_argument('--binario', action='store_true',
+                        help="Negociar formato binario para STATUS e HISTORIAL")
+    args = parser.parse_args()
+    
     print("🌱 Iniciando Controlador Simple...")
     
-    controller = ControladorSimple()
+    controller = ControladorSimple(args.host, args.port, binario=args.binario)
     
     if not controller.connect():
         print("\n💡 Ejecuta primero: python3 simulador_corregido.py")
@@ -385,15 +704,27 @@ def main():
                 controller.mostrar_grafico_detallado("humedad")
             elif opcion == '10':
                 controller.mostrar_grafico_detallado("temperatura")
+            elif opcion == '12':
+                controller.mostrar_en_vivo()
+            elif opcion == '13':
+                zona = input(f"Zona (1-{controller.zonas}): ").strip()
+                accion = input("Acción (ON/OFF): ").strip().upper()
+                if zona.isdigit() and 1 <= int(zona) <= controller.zonas and accion in ("ON", "OFF"):
+                    controller.ejecutar_comando_bomba(int(zona), accion)
+                else:
+                    print("❌ Zona o acción no válida")
+                    time.sleep(1)
             elif opcion == '11':
                 print(f"\n📋 HISTORIAL COMPLETO ({len(controller.historial)} entradas)")
                 print("-" * 60)
                 for i, h in enumerate(controller.historial):
                     if i % 10 == 0:
                         print(f"\nEntradas {i+1}-{min(i+10, len(controller.historial))}:")
-                    b1 = "ON" if h['bomba1'] else "OFF"
-                    b2 = "ON" if h['bomba2'] else "OFF"
-                    print(f"{i+1:3d}. H1:{h['humedad1']:5.1f}% H2:{h['humedad2']:5.1f}% T1:{h['temperatura1']:4.1f}°C T2:{h['temperatura2']:4.1f}°C B1:{b1} B2:{b2}")
+                    zonas = controller.zonas_visibles()
+                    hum = " ".join(f"H{k}:{h[f'humedad{k}']:5.1f}%" for k in zonas)
+                    temp = " ".join(f"T{k}:{h[f'temperatura{k}']:4.1f}°C" for k in zonas)
+                    bombas = " ".join(f"B{k}:{'ON' if h[f'bomba{k}'] else 'OFF'}" for k in zonas)
+                    print(f"{i+1:3d}. {hum} {temp} {bombas}")
                 input("\nPresiona Enter...")
             else:
                 print("❌ Opción no válida")
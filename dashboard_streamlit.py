@@ -6,12 +6,19 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import datetime as dt
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
 import requests
-import socket
 import os
 
+from campos_terreno import RESOLUCION_TERRENO, calcular_campos, malla_terreno, posiciones_plantas
+from controlador_corregido import comando_historial_desde, tipos_historial
+from generador_historial import generar_historial
+from historial_columnar import HistorialColumnar, nueva_revision
+from pool_conexiones import PoolConexiones
+from reduccion_series import PUNTOS_POR_TRAZA, cortes_cubetas, indices_lttb, indices_transiciones
+from simulacion_arbol_threejs_streamlit import cargar_html_threejs, enviar_datos_arboles
+
 # Configuración de la página
 st.set_page_config(
     page_title="🌱 Sistema de Riego Inteligente",
@@ -52,159 +59,235 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+MAX_MUESTRAS_SESION = 10_000   # Historial que conserva cada sesión
+MAX_ZONAS_DETALLE = 8          # Con más zonas los gráficos muestran agregados (media, rango, mapa de calor)
+ZONAS_VISIBLES = 4             # Zonas listadas en la barra lateral y la tabla reciente
+UMBRAL_SCATTERGL = 1000        # Trazas con más puntos se dibujan con WebGL (go.Scattergl)
+MAX_FIGURAS_CACHE = 32         # Figuras cacheadas por tipo (se descartan las menos usadas)
+INTERVALOS_REFRESCO = [1, 2, 3, 5, 10, 30, 60]  # Segundos entre actualizaciones automáticas
+MAX_PLANTAS_3D = 48           # Plantas (zonas) en la simulación 3D
+RESOLUCIONES_TERRENO = [15, 50, 100, 200]  # Puntos por lado de la malla 3D
+
+# Colores de las dos zonas originales; el resto de zonas usa la paleta de Plotly
+COLORES_HUMEDAD = ['#2E86AB', '#A23B72']
+COLORES_TEMPERATURA = ['#F18F01', '#C73E1D']
+COLORES_BOMBAS = ['#3498db', '#e74c3c']
+
+def marcas_tiempo(segundos):
+    """Horas simuladas (segundos desde epoch) como datetime64 en hora local, igual que datetime.fromtimestamp"""
+    zona_local = datetime.now().astimezone().tzinfo
+    marcas = pd.to_datetime(np.asarray(segundos, dtype=np.float64), unit='s', utc=True)
+    return marcas.tz_convert(zona_local).tz_localize(None).to_numpy()
+
+def contar_zonas(columnas):
+    """Zonas de un historial o diccionario de datos (claves humedad1..humedadN)"""
+    return sum(1 for c in columnas if c.startswith('humedad') and c[len('humedad'):].isdigit())
+
+def matriz_zonas(df, prefijo, zonas):
+    """Columnas prefijo1..prefijoN como una matriz (muestras x zonas)"""
+    return np.column_stack([np.asarray(df[f'{prefijo}{k}']) for k in range(1, zonas + 1)])
+
+def traza_dispersion(puntos, **kwargs):
+    """go.Scatter o, con muchos puntos, go.Scattergl (WebGL)"""
+    return (go.Scattergl if puntos > UMBRAL_SCATTERGL else go.Scatter)(**kwargs)
+
+def color_zona(colores_base, k):
+    """Color de la zona k (1..N)"""
+    if k <= len(colores_base):
+        return colores_base[k - 1]
+    paleta = px.colors.qualitative.Plotly
+    return paleta[(k - 1) % len(paleta)]
+
+@st.cache_resource
+def obtener_pool():
+    """Pool de conexiones compartido por todas las sesiones y reruns del proceso"""
+    return PoolConexiones(timeout=0.5)
+
 class SistemaRiegoStreamlit:
-    def __init__(self):
-        self.host = 'localhost'
-        self.port = 9999
+    def __init__(self, host='localhost', port=9999):
+        self.host = host
+        self.port = port
+        self.pool = obtener_pool()
         self.datos_actuales = {}
         self.historial = []
         self.estadisticas = {}
         self.connected = False
+        self.version = None          # Revisión de historial/estadísticas (clave de las figuras cacheadas)
+        self.actualizado = 0.0       # Hora de la última consulta (la comparten los fragmentos en vivo)
         
-    def generar_datos_fake(self):
+    def generar_datos_fake(self, num_entradas=144, zonas=2):
         """Genera datos fake para demostración si no hay conexión"""
-        # Generar fechas de las últimas 24 horas
+        # Fechas de las últimas 24 horas (una muestra cada 10 minutos)
         now = datetime.now()
-        fechas = [now - timedelta(minutes=10*i) for i in range(144)]
-        fechas.reverse()
+        fechas = pd.date_range(end=now, periods=num_entradas, freq='10min')
+        inicio = fechas[0]
         
-        historial_fake = []
-        
-        for i, fecha in enumerate(fechas):
-            # Simular ciclo día/noche
-            hora_del_dia = fecha.hour + fecha.minute/60
-            factor_dia = np.sin((hora_del_dia * np.pi) / 12)
-            
-            # Temperatura con ciclo día/noche (15-35°C)
-            temp1_base = 22 + (factor_dia * 8) + np.random.normal(0, 1.5)
-            temp2_base = 24 + (factor_dia * 6) + np.random.normal(0, 1.2)
-            
-            # Temperatura de planta (ligeramente menor que ambiente)
-            temp_planta_base = temp1_base - 1.5 + np.random.normal(0, 1)
-            
-            # Humedad inversa a temperatura (20-80%)
-            hum1_base = 55 - (factor_dia * 20) + np.random.normal(0, 5)
-            hum2_base = 50 - (factor_dia * 15) + np.random.normal(0, 4)
-            
-            # Humedad relativa del entorno (inversa a temperatura)
-            humedad_relativa_base = 85 - (temp1_base - 15) * 2 + np.random.normal(0, 8)
-            
-            # Aplicar límites realistas
-            temp1 = np.clip(temp1_base, 15, 35)
-            temp2 = np.clip(temp2_base, 15, 35)
-            temp_planta = np.clip(temp_planta_base, 12, 32)
-            hum1 = np.clip(hum1_base, 15, 85)
-            hum2 = np.clip(hum2_base, 15, 85)
-            humedad_relativa = np.clip(humedad_relativa_base, 30, 95)
-            
-            # Estados de bombas (activar si humedad < 30%)
-            bomba1 = hum1 < 30
-            bomba2 = hum2 < 30
-            
-            historial_fake.append({
-                'timestamp': fecha,
-                'humedad1': round(hum1, 1),
-                'humedad2': round(hum2, 1),
-                'temperatura1': round(temp1, 1),
-                'temperatura2': round(temp2, 1),
-                'temp_planta': round(temp_planta, 1),
-                'humedad_relativa': round(humedad_relativa, 1),
-                'bomba1': bomba1,
-                'bomba2': bomba2
-            })
+        # Historial sintético vectorizado (ciclo día/noche según la hora real)
+        h = generar_historial(num_entradas, zonas=zonas, hora_inicio=inicio.hour + inicio.minute / 60)
+        columnas = {'timestamp': fechas}
+        for k in range(zonas):
+            columnas[f'humedad{k + 1}'] = h['humedad'][:, k]
+        for k in range(zonas):
+            columnas[f'temperatura{k + 1}'] = h['temperatura'][:, k]
+        for k in range(zonas):
+            columnas[f'bomba{k + 1}'] = h['bombas'][:, k]
+        columnas['temp_planta'] = h['temp_planta']
+        columnas['humedad_relativa'] = h['humedad_relativa']
+        historial_fake = pd.DataFrame(columnas)
         
         self.historial = historial_fake
+        self.version = nueva_revision()
         
         # Datos actuales (último registro)
-        ultimo = historial_fake[-1]
         self.datos_actuales = {
-            'humedad1': ultimo['humedad1'],
-            'humedad2': ultimo['humedad2'],
-            'temperatura1': ultimo['temperatura1'],
-            'temperatura2': ultimo['temperatura2'],
-            'temp_planta': ultimo['temp_planta'],
-            'humedad_relativa': ultimo['humedad_relativa'],
-            'bomba1_activa': ultimo['bomba1'],
-            'bomba2_activa': ultimo['bomba2']
+            'temp_planta': float(h['temp_planta'][-1]),
+            'humedad_relativa': float(h['humedad_relativa'][-1]),
         }
+        for k in range(zonas):
+            self.datos_actuales[f'humedad{k + 1}'] = float(h['humedad'][-1, k])
+            self.datos_actuales[f'temperatura{k + 1}'] = float(h['temperatura'][-1, k])
+            self.datos_actuales[f'bomba{k + 1}_activa'] = bool(h['bombas'][-1, k])
         
-        # Calcular estadísticas
-        df = pd.DataFrame(historial_fake)
+        # Calcular estadísticas (por columnas, todas las zonas a la vez)
+        hum, temp, bombas = h['humedad'], h['temperatura'], h['bombas']
+        por_zona = {
+            'hum{}_prom': hum.mean(axis=0), 'temp{}_prom': temp.mean(axis=0),
+            'hum{}_min': hum.min(axis=0), 'hum{}_max': hum.max(axis=0),
+            'temp{}_min': temp.min(axis=0), 'temp{}_max': temp.max(axis=0),
+            'bomba{}_tiempo': bombas.mean(axis=0) * 100,
+        }
         self.estadisticas = {
-            'hum1_prom': df['humedad1'].mean(),
-            'hum2_prom': df['humedad2'].mean(),
-            'temp1_prom': df['temperatura1'].mean(),
-            'temp2_prom': df['temperatura2'].mean(),
-            'temp_planta_prom': df['temp_planta'].mean(),
-            'humedad_relativa_prom': df['humedad_relativa'].mean(),
-            'hum1_min': df['humedad1'].min(),
-            'hum1_max': df['humedad1'].max(),
-            'hum2_min': df['humedad2'].min(),
-            'hum2_max': df['humedad2'].max(),
-            'temp1_min': df['temperatura1'].min(),
-            'temp1_max': df['temperatura1'].max(),
-            'temp2_min': df['temperatura2'].min(),
-            'temp2_max': df['temperatura2'].max(),
-            'temp_planta_min': df['temp_planta'].min(),
-            'temp_planta_max': df['temp_planta'].max(),
-            'humedad_relativa_min': df['humedad_relativa'].min(),
-            'humedad_relativa_max': df['humedad_relativa'].max(),
-            'bomba1_tiempo': (df['bomba1'].sum() / len(df)) * 100,
-            'bomba2_tiempo': (df['bomba2'].sum() / len(df)) * 100
+            'temp_planta_prom': h['temp_planta'].mean(),
+            'humedad_relativa_prom': h['humedad_relativa'].mean(),
+            'temp_planta_min': h['temp_planta'].min(),
+            'temp_planta_max': h['temp_planta'].max(),
+            'humedad_relativa_min': h['humedad_relativa'].min(),
+            'humedad_relativa_max': h['humedad_relativa'].max(),
         }
+        for clave, valores in por_zona.items():
+            for k, valor in enumerate(valores.tolist(), 1):
+                self.estadisticas[clave.format(k)] = valor
     
     def intentar_conexion(self):
-        """Intenta conectarse al simulador real"""
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2)
-            sock.connect((self.host, self.port))
-            sock.close()
-            self.connected = True
-            return True
-        except:
-            self.connected = False
+        """Comprueba la conexión persistente del pool (sin bloquear si el simulador está caído)"""
+        with self.pool.conexion(self.host, self.port) as controlador:
+            self.connected = controlador is not None
+        return self.connected
+    
+    def historial_sesion(self):
+        """Historial columnar de este simulador guardado en la sesión de Streamlit (columnas del controlador)"""
+        clave = f"historial_{self.host}:{self.port}"
+        if clave not in st.session_state:
+            st.session_state[clave] = HistorialColumnar(tipos_historial(), MAX_MUESTRAS_SESION)
+        return st.session_state[clave]
+    
+    def sincronizar_sesion(self, controlador, respuesta):
+        """Aplica una respuesta de HISTORIAL_DESDE al historial de la sesión con el parser del controlador
+
+        El controlador del pool se comparte entre sesiones: solo se usan sus
+        métodos de parseo, el historial es el de esta sesión. Si la respuesta
+        no alcanza para rehacerlo (cambiaron las zonas) se pide todo de nuevo.
+        """
+        cache = controlador.sincronizar_historial(self.historial_sesion(), respuesta)
+        if cache is not None and cache.ultima_seq < 0 and not len(cache):
+            respuesta, = controlador.send_commands_raw([comando_historial_desde(cache, MAX_MUESTRAS_SESION)])
+            cache = controlador.sincronizar_historial(cache, respuesta) if respuesta is not None else None
+        if cache is None:
             return False
+        st.session_state[f"historial_{self.host}:{self.port}"] = cache
+        return True
     
-    def obtener_datos(self):
-        """Obtiene datos del simulador o genera fake"""
-        if self.intentar_conexion():
-            st.sidebar.success("🔌 Conectado al simulador")
-            # Aquí podrías implementar la conexión real
-            # Por ahora usamos datos fake
-            self.generar_datos_fake()
-        else:
-            st.sidebar.warning("⚠️ Usando datos de demostración")
+    def obtener_datos_simulador(self, controlador):
+        """Consulta STATUS, historial nuevo (HISTORIAL_DESDE) y ESTADISTICAS en un solo viaje de red"""
+        estado, historial, stats = controlador.send_commands_raw(
+            ["STATUS", comando_historial_desde(self.historial_sesion(), MAX_MUESTRAS_SESION), "ESTADISTICAS"]
+        )
+        if estado is None or historial is None or stats is None:
+            self.pool.marcar_caida(self.host, self.port)
+            return False
+        
+        # El número de zonas lo fija la respuesta de STATUS
+        if not controlador.parsear_cuerpo_estado(estado) or not self.sincronizar_sesion(controlador, historial):
+            return False
+        
+        cache = self.historial_sesion()
+        controlador.parsear_estadisticas(stats.decode('utf-8').strip())
+        self.datos_actuales = dict(controlador.datos)
+        self.estadisticas = dict(controlador.estadisticas)
+        self.historial = self.dataframe_sesion(cache)
+        self.version = cache.revision
+        return len(self.historial) > 0
+    
+    def dataframe_sesion(self, cache):
+        """DataFrame del historial de la sesión, rehecho solo si cambió su revisión
+
+        La columna timestamp sale de la hora simulada de cada muestra.
+        """
+        clave = f"df_{self.host}:{self.port}"
+        guardado = st.session_state.get(clave)
+        if guardado is None or guardado[0] != cache.revision:
+            columnas = cache.vista()
+            columnas = {'timestamp': marcas_tiempo(columnas.pop('tiempo')),
+                        **{nombre: valores for nombre, valores in columnas.items() if nombre != 'indice'}}
+            guardado = (cache.revision, pd.DataFrame(columnas, copy=False))
+            st.session_state[clave] = guardado
+        return guardado[1]
+    
+    def obtener_datos(self, forzar_demo=False):
+        """Obtiene datos del simulador o, si no está disponible, datos de demostración
+
+        No escribe en la barra lateral: también se llama desde fragmentos.
+        """
+        self.actualizado = time.time()
+        with self.pool.conexion(self.host, self.port) as controlador:
+            self.connected = controlador is not None and self.obtener_datos_simulador(controlador)
+        
+        if self.connected:
+            return
+        
+        # Los datos de demostración se generan una vez por sesión
+        if forzar_demo or 'datos_demo' not in st.session_state:
             self.generar_datos_fake()
+            st.session_state['datos_demo'] = (self.historial, self.datos_actuales, self.estadisticas, self.version)
+        self.historial, self.datos_actuales, self.estadisticas, self.version = st.session_state['datos_demo']
+    
+    def refrescar(self, antiguedad_maxima):
+        """Vuelve a consultar si los datos tienen más de antiguedad_maxima segundos
+
+        Cada fragmento en vivo lo llama al ejecutarse; el primero de cada
+        intervalo trae lo nuevo y los demás reutilizan esa consulta.
+        """
+        if time.time() - self.actualizado >= antiguedad_maxima:
+            self.obtener_datos()
 
 def mostrar_metricas_principales(datos):
     """Muestra las métricas principales en cards"""
+    zonas = contar_zonas(datos)
+    humedades = [datos[f'humedad{k}'] for k in range(1, zonas + 1)]
+    
+    # Con 2 zonas una tarjeta por zona; con más, la media y la zona más seca
+    if zonas <= 2:
+        tarjetas_humedad = [(f"💧 Humedad Zona {k}", hum) for k, hum in enumerate(humedades, 1)]
+    else:
+        seca = int(np.argmin(humedades))
+        tarjetas_humedad = [
+            (f"💧 Humedad Media ({zonas} zonas)", round(float(np.mean(humedades)), 1)),
+            (f"💧 Zona Más Seca (Z{seca + 1})", humedades[seca]),
+        ]
+    
     # Primera fila: Sensores de humedad
     col1, col2, col3 = st.columns(3)
     
-    with col1:
-        # Estado humedad zona 1
-        hum1 = datos['humedad1']
-        color = "status-good" if hum1 > 40 else "status-warning" if hum1 > 25 else "status-danger"
-        st.markdown(f"""
-        <div class="metric-card {color}">
-            <h3>💧 Humedad Zona 1</h3>
-            <h2>{hum1}%</h2>
-            <p>{'✅ Óptimo' if hum1 > 40 else '⚠️ Bajo' if hum1 > 25 else '🚨 Crítico'}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        # Estado humedad zona 2
-        hum2 = datos['humedad2']
-        color = "status-good" if hum2 > 40 else "status-warning" if hum2 > 25 else "status-danger"
-        st.markdown(f"""
-        <div class="metric-card {color}">
-            <h3>💧 Humedad Zona 2</h3>
-            <h2>{hum2}%</h2>
-            <p>{'✅ Óptimo' if hum2 > 40 else '⚠️ Bajo' if hum2 > 25 else '🚨 Crítico'}</p>
-        </div>
-        """, unsafe_allow_html=True)
+    for col, (titulo, hum) in zip((col1, col2), tarjetas_humedad):
+        with col:
+            color = "status-good" if hum > 40 else "status-warning" if hum > 25 else "status-danger"
+            st.markdown(f"""
+            <div class="metric-card {color}">
+                <h3>{titulo}</h3>
+                <h2>{hum}%</h2>
+                <p>{'✅ Óptimo' if hum > 40 else '⚠️ Bajo' if hum > 25 else '🚨 Crítico'}</p>
+            </div>
+            """, unsafe_allow_html=True)
     
     with col3:
         # Humedad relativa del entorno
@@ -223,7 +306,7 @@ def mostrar_metricas_principales(datos):
     
     with col4:
         # Temperatura promedio ambiente
-        temp_prom = (datos['temperatura1'] + datos['temperatura2']) / 2
+        temp_prom = float(np.mean([datos[f'temperatura{k}'] for k in range(1, zonas + 1)]))
         color = "status-good" if 20 <= temp_prom <= 30 else "status-warning" if 15 <= temp_prom <= 35 else "status-danger"
         st.markdown(f"""
         <div class="metric-card {color}">
@@ -247,18 +330,86 @@ def mostrar_metricas_principales(datos):
     
     with col6:
         # Estado de bombas
-        bombas_activas = int(datos['bomba1_activa']) + int(datos['bomba2_activa'])
-        color = "status-good" if bombas_activas == 0 else "status-warning" if bombas_activas == 1 else "status-danger"
+        bombas_activas = sum(int(datos[f'bomba{k}_activa']) for k in range(1, zonas + 1))
+        intenso = bombas_activas > zonas / 2
+        color = "status-good" if bombas_activas == 0 else "status-danger" if intenso else "status-warning"
         st.markdown(f"""
         <div class="metric-card {color}">
             <h3>🚿 Bombas Activas</h3>
-            <h2>{bombas_activas}/2</h2>
-            <p>{'💚 Sin riego' if bombas_activas == 0 else '🟡 Regando' if bombas_activas == 1 else '🔴 Riego intenso'}</p>
+            <h2>{bombas_activas}/{zonas}</h2>
+            <p>{'💚 Sin riego' if bombas_activas == 0 else '🔴 Riego intenso' if intenso else '🟡 Regando'}</p>
         </div>
         """, unsafe_allow_html=True)
 
-def crear_grafico_tendencias(historial):
-    """Crea gráfico de tendencias de humedad y temperatura con todos los sensores"""
+def series_analogicas(df, zonas):
+    """Series que dibuja crear_grafico_tendencias: una por zona (o la media entre zonas) y planta/entorno"""
+    series = {}
+    for prefijo in ('humedad', 'temperatura'):
+        if zonas <= MAX_ZONAS_DETALLE:
+            series.update({f'{prefijo}{k}': np.asarray(df[f'{prefijo}{k}'], dtype=np.float64)
+                           for k in range(1, zonas + 1)})
+        else:
+            series[f'{prefijo}_media'] = matriz_zonas(df, prefijo, zonas).mean(axis=1)
+    for columna in ('temp_planta', 'humedad_relativa'):
+        if columna in df.columns:
+            series[columna] = np.asarray(df[columna], dtype=np.float64)
+    return series
+
+def agregar_trazas_zonas(fig, df, tiempo, series, indices, prefijo, zonas, etiqueta, colores, unidad, row, max_puntos):
+    """Una línea por zona; con muchas zonas, la media y la banda mínimo-máximo entre zonas
+
+    indices: puntos elegidos por LTTB para cada serie de series_analogicas.
+    """
+    if zonas <= MAX_ZONAS_DETALLE:
+        for k in range(1, zonas + 1):
+            idx = indices[f'{prefijo}{k}']
+            fig.add_trace(
+                traza_dispersion(
+                    len(idx), x=tiempo[idx], y=series[f'{prefijo}{k}'][idx],
+                    name=f'{etiqueta} {k}', line=dict(color=color_zona(colores, k), width=3),
+                    hovertemplate=f'<b>{etiqueta} {k}</b><br>%{{y:.1f}}{unidad}<br>%{{x}}<extra></extra>'
+                ),
+                row=row, col=1
+            )
+        return
+    
+    # Banda: mínimo y máximo entre zonas de cada cubeta de tiempo (no se pierden extremos)
+    valores = matriz_zonas(df, prefijo, zonas)
+    cortes = cortes_cubetas(len(valores), max_puntos)
+    x_banda = tiempo[cortes]
+    fig.add_trace(
+        traza_dispersion(
+            len(cortes), x=x_banda, y=np.maximum.reduceat(valores.max(axis=1), cortes),
+            name=f'Máximo ({zonas} zonas)', line=dict(color=colores[0], width=0),
+            hovertemplate=f'<b>Máximo</b><br>%{{y:.1f}}{unidad}<br>%{{x}}<extra></extra>',
+            showlegend=False
+        ),
+        row=row, col=1
+    )
+    fig.add_trace(
+        traza_dispersion(
+            len(cortes), x=x_banda, y=np.minimum.reduceat(valores.min(axis=1), cortes),
+            name=f'Rango ({zonas} zonas)', line=dict(color=colores[0], width=0),
+            fill='tonexty', opacity=0.3,
+            hovertemplate=f'<b>Mínimo</b><br>%{{y:.1f}}{unidad}<br>%{{x}}<extra></extra>'
+        ),
+        row=row, col=1
+    )
+    idx = indices[f'{prefijo}_media']
+    fig.add_trace(
+        traza_dispersion(
+            len(idx), x=tiempo[idx], y=series[f'{prefijo}_media'][idx],
+            name=f'Media ({zonas} zonas)', line=dict(color=colores[1], width=3),
+            hovertemplate=f'<b>Media</b><br>%{{y:.1f}}{unidad}<br>%{{x}}<extra></extra>'
+        ),
+        row=row, col=1
+    )
+
+def crear_grafico_tendencias(historial, max_puntos=PUNTOS_POR_TRAZA):
+    """Crea gráfico de tendencias de humedad y temperatura con todos los sensores
+
+    Cada traza lleva a lo sumo max_puntos puntos elegidos con LTTB.
+    """
     df = pd.DataFrame(historial)
     
     # Crear subplots con 3 filas
@@ -273,47 +424,25 @@ def crear_grafico_tendencias(historial):
         specs=[[{"secondary_y": True}], [{"secondary_y": True}], [{"secondary_y": True}]]
     )
     
-    # Gráfico de humedad del suelo
-    fig.add_trace(
-        go.Scatter(
-            x=df['timestamp'], y=df['humedad1'],
-            name='Zona 1', line=dict(color='#2E86AB', width=3),
-            hovertemplate='<b>Zona 1</b><br>%{y:.1f}%<br>%{x}<extra></extra>'
-        ),
-        row=1, col=1
-    )
+    zonas = contar_zonas(df.columns)
     
-    fig.add_trace(
-        go.Scatter(
-            x=df['timestamp'], y=df['humedad2'],
-            name='Zona 2', line=dict(color='#A23B72', width=3),
-            hovertemplate='<b>Zona 2</b><br>%{y:.1f}%<br>%{x}<extra></extra>'
-        ),
-        row=1, col=1
-    )
+    # LTTB de todas las series en un solo recorrido (comparten el eje de tiempo)
+    tiempo = np.asarray(df['timestamp'], dtype='datetime64[ns]')
+    series = series_analogicas(df, zonas)
+    elegidos = indices_lttb(tiempo.astype(np.int64), np.column_stack(list(series.values())), max_puntos)
+    indices = dict(zip(series, elegidos.T))
+    
+    # Gráfico de humedad del suelo
+    agregar_trazas_zonas(fig, df, tiempo, series, indices, 'humedad', zonas, 'Zona', COLORES_HUMEDAD, '%', 1,
+                         max_puntos)
     
     # Línea de umbral crítico para humedad
     fig.add_hline(y=30, line_dash="dash", line_color="red", 
                   annotation_text="Umbral crítico", row=1, col=1)
     
     # Gráfico de temperatura ambiente
-    fig.add_trace(
-        go.Scatter(
-            x=df['timestamp'], y=df['temperatura1'],
-            name='Sensor 1', line=dict(color='#F18F01', width=3),
-            hovertemplate='<b>Sensor 1</b><br>%{y:.1f}°C<br>%{x}<extra></extra>'
-        ),
-        row=2, col=1
-    )
-    
-    fig.add_trace(
-        go.Scatter(
-            x=df['timestamp'], y=df['temperatura2'],
-            name='Sensor 2', line=dict(color='#C73E1D', width=3),
-            hovertemplate='<b>Sensor 2</b><br>%{y:.1f}°C<br>%{x}<extra></extra>'
-        ),
-        row=2, col=1
-    )
+    agregar_trazas_zonas(fig, df, tiempo, series, indices, 'temperatura', zonas, 'Sensor', COLORES_TEMPERATURA, '°C', 2,
+                         max_puntos)
     
     # Área de temperatura ideal
     fig.add_hrect(y0=20, y1=30, fillcolor="green", opacity=0.1, 
@@ -321,9 +450,10 @@ def crear_grafico_tendencias(historial):
     
     # Gráfico de sensores especializados
     if 'temp_planta' in df.columns:
+        idx = indices['temp_planta']
         fig.add_trace(
-            go.Scatter(
-                x=df['timestamp'], y=df['temp_planta'],
+            traza_dispersion(
+                len(idx), x=tiempo[idx], y=series['temp_planta'][idx],
                 name='🌿 Temp. Planta', line=dict(color='#228B22', width=3),
                 hovertemplate='<b>Temp. Planta</b><br>%{y:.1f}°C<br>%{x}<extra></extra>'
             ),
@@ -332,9 +462,10 @@ def crear_grafico_tendencias(historial):
     
     if 'humedad_relativa' in df.columns:
         # Usar eje secundario para humedad relativa
+        idx = indices['humedad_relativa']
         fig.add_trace(
-            go.Scatter(
-                x=df['timestamp'], y=df['humedad_relativa'],
+            traza_dispersion(
+                len(idx), x=tiempo[idx], y=series['humedad_relativa'][idx],
                 name='🌫️ Hum. Relativa', line=dict(color='#4169E1', width=3, dash='dot'),
                 hovertemplate='<b>Hum. Relativa</b><br>%{y:.1f}%<br>%{x}<extra></extra>',
                 yaxis='y2'
@@ -361,39 +492,54 @@ def crear_grafico_tendencias(historial):
     
     return fig
 
-def crear_grafico_actividad_bombas(historial):
-    """Crea gráfico de actividad de bombas"""
+def crear_grafico_actividad_bombas(historial, max_puntos=PUNTOS_POR_TRAZA):
+    """Crea gráfico de actividad de bombas (solo los cambios de estado de cada bomba)"""
     df = pd.DataFrame(historial)
     
+    zonas = contar_zonas(df.columns)
+    tiempo = np.asarray(df['timestamp'], dtype='datetime64[ns]')
+    
+    # Con muchas zonas: mapa de calor zonas x tiempo (una sola traza) con la fracción
+    # de tiempo encendida en a lo sumo max_puntos columnas
+    if zonas > MAX_ZONAS_DETALLE:
+        bombas = matriz_zonas(df, 'bomba', zonas).astype(np.float64)
+        cortes = cortes_cubetas(len(bombas), max_puntos)
+        tamanos = np.diff(np.r_[cortes, len(bombas)])[:, None]
+        fraccion = np.add.reduceat(bombas, cortes) / tamanos if len(cortes) else bombas
+        fig = go.Figure(go.Heatmap(
+            x=tiempo[cortes], y=[f'Zona {k}' for k in range(1, zonas + 1)], z=fraccion.T,
+            colorscale=[[0, '#ecf0f1'], [1, '#3498db']], zmin=0, zmax=1, showscale=False,
+            hovertemplate='<b>%{y}</b><br>Bomba encendida: %{z:.0%}<br>%{x}<extra></extra>'
+        ))
+        fig.update_layout(
+            title=f"🚿 Actividad de las Bombas de Riego ({zonas} zonas)",
+            title_x=0.5,
+            xaxis_title="Tiempo",
+            yaxis_title="Zona",
+            height=max(400, min(1200, 8 * zonas)),
+            template="plotly_white"
+        )
+        return fig
+    
     fig = go.Figure()
     
-    # Convertir booleanos a números para visualización
-    df['bomba1_num'] = df['bomba1'].astype(int)
-    df['bomba2_num'] = df['bomba2'].astype(int) + 1.1  # Offset para separar visualmente
-    
-    # Bomba 1
-    fig.add_trace(go.Scatter(
-        x=df['timestamp'],
-        y=df['bomba1_num'],
-        mode='lines',
-        name='🚿 Bomba Zona 1',
-        line=dict(color='#3498db', width=4),
-        fill='tonexty',
-        hovertemplate='<b>Bomba Zona 1</b><br>Estado: %{text}<br>%{x}<extra></extra>',
-        text=['🟢 Activa' if x else '🔴 Inactiva' for x in df['bomba1']]
-    ))
-    
-    # Bomba 2
-    fig.add_trace(go.Scatter(
-        x=df['timestamp'],
-        y=df['bomba2_num'],
-        mode='lines',
-        name='🚿 Bomba Zona 2',
-        line=dict(color='#e74c3c', width=4),
-        fill='tonexty',
-        hovertemplate='<b>Bomba Zona 2</b><br>Estado: %{text}<br>%{x}<extra></extra>',
-        text=['🟢 Activa' if x else '🔴 Inactiva' for x in df['bomba2']]
-    ))
+    # Una línea escalonada por bomba, desplazadas 1.1 para separarlas visualmente;
+    # basta con el primer punto, cada cambio de estado y el último
+    for k in range(1, zonas + 1):
+        offset = (k - 1) * 1.1
+        estados = np.asarray(df[f'bomba{k}'], dtype=bool)
+        idx = indices_transiciones(estados, max_puntos)
+        fig.add_trace(traza_dispersion(
+            len(idx),
+            x=tiempo[idx],
+            y=estados[idx].astype(int) + offset,
+            mode='lines',
+            name=f'🚿 Bomba Zona {k}',
+            line=dict(color=color_zona(COLORES_BOMBAS, k), width=4, shape='hv'),
+            fill='tonexty',
+            hovertemplate=f'<b>Bomba Zona {k}</b><br>Estado: %{{text}}<br>%{{x}}<extra></extra>',
+            text=np.where(estados[idx], '🟢 Activa', '🔴 Inactiva')
+        ))
     
     fig.update_layout(
         title="🚿 Actividad de las Bombas de Riego",
@@ -402,8 +548,8 @@ def crear_grafico_actividad_bombas(historial):
         yaxis_title="Estado de Bombas",
         yaxis=dict(
             tickmode='array',
-            tickvals=[0, 1, 1.1, 2.1],
-            ticktext=['Inactiva', 'Zona 1 Activa', 'Zona 2 Activa', '']
+            tickvals=[0] + [(k - 1) * 1.1 + 1 for k in range(1, zonas + 1)],
+            ticktext=['Inactiva'] + [f'Zona {k} Activa' for k in range(1, zonas + 1)]
         ),
         height=400,
         template="plotly_white",
@@ -412,63 +558,86 @@ def crear_grafico_actividad_bombas(historial):
     
     return fig
 
-def crear_dashboard_estadisticas(stats):
+def zonas_estadisticas(stats):
+    """Zonas presentes en las estadísticas (claves hum1_prom..humN_prom)"""
+    zonas = 0
+    while f'hum{zonas + 1}_prom' in stats:
+        zonas += 1
+    return zonas
+
+def barras_estadisticas(stats, prefijo, etiqueta, colores):
+    """Barras promedio/mínimo/máximo: una serie por zona o, con muchas zonas, una por medida"""
+    zonas = zonas_estadisticas(stats)
+    medidas = [('Promedio', 'prom'), ('Mínimo', 'min'), ('Máximo', 'max')]
+    if zonas <= MAX_ZONAS_DETALLE:
+        return [
+            go.Bar(name=f'{etiqueta} {k}', x=[nombre for nombre, _ in medidas],
+                   y=[stats[f'{prefijo}{k}_{sufijo}'] for _, sufijo in medidas],
+                   marker_color=color_zona(colores, k))
+            for k in range(1, zonas + 1)
+        ]
+    nombres = [f'{etiqueta} {k}' for k in range(1, zonas + 1)]
+    return [
+        go.Bar(name=nombre, x=nombres, y=[stats[f'{prefijo}{k}_{sufijo}'] for k in range(1, zonas + 1)],
+               marker_color=color_zona(colores, i + 1))
+        for i, (nombre, sufijo) in enumerate(medidas)
+    ]
+
+def crear_figuras_estadisticas(stats):
+    """Gráficos de barras de estadísticas de humedad y temperatura"""
+    # Gráfico de barras para humedad
+    fig_hum = go.Figure(data=barras_estadisticas(stats, 'hum', 'Zona', COLORES_HUMEDAD))
+    
+    fig_hum.update_layout(
+        title="Estadísticas de Humedad (%)",
+        barmode='group',
+        height=300,
+        template="plotly_white"
+    )
+    
+    # Gráfico de barras para temperatura
+    fig_temp = go.Figure(data=barras_estadisticas(stats, 'temp', 'Sensor', COLORES_TEMPERATURA))
+    
+    fig_temp.update_layout(
+        title="Estadísticas de Temperatura (°C)",
+        barmode='group',
+        height=300,
+        template="plotly_white"
+    )
+    return fig_hum, fig_temp
+
+def crear_dashboard_estadisticas(stats, version=None):
     """Crea dashboard de estadísticas"""
+    fig_hum, fig_temp = figuras_estadisticas(version, stats)
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("📊 Estadísticas de Humedad")
-        
-        # Gráfico de barras para humedad
-        fig_hum = go.Figure(data=[
-            go.Bar(name='Zona 1', x=['Promedio', 'Mínimo', 'Máximo'], 
-                   y=[stats['hum1_prom'], stats['hum1_min'], stats['hum1_max']],
-                   marker_color='#2E86AB'),
-            go.Bar(name='Zona 2', x=['Promedio', 'Mínimo', 'Máximo'], 
-                   y=[stats['hum2_prom'], stats['hum2_min'], stats['hum2_max']],
-                   marker_color='#A23B72')
-        ])
-        
-        fig_hum.update_layout(
-            title="Estadísticas de Humedad (%)",
-            barmode='group',
-            height=300,
-            template="plotly_white"
-        )
-        
         st.plotly_chart(fig_hum, use_container_width=True)
     
     with col2:
         st.subheader("🌡️ Estadísticas de Temperatura")
-        
-        # Gráfico de barras para temperatura
-        fig_temp = go.Figure(data=[
-            go.Bar(name='Sensor 1', x=['Promedio', 'Mínimo', 'Máximo'], 
-                   y=[stats['temp1_prom'], stats['temp1_min'], stats['temp1_max']],
-                   marker_color='#F18F01'),
-            go.Bar(name='Sensor 2', x=['Promedio', 'Mínimo', 'Máximo'], 
-                   y=[stats['temp2_prom'], stats['temp2_min'], stats['temp2_max']],
-                   marker_color='#C73E1D')
-        ])
-        
-        fig_temp.update_layout(
-            title="Estadísticas de Temperatura (°C)",
-            barmode='group',
-            height=300,
-            template="plotly_white"
-        )
-        
         st.plotly_chart(fig_temp, use_container_width=True)
 
 def crear_grafico_tiempo_riego(stats):
     """Crea gráfico de tiempo de riego"""
+    tiempos = [stats[f'bomba{k}_tiempo'] for k in range(1, zonas_estadisticas(stats) + 1)]
+    etiquetas = [f'Bomba Zona {k}' for k in range(1, len(tiempos) + 1)]
+    colores = [color_zona(COLORES_BOMBAS, k) for k in range(1, len(tiempos) + 1)]
+    
+    # Con muchas zonas las que no caben se agrupan en una porción
+    if len(tiempos) > MAX_ZONAS_DETALLE:
+        etiquetas = etiquetas[:MAX_ZONAS_DETALLE] + [f'Otras {len(tiempos) - MAX_ZONAS_DETALLE} zonas']
+        colores = colores[:MAX_ZONAS_DETALLE] + ['#34495e']
+        tiempos = tiempos[:MAX_ZONAS_DETALLE] + [sum(tiempos[MAX_ZONAS_DETALLE:])]
+    sin_riego = max(0.0, 100 - sum(tiempos))
+    
     fig = go.Figure(data=[
         go.Pie(
-            labels=['Bomba Zona 1', 'Bomba Zona 2', 'Sin riego'],
-            values=[stats['bomba1_tiempo'], stats['bomba2_tiempo'], 
-                   100 - stats['bomba1_tiempo'] - stats['bomba2_tiempo']],
+            labels=etiquetas + ['Sin riego'],
+            values=tiempos + [sin_riego],
             hole=.4,
-            marker_colors=['#3498db', '#e74c3c', '#95a5a6'],
+            marker_colors=colores + ['#95a5a6'],
             hovertemplate='<b>%{label}</b><br>%{value:.1f}% del tiempo<extra></extra>'
         )
     ])
@@ -478,54 +647,22 @@ def crear_grafico_tiempo_riego(stats):
         title_x=0.5,
         height=400,
         template="plotly_white",
-        annotations=[dict(text=f'Eficiencia<br>{100-stats["bomba1_tiempo"]-stats["bomba2_tiempo"]:.1f}%', 
+        annotations=[dict(text=f'Eficiencia<br>{sin_riego:.1f}%', 
                          x=0.5, y=0.5, font_size=16, showarrow=False)]
     )
     
     return fig
 
-def crear_simulacion_3d_interactiva(temp1, hum1, bomba1, temp2, hum2, bomba2):
-    """Crea una simulación 3D interactiva del sistema de riego"""
-    
-    # Configuración del terreno
-    size = 15
-    x_range = np.linspace(-2, 5, size)
-    y_range = np.linspace(-2, 2, size)
-    X, Y = np.meshgrid(x_range, y_range)
-    
-    # Posiciones de las plantas
-    planta1_pos = (0, 0)
-    planta2_pos = (3, 0)
-    
-    # Calcular campo de temperatura
-    Z_temp = np.ones_like(X) * 20.0  # Temperatura base
-    
-    for planta_pos, temp, bomba in [(planta1_pos, temp1, bomba1), (planta2_pos, temp2, bomba2)]:
-        px, py = planta_pos
-        distancia = np.sqrt((X - px)**2 + (Y - py)**2)
-        influencia = np.exp(-distancia / 1.5)
-        Z_temp += influencia * (temp - 20)
-        
-        # Efecto de enfriamiento por riego
-        if bomba:
-            influencia_riego = np.exp(-distancia / 0.8)
-            Z_temp -= influencia_riego * 3
-    
-    # Calcular campo de humedad
-    Z_humedad = np.ones_like(X) * 30.0  # Humedad base
-    
-    for planta_pos, hum, bomba in [(planta1_pos, hum1, bomba1), (planta2_pos, hum2, bomba2)]:
-        px, py = planta_pos
-        distancia = np.sqrt((X - px)**2 + (Y - py)**2)
-        influencia = np.exp(-distancia / 1.2)
-        Z_humedad += influencia * (hum - 30)
-        
-        # Efecto de aumento de humedad por riego
-        if bomba:
-            influencia_riego = np.exp(-distancia / 1.0)
-            Z_humedad += influencia_riego * 35
-    
-    Z_humedad = np.clip(Z_humedad, 0, 100)
+@st.cache_resource(max_entries=8, show_spinner=False)
+def plantilla_simulacion_3d(n):
+    """Subplots, escenas, colores y trazas vacías de la simulación 3D con n plantas
+    
+    Validar la estructura de la figura cuesta más que calcular los campos: se
+    arma una vez por número de plantas y cada llamada copia la plantilla y
+    solo asigna los datos. cache_resource (y no lru_cache) porque Streamlit
+    vuelve a ejecutar este script en cada rerun y una función nueva empezaría
+    con el caché vacío; la plantilla es compartida y nunca se modifica.
+    """
     
     # Crear subplots
     fig = make_subplots(
@@ -541,10 +678,13 @@ def crear_simulacion_3d_interactiva(temp1, hum1, bomba1, temp2, hum2, bomba2):
         vertical_spacing=0.12
     )
     
-    # 1. Superficie de temperatura
+    posiciones = posiciones_plantas(n)
+    plantas_x, plantas_y = posiciones[:, 0], posiciones[:, 1]
+    plantas_text = [f'P{k}' for k in range(1, n + 1)]
+    
+    # 1. Superficie de temperatura y plantas sobre ella
     fig.add_trace(
         go.Surface(
-            x=X, y=Y, z=Z_temp,
             colorscale='RdYlBu_r',
             showscale=True,
             colorbar=dict(title="°C", x=0.45, len=0.8),
@@ -552,19 +692,11 @@ def crear_simulacion_3d_interactiva(temp1, hum1, bomba1, temp2, hum2, bomba2):
         ),
         row=1, col=1
     )
-    
-    # Plantas en superficie de temperatura
-    plantas_x = [planta1_pos[0], planta2_pos[0]]
-    plantas_y = [planta1_pos[1], planta2_pos[1]]
-    plantas_z_temp = [temp1 + 1, temp2 + 1]
-    plantas_color_temp = ['red' if bomba1 else 'green', 'red' if bomba2 else 'green']
-    plantas_text = ['P1', 'P2']
-    
     fig.add_trace(
         go.Scatter3d(
-            x=plantas_x, y=plantas_y, z=plantas_z_temp,
+            x=plantas_x, y=plantas_y,
             mode='markers+text',
-            marker=dict(size=20, color=plantas_color_temp),
+            marker=dict(size=20),
             text=plantas_text,
             textposition="middle center",
             showlegend=False,
@@ -573,10 +705,9 @@ def crear_simulacion_3d_interactiva(temp1, hum1, bomba1, temp2, hum2, bomba2):
         row=1, col=1
     )
     
-    # 2. Superficie de humedad
+    # 2. Superficie de humedad y plantas sobre ella
     fig.add_trace(
         go.Surface(
-            x=X, y=Y, z=Z_humedad,
             colorscale='Blues',
             showscale=True,
             colorbar=dict(title="%", x=1.02, len=0.8),
@@ -584,16 +715,11 @@ def crear_simulacion_3d_interactiva(temp1, hum1, bomba1, temp2, hum2, bomba2):
         ),
         row=1, col=2
     )
-    
-    # Plantas en superficie de humedad
-    plantas_z_hum = [hum1 + 3, hum2 + 3]
-    plantas_color_hum = ['blue' if bomba1 else 'brown', 'blue' if bomba2 else 'brown']
-    
     fig.add_trace(
         go.Scatter3d(
-            x=plantas_x, y=plantas_y, z=plantas_z_hum,
+            x=plantas_x, y=plantas_y,
             mode='markers+text',
-            marker=dict(size=20, color=plantas_color_hum),
+            marker=dict(size=20),
             text=plantas_text,
             textposition="middle center",
             showlegend=False,
@@ -602,84 +728,53 @@ def crear_simulacion_3d_interactiva(temp1, hum1, bomba1, temp2, hum2, bomba2):
         row=1, col=2
     )
     
-    # 3. Vista combinada
-    # Plantas principales
+    # 3. Vista combinada: plantas principales y jets de riego
     fig.add_trace(
         go.Scatter3d(
-            x=plantas_x, y=plantas_y, z=[temp1, temp2],
+            x=plantas_x, y=plantas_y,
             mode='markers+text',
             marker=dict(
                 size=30,
-                color=[hum1, hum2],
                 colorscale='Viridis',
                 colorbar=dict(title="Humedad %", x=0.45, y=0.2, len=0.3)
             ),
-            text=['🌱P1', '🌱P2'],
+            text=[f'🌱P{k}' for k in range(1, n + 1)],
             textposition="middle center",
             showlegend=False,
             name="Plantas Combinado"
         ),
         row=2, col=1
     )
+    fig.add_trace(
+        go.Scatter3d(
+            mode='markers',
+            marker=dict(size=8, color='cyan', opacity=0.7),
+            showlegend=False,
+            name="Riego"
+        ),
+        row=2, col=1
+    )
     
-    # Jets de riego
-    for i, (planta_pos, temp, bomba) in enumerate([(planta1_pos, temp1, bomba1), (planta2_pos, temp2, bomba2)]):
-        if bomba:
-            px, py = planta_pos
-            jet_z = [temp + j*1.5 for j in range(1, 5)]
-            fig.add_trace(
-                go.Scatter3d(
-                    x=[px] * 4, y=[py] * 4, z=jet_z,
-                    mode='markers',
-                    marker=dict(size=8, color='cyan', opacity=0.7),
-                    showlegend=False,
-                    name=f"Riego P{i+1}"
-                ),
-                row=2, col=1
-            )
-    
-    # 4. Gráfico de barras de estado actual
+    # 4. Gráfico de barras de estado actual (humedad como barras secundarias)
     fig.add_trace(
         go.Bar(
-            x=['🌿 Planta 1', '🌿 Planta 2'],
-            y=[temp1, temp2],
+            x=[f'🌿 Planta {k}' for k in range(1, n + 1)],
             name='Temperatura (°C)',
-            marker_color=plantas_color_temp,
-            text=[f"{temp1:.1f}°C {'🚿' if bomba1 else '🌱'}", 
-                  f"{temp2:.1f}°C {'🚿' if bomba2 else '🌱'}"],
             textposition='auto'
         ),
         row=2, col=2
     )
-    
-    # Humedad como barras secundarias
     fig.add_trace(
         go.Bar(
-            x=['💧 Planta 1', '💧 Planta 2'],
-            y=[hum1, hum2],
+            x=[f'💧 Planta {k}' for k in range(1, n + 1)],
             name='Humedad (%)',
-            marker_color=plantas_color_hum,
-            text=[f"{hum1:.1f}% {'🚿' if bomba1 else '💧'}", 
-                  f"{hum2:.1f}% {'🚿' if bomba2 else '💧'}"],
             textposition='auto',
             yaxis='y2'
         ),
         row=2, col=2
     )
     
-    # Configurar layout
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    fig.update_layout(
-        title=dict(
-            text=f"🌱 Simulación 3D Interactiva - Sistema de Riego<br>" +
-                 f"<sub>Actualizado: {timestamp} | " +
-                 f"P1: {'Regando 🚿' if bomba1 else 'Normal 🌱'} | " +
-                 f"P2: {'Regando 🚿' if bomba2 else 'Normal 🌱'}</sub>",
-            x=0.5
-        ),
-        height=800,
-        showlegend=False
-    )
+    fig.update_layout(height=800, showlegend=False)
     
     # Configurar escenas 3D
     scene_config = dict(
@@ -704,10 +799,69 @@ def crear_simulacion_3d_interactiva(temp1, hum1, bomba1, temp2, hum2, bomba2):
     
     return fig
 
-def crear_simulacion_arbol_threejs():
+def crear_simulacion_3d_interactiva(temperaturas, humedades, bombas, resolucion=RESOLUCION_TERRENO):
+    """Crea una simulación 3D interactiva del sistema de riego (una planta por valor de las listas)"""
+    
+    n = len(temperaturas)
+    temperaturas = np.asarray(temperaturas, dtype=np.float64)
+    humedades = np.asarray(humedades, dtype=np.float64)
+    bombas = np.asarray(bombas, dtype=bool)
+    
+    # Terreno y campos de todas las plantas a la vez (núcleos de distancia cacheados)
+    x_range, y_range = malla_terreno(n, resolucion)
+    Z_temp, Z_humedad = calcular_campos(temperaturas, humedades, bombas, resolucion)
+    posiciones = posiciones_plantas(n)
+    regando = np.flatnonzero(bombas)
+    
+    fig = go.Figure(plantilla_simulacion_3d(n))
+    sup_temp, plantas_temp, sup_hum, plantas_hum, combinado, riego, barras_temp, barras_hum = fig.data
+    plantas_color_temp = np.where(bombas, 'red', 'green')
+    plantas_color_hum = np.where(bombas, 'blue', 'brown')
+    
+    with fig.batch_update():
+        # Superficies con ejes 1D y float32: la malla viaja como arreglo binario
+        sup_temp.update(x=x_range, y=y_range, z=Z_temp.astype(np.float32))
+        sup_hum.update(x=x_range, y=y_range, z=Z_humedad.astype(np.float32))
+        plantas_temp.update(z=temperaturas + 1, marker_color=plantas_color_temp)
+        plantas_hum.update(z=humedades + 3, marker_color=plantas_color_hum)
+        combinado.update(z=temperaturas, marker_color=humedades)
+        
+        # Jets de riego: 4 puntos sobre cada planta regando
+        riego.update(x=np.repeat(posiciones[regando, 0], 4), y=np.repeat(posiciones[regando, 1], 4),
+                     z=(temperaturas[regando, None] + np.arange(1, 5) * 1.5).ravel())
+        
+        barras_temp.update(
+            y=temperaturas, marker_color=plantas_color_temp,
+            text=[f"{t:.1f}°C {'🚿' if b else '🌱'}" for t, b in zip(temperaturas, bombas)]
+        )
+        barras_hum.update(
+            y=humedades, marker_color=plantas_color_hum,
+            text=[f"{h:.1f}% {'🚿' if b else '💧'}" for h, b in zip(humedades, bombas)]
+        )
+        
+        # Título con el estado del riego (sin la hora: la figura se cachea con figura_3d
+        # y la hora quedaría congelada; la muestra el tab debajo del gráfico)
+        if n <= 2:
+            estado = " | ".join(f"P{k}: {'Regando 🚿' if b else 'Normal 🌱'}" for k, b in enumerate(bombas, 1))
+        else:
+            estado = f"Regando 🚿: {len(regando)} de {n} plantas"
+        fig.update_layout(
+            title=dict(
+                text="🌱 Simulación 3D Interactiva - Sistema de Riego<br>" +
+                     f"<sub>{estado}</sub>",
+                x=0.5
+            )
+        )
+    
+    return fig
+
+def crear_simulacion_arbol_threejs(sistema=None, intervalo=None, cada=None):
     """
     Crea una simulación 3D de árboles realistas usando Three.js
     integrada en Streamlit como componente personalizado.
+    
+    Con sistema, las lecturas de cada zona se envían a su árbol (puente
+    postMessage); con auto-actualización el envío es un fragmento en vivo.
     """
     
     st.subheader("🌳 Simulación 3D de 8 Árboles Realistas")
@@ -718,12 +872,13 @@ def crear_simulacion_arbol_threejs():
     
     # Verificar si el archivo existe
     if os.path.exists(html_file_path):
-        # Leer el contenido del archivo HTML
-        with open(html_file_path, 'r', encoding='utf-8') as file:
-            html_content = file.read()
+        # Contenido cacheado (se relee solo si el archivo cambia): el iframe no se vuelve a montar
+        html_content = cargar_html_threejs(html_file_path)
         
         # Mostrar el componente HTML en Streamlit
         components.html(html_content, height=800, scrolling=True)
+        if sistema is not None:
+            st.fragment(arboles_en_vivo, run_every=cada)(sistema, intervalo)
         
         # Información adicional
         with st.expander("ℹ️ Información de la Simulación 3D"):
@@ -788,30 +943,88 @@ def crear_simulacion_arbol_threejs():
             except Exception as e:
                 st.error(f"Error al crear el archivo: {str(e)}")
 
+# Figuras cacheadas por revisión de los datos: un rerun (p. ej. mover un slider de
+# la simulación 3D) solo reconstruye lo que cambió. cache_resource devuelve la
+# misma figura sin copiarla; los argumentos con _ no forman parte de la clave.
+
+@st.cache_resource(max_entries=MAX_FIGURAS_CACHE, show_spinner=False)
+def figura_tendencias(version, max_puntos, _historial):
+    return crear_grafico_tendencias(_historial, max_puntos)
+
+@st.cache_resource(max_entries=MAX_FIGURAS_CACHE, show_spinner=False)
+def figura_bombas(version, max_puntos, _historial):
+    return crear_grafico_actividad_bombas(_historial, max_puntos)
+
+@st.cache_resource(max_entries=MAX_FIGURAS_CACHE, show_spinner=False)
+def figuras_estadisticas(version, _stats):
+    return crear_figuras_estadisticas(_stats)
+
+@st.cache_resource(max_entries=MAX_FIGURAS_CACHE, show_spinner=False)
+def figura_tiempo_riego(version, _stats):
+    return crear_grafico_tiempo_riego(_stats)
+
+@st.cache_resource(max_entries=MAX_FIGURAS_CACHE, show_spinner=False)
+def figura_3d(temperaturas, humedades, bombas, resolucion):
+    return crear_simulacion_3d_interactiva(temperaturas, humedades, bombas, resolucion)
+
+# Fragmentos en vivo: con auto-actualización Streamlit vuelve a ejecutar solo estas
+# funciones cada 'intervalo' segundos (st.fragment(run_every=...)), sin bloquear la
+# sesión ni reconstruir el resto de la página. Las figuras vienen del cache por
+# revisión, así solo se rehacen cuando el simulador agregó muestras.
+
+def metricas_en_vivo(sistema, intervalo):
+    """Tarjetas de estado actual"""
+    sistema.refrescar(intervalo / 2)
+    mostrar_metricas_principales(sistema.datos_actuales)
+
+def tendencias_en_vivo(sistema, intervalo, max_puntos):
+    """Gráfico de tendencias con las muestras nuevas"""
+    sistema.refrescar(intervalo / 2)
+    st.plotly_chart(figura_tendencias(sistema.version, max_puntos, sistema.historial), use_container_width=True)
+
+def bombas_en_vivo(sistema, intervalo, max_puntos):
+    """Gráfico de actividad de bombas con las muestras nuevas"""
+    sistema.refrescar(intervalo / 2)
+    st.plotly_chart(figura_bombas(sistema.version, max_puntos, sistema.historial), use_container_width=True)
+
+def arboles_en_vivo(sistema, intervalo):
+    """Envía a la escena Three.js solo los árboles cuyos datos cambiaron"""
+    sistema.refrescar(intervalo / 2)
+    enviar_datos_arboles(sistema.datos_actuales)
+
 def main():
     # Título principal
     st.markdown('<h1 class="main-header">🌱 Sistema de Riego Inteligente</h1>', unsafe_allow_html=True)
     
-    # Inicializar sistema
-    sistema = SistemaRiegoStreamlit()
-    
     # Sidebar con controles
     st.sidebar.title("🎛️ Control del Sistema")
     
+    # Simulador a consultar (el pool mantiene una conexión por dirección)
+    direccion = st.sidebar.text_input("🔌 Simulador (host:puerto)", "localhost:9999")
+    host, _, puerto = direccion.partition(':')
+    
+    # Inicializar sistema
+    sistema = SistemaRiegoStreamlit(host or 'localhost', int(puerto) if puerto.isdigit() else 9999)
+    
     # Botón para actualizar datos
     if st.sidebar.button("🔄 Actualizar Datos", type="primary"):
         with st.spinner("Obteniendo datos..."):
-            sistema.obtener_datos()
+            sistema.obtener_datos(forzar_demo=True)
         st.rerun()
     
-    # Auto-refresh
-    auto_refresh = st.sidebar.checkbox("🔁 Auto-actualizar (30s)")
-    if auto_refresh:
-        time.sleep(30)
-        st.rerun()
+    # Presupuesto de puntos por traza de los gráficos de tendencias y bombas
+    max_puntos = st.sidebar.select_slider("🎯 Puntos por traza", options=[500, 1000, 2000, 5000, 10000],
+                                          value=PUNTOS_POR_TRAZA)
+    
+    # Auto-actualización sin bloquear: solo las métricas y los gráficos en vivo se
+    # vuelven a ejecutar, cada 'intervalo' segundos
+    auto_refresh = st.sidebar.checkbox("🔁 Auto-actualizar")
+    intervalo = st.sidebar.select_slider("⏱️ Intervalo de actualización", options=INTERVALOS_REFRESCO, value=5,
+                                         format_func=lambda s: f"{s} s", disabled=not auto_refresh)
+    cada = intervalo if auto_refresh else None
     
-    # Obtener datos iniciales
-    if not sistema.historial:
+    # Obtener datos (solo lo nuevo si hay simulador; demo cacheada en la sesión)
+    if len(sistema.historial) == 0:
         with st.spinner("Cargando datos del sistema..."):
             sistema.obtener_datos()
     
@@ -819,7 +1032,7 @@ def main():
     if sistema.connected:
         st.sidebar.success("🔌 Conectado al simulador")
     else:
-        st.sidebar.info("📡 Modo demostración")
+        st.sidebar.warning("⚠️ Usando datos de demostración")
     
     # Control de bombas
     st.sidebar.subheader("🚿 Control de Bombas")
@@ -847,15 +1060,23 @@ def main():
     # Estadísticas detalladas
     st.sidebar.subheader("📊 Estadísticas 24h")
     
+    zonas = zonas_estadisticas(sistema.estadisticas)
+    visibles = range(1, min(zonas, ZONAS_VISIBLES) + 1)
+    ocultas = f"... y {zonas - ZONAS_VISIBLES} zonas más" if zonas > ZONAS_VISIBLES else None
+    
     # Estadísticas de humedad
     st.sidebar.markdown("**💧 Humedad del Suelo:**")
-    st.sidebar.text(f"Zona 1: {sistema.estadisticas.get('hum1_prom', 0):.1f}% (promedio)")
-    st.sidebar.text(f"Zona 2: {sistema.estadisticas.get('hum2_prom', 0):.1f}% (promedio)")
+    for k in visibles:
+        st.sidebar.text(f"Zona {k}: {sistema.estadisticas[f'hum{k}_prom']:.1f}% (promedio)")
+    if ocultas:
+        st.sidebar.text(ocultas)
     
     # Estadísticas de temperatura
     st.sidebar.markdown("**🌡️ Temperatura Ambiente:**")
-    st.sidebar.text(f"Sensor 1: {sistema.estadisticas.get('temp1_prom', 0):.1f}°C")
-    st.sidebar.text(f"Sensor 2: {sistema.estadisticas.get('temp2_prom', 0):.1f}°C")
+    for k in visibles:
+        st.sidebar.text(f"Sensor {k}: {sistema.estadisticas[f'temp{k}_prom']:.1f}°C")
+    if ocultas:
+        st.sidebar.text(ocultas)
     
     # Nuevas estadísticas
     if 'temp_planta_prom' in sistema.estadisticas:
@@ -865,14 +1086,16 @@ def main():
     
     # Estadísticas de bombas
     st.sidebar.markdown("**🚿 Actividad de Riego:**")
-    st.sidebar.text(f"Bomba 1: {sistema.estadisticas.get('bomba1_tiempo', 0):.1f}% tiempo")
-    st.sidebar.text(f"Bomba 2: {sistema.estadisticas.get('bomba2_tiempo', 0):.1f}% tiempo")
+    for k in visibles:
+        st.sidebar.text(f"Bomba {k}: {sistema.estadisticas[f'bomba{k}_tiempo']:.1f}% tiempo")
+    if ocultas:
+        st.sidebar.text(ocultas)
     
     # === DASHBOARD PRINCIPAL ===
     
     # Métricas principales
     st.subheader("📊 Estado Actual del Sistema")
-    mostrar_metricas_principales(sistema.datos_actuales)
+    st.fragment(metricas_en_vivo, run_every=cada)(sistema, intervalo)
     
     # Gráficos principales
     st.subheader("📈 Análisis de Tendencias")
@@ -880,28 +1103,25 @@ def main():
     tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["🔄 Tendencias", "🚿 Actividad Bombas", "📊 Estadísticas", "⏱️ Tiempo de Riego", "🎮 Simulación 3D", "🌳 Árboles 3D"])
     
     with tab1:
-        fig_tendencias = crear_grafico_tendencias(sistema.historial)
-        st.plotly_chart(fig_tendencias, use_container_width=True)
+        st.fragment(tendencias_en_vivo, run_every=cada)(sistema, intervalo, max_puntos)
     
     with tab2:
-        fig_bombas = crear_grafico_actividad_bombas(sistema.historial)
-        st.plotly_chart(fig_bombas, use_container_width=True)
+        st.fragment(bombas_en_vivo, run_every=cada)(sistema, intervalo, max_puntos)
     
     with tab3:
-        crear_dashboard_estadisticas(sistema.estadisticas)
+        crear_dashboard_estadisticas(sistema.estadisticas, sistema.version)
     
     with tab4:
         col1, col2 = st.columns([2, 1])
         with col1:
-            fig_tiempo = crear_grafico_tiempo_riego(sistema.estadisticas)
+            fig_tiempo = figura_tiempo_riego(sistema.version, sistema.estadisticas)
             st.plotly_chart(fig_tiempo, use_container_width=True)
         with col2:
-            st.metric("💧 Tiempo Bomba 1", f"{sistema.estadisticas['bomba1_tiempo']:.1f}%")
-            st.metric("💧 Tiempo Bomba 2", f"{sistema.estadisticas['bomba2_tiempo']:.1f}%")
-            st.metric("⏱️ Tiempo Total Riego", 
-                     f"{sistema.estadisticas['bomba1_tiempo'] + sistema.estadisticas['bomba2_tiempo']:.1f}%")
-            st.metric("💚 Eficiencia", 
-                     f"{100 - sistema.estadisticas['bomba1_tiempo'] - sistema.estadisticas['bomba2_tiempo']:.1f}%")
+            tiempo_total = sum(sistema.estadisticas[f'bomba{k}_tiempo'] for k in range(1, zonas + 1))
+            for k in visibles:
+                st.metric(f"💧 Tiempo Bomba {k}", f"{sistema.estadisticas[f'bomba{k}_tiempo']:.1f}%")
+            st.metric("⏱️ Tiempo Total Riego", f"{tiempo_total:.1f}%")
+            st.metric("💚 Eficiencia", f"{max(0.0, 100 - tiempo_total):.1f}%")
     
     with tab5:
         st.markdown("### 🌱 Simulación 3D del Sistema de Riego")
@@ -928,12 +1148,24 @@ def main():
             bomba2_manual = st.checkbox("🚿 Activar Riego Planta 2", 
                                       sistema.datos_actuales.get('bomba2_activa', False))
         
+        # Las demás zonas (hasta MAX_PLANTAS_3D) toman los valores actuales del simulador
+        plantas = min(max(2, zonas), MAX_PLANTAS_3D)
+        resolucion = st.select_slider("🗺️ Resolución del terreno (puntos por lado)",
+                                      options=RESOLUCIONES_TERRENO, value=RESOLUCION_TERRENO)
+        if zonas > MAX_PLANTAS_3D:
+            st.caption(f"Se muestran las primeras {MAX_PLANTAS_3D} de {zonas} zonas")
+        datos = sistema.datos_actuales
+        otras = range(3, plantas + 1)
+        
         # Generar simulación 3D con valores actuales/manuales
-        fig_3d = crear_simulacion_3d_interactiva(
-            temp1_manual, hum1_manual, bomba1_manual,
-            temp2_manual, hum2_manual, bomba2_manual
+        fig_3d = figura_3d(
+            (temp1_manual, temp2_manual) + tuple(datos.get(f'temperatura{k}', 25.0) for k in otras),
+            (hum1_manual, hum2_manual) + tuple(datos.get(f'humedad{k}', 45.0) for k in otras),
+            (bomba1_manual, bomba2_manual) + tuple(bool(datos.get(f'bomba{k}_activa', False)) for k in otras),
+            resolucion
         )
         st.plotly_chart(fig_3d, use_container_width=True)
+        st.caption(f"Actualizado: {datetime.now().strftime('%H:%M:%S')}")
         
         # Información adicional
         st.info("🎮 **Cómo usar la simulación 3D:**\n"
@@ -943,26 +1175,24 @@ def main():
                 "• Los jets de agua azules aparecen cuando el riego está activo")
     
     with tab6:
-        crear_simulacion_arbol_threejs()
+        crear_simulacion_arbol_threejs(sistema, intervalo, cada)
     
     # Tabla de datos recientes
     st.subheader("📋 Historial Reciente (Últimas 10 lecturas)")
     df_reciente = pd.DataFrame(sistema.historial[-10:])
     df_reciente['timestamp'] = df_reciente['timestamp'].dt.strftime('%H:%M:%S')
-    df_reciente['bomba1'] = df_reciente['bomba1'].map({True: '🟢 ON', False: '🔴 OFF'})
-    df_reciente['bomba2'] = df_reciente['bomba2'].map({True: '🟢 ON', False: '🔴 OFF'})
+    column_config = {'timestamp': st.column_config.TextColumn('⏰ Hora')}
+    for k in visibles:
+        column_config[f'humedad{k}'] = st.column_config.NumberColumn(f'💧 Humedad Z{k} (%)', format="%.1f")
+    for k in visibles:
+        column_config[f'temperatura{k}'] = st.column_config.NumberColumn(f'🌡️ Temp S{k} (°C)', format="%.1f")
+    for k in visibles:
+        df_reciente[f'bomba{k}'] = df_reciente[f'bomba{k}'].map({True: '🟢 ON', False: '🔴 OFF'})
+        column_config[f'bomba{k}'] = st.column_config.TextColumn(f'🚿 Bomba Z{k}')
     
     st.dataframe(
-        df_reciente[['timestamp', 'humedad1', 'humedad2', 'temperatura1', 'temperatura2', 'bomba1', 'bomba2']],
-        column_config={
-            'timestamp': st.column_config.TextColumn('⏰ Hora'),
-            'humedad1': st.column_config.NumberColumn('💧 Humedad Z1 (%)', format="%.1f"),
-            'humedad2': st.column_config.NumberColumn('💧 Humedad Z2 (%)', format="%.1f"),
-            'temperatura1': st.column_config.NumberColumn('🌡️ Temp S1 (°C)', format="%.1f"),
-            'temperatura2': st.column_config.NumberColumn('🌡️ Temp S2 (°C)', format="%.1f"),
-            'bomba1': st.column_config.TextColumn('🚿 Bomba Z1'),
-            'bomba2': st.column_config.TextColumn('🚿 Bomba Z2'),
-        },
+        df_reciente[list(column_config)],
+        column_config=column_config,
         use_container_width=True,
         hide_index=True
     )
@@ -0,0 +1,135 @@
+"""
+Estadísticas incrementales sobre un HistorialCircular
+
+Mantiene sumas acumuladas por columna y el mínimo/máximo de la ventana
+deslizante como arreglos NumPy. Se actualizan en cada muestra
+agregada/expulsada del buffer con operaciones sobre todas las columnas a la
+vez, así ESTADISTICAS es O(1) sin importar la capacidad del historial y
+agregar una muestra no recorre las columnas en Python.
+
+Mínimo y máximo por bloques (van Herk / Gil-Werman): las secuencias se
+parten en bloques de 'capacidad' muestras. La ventana es el final del
+bloque anterior más el comienzo del actual, así su extremo es el del
+prefijo del bloque actual (se actualiza con cada muestra) combinado con el
+del sufijo del anterior (se calcula de una vez, vectorizado, al cerrar cada
+bloque). Es O(capacidad) una vez por vuelta del buffer, O(1) amortizado
+para cualquier serie (también las que solo suben o solo bajan).
+"""
+
+import numpy as np
+
+
+class EstadisticasIncrementales:
+    def __init__(self, historial, columnas_extremos=None):
+        self.historial = historial
+        self.columnas = historial.columnas
+        # Columnas con mínimo/máximo (por defecto todas; las bombas solo necesitan suma)
+        if columnas_extremos is None:
+            columnas_extremos = self.columnas
+        self.extremos = np.array([historial.indices[c] for c in columnas_extremos], dtype=np.intp)
+        self.posicion_extremo = {int(c): k for k, c in enumerate(self.extremos)}
+        self.reiniciar()
+        historial.observadores.append(self)
+
+    def reiniciar(self):
+        """Vacía todos los acumuladores"""
+        self.n = 0
+        self.sumas = np.zeros(len(self.columnas), dtype=np.float64)
+        k, capacidad = len(self.extremos), self.historial.capacidad
+        self.minimos_ventana = np.full(k, np.inf)
+        self.maximos_ventana = np.full(k, -np.inf)
+        # Extremos del bloque actual hasta la última muestra
+        self.prefijo_min = np.full(k, np.inf)
+        self.prefijo_max = np.full(k, -np.inf)
+        # Extremos del bloque anterior desde cada posición hasta su final (la fila 'capacidad' es neutra)
+        self.sufijo_min = np.full((capacidad + 1, k), np.inf)
+        self.sufijo_max = np.full((capacidad + 1, k), -np.inf)
+        self.desde_recalculo = 0
+
+    def al_agregar(self, seq, fila, expulsada):
+        """Actualiza con la muestra seq; expulsada es la fila que sale de la ventana o None"""
+        self.sumas += fila
+        if expulsada is None:
+            self.n += 1
+        else:
+            self.sumas -= expulsada
+            self.desde_recalculo += 1
+
+        capacidad = self.historial.capacidad
+        posicion = seq % capacidad
+        valores = fila[self.extremos]
+        if posicion == 0:
+            self.prefijo_min[:] = valores
+            self.prefijo_max[:] = valores
+        else:
+            np.minimum(self.prefijo_min, valores, out=self.prefijo_min)
+            np.maximum(self.prefijo_max, valores, out=self.prefijo_max)
+        self._combinar(posicion)
+        if posicion == capacidad - 1:
+            # El buffer contiene exactamente el bloque que se cierra
+            self._cerrar_bloque(self.historial._ultimos_sin_lock(capacidad)[:, self.extremos])
+
+        # Recalcular las sumas una vez por vuelta del buffer evita acumular error
+        # de redondeo (O(capacidad) cada 'capacidad' muestras = O(1) amortizado)
+        if self.desde_recalculo >= capacidad:
+            self.sumas = self.historial.datos.sum(axis=0, dtype=np.float64)
+            self.desde_recalculo = 0
+
+    def al_reconstruir(self, filas, seq_inicial):
+        """Recalcula todo a partir de la ventana completa (tras una carga por lotes)"""
+        self.reiniciar()
+        self.n = len(filas)
+        if not self.n:
+            return
+        self.sumas = filas.sum(axis=0, dtype=np.float64)
+        capacidad = self.historial.capacidad
+        extremos = filas[:, self.extremos].astype(np.float64)
+        posicion = (seq_inicial + self.n - 1) % capacidad
+        # Filas del bloque actual y, antes, el final del bloque anterior
+        actual, anterior = extremos[-(posicion + 1):], extremos[:-(posicion + 1)]
+        self.prefijo_min[:] = actual.min(axis=0)
+        self.prefijo_max[:] = actual.max(axis=0)
+        if len(anterior):
+            self.sufijo_min[capacidad - len(anterior):capacidad] = np.minimum.accumulate(anterior[::-1])[::-1]
+            self.sufijo_max[capacidad - len(anterior):capacidad] = np.maximum.accumulate(anterior[::-1])[::-1]
+        self._combinar(posicion)
+        if posicion == capacidad - 1:
+            self._cerrar_bloque(actual)
+
+    def _combinar(self, posicion):
+        """Extremos de la ventana: prefijo del bloque actual y sufijo del anterior desde posicion + 1"""
+        np.minimum(self.prefijo_min, self.sufijo_min[posicion + 1], out=self.minimos_ventana)
+        np.maximum(self.prefijo_max, self.sufijo_max[posicion + 1], out=self.maximos_ventana)
+
+    def _cerrar_bloque(self, bloque):
+        """Guarda los extremos de cada sufijo del bloque completo (capacidad x columnas)"""
+        capacidad = self.historial.capacidad
+        self.sufijo_min[:capacidad] = np.minimum.accumulate(bloque[::-1], axis=0)[::-1]
+        self.sufijo_max[:capacidad] = np.maximum.accumulate(bloque[::-1], axis=0)[::-1]
+
+    def promedios(self):
+        """Promedio de todas las columnas (en el orden del historial)"""
+        return self.sumas / self.n if self.n else np.zeros_like(self.sumas)
+
+    def promedio(self, columna):
+        return self.sumas[self.historial.indices[columna]] / self.n if self.n else 0.0
+
+    def minimos(self):
+        """Mínimo de cada columna con extremos (en el orden de columnas_extremos)"""
+        return self.minimos_ventana.copy() if self.n else np.zeros(len(self.extremos))
+
+    def maximos(self):
+        """Máximo de cada columna con extremos (en el orden de columnas_extremos)"""
+        return self.maximos_ventana.copy() if self.n else np.zeros(len(self.extremos))
+
+    def minimo(self, columna):
+        k = self.posicion_extremo[self.historial.indices[columna]]
+        return float(self.minimos_ventana[k]) if self.n else 0.0
+
+    def maximo(self, columna):
+        k = self.posicion_extremo[self.historial.indices[columna]]
+        return float(self.maximos_ventana[k]) if self.n else 0.0
+
+    def porcentaje(self, columna):
+        """Porcentaje de muestras a 1 (tiempo de bomba encendida)"""
+        return self.promedio(columna) * 100
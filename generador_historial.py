@@ -0,0 +1,78 @@
+"""
+Generador vectorizado de historiales sintéticos
+
+Produce historiales de cualquier longitud y número de zonas con ciclo
+día/noche y ruido, en operaciones NumPy sobre todo el arreglo (sin bucles
+por muestra). Con la misma semilla el resultado es idéntico. Lo usan el
+simulador (historial inicial), el dashboard (modo demostración) y los
+benchmarks.
+"""
+
+import numpy as np
+
+# Parámetros de las dos zonas originales (las demás se sortean alrededor de estos valores)
+TEMP_BASE = [22.0, 24.0]
+TEMP_AMPLITUD = [8.0, 6.0]
+HUM_BASE = [50.0, 45.0]
+HUM_AMPLITUD = [15.0, 12.0]
+
+# Límites realistas
+LIMITES_TEMP = (15.0, 40.0)
+LIMITES_TEMP_PLANTA = (12.0, 35.0)
+LIMITES_HUMEDAD = (10.0, 90.0)
+LIMITES_HUMEDAD_RELATIVA = (30.0, 95.0)
+
+
+def parametros_zonas(zonas, rng):
+    """Base y amplitud de temperatura/humedad por zona"""
+    extra = max(0, zonas - len(TEMP_BASE))
+    temp_base = np.concatenate([TEMP_BASE, rng.uniform(21.0, 25.0, extra)])[:zonas]
+    temp_amp = np.concatenate([TEMP_AMPLITUD, rng.uniform(5.0, 9.0, extra)])[:zonas]
+    hum_base = np.concatenate([HUM_BASE, rng.uniform(42.0, 52.0, extra)])[:zonas]
+    hum_amp = np.concatenate([HUM_AMPLITUD, rng.uniform(10.0, 16.0, extra)])[:zonas]
+    return temp_base, temp_amp, hum_base, hum_amp
+
+
+def generar_historial(n, zonas=2, semilla=None, intervalo_min=10.0, hora_inicio=0.0,
+                      umbral_humedad=30.0, dtype=np.float64):
+    """Genera n muestras para 'zonas' zonas
+
+    Devuelve un diccionario de arreglos:
+        'hora'              (n,)        hora del día de cada muestra
+        'humedad'           (n, zonas)  humedad del suelo (%)
+        'temperatura'       (n, zonas)  temperatura ambiente (°C)
+        'bombas'            (n, zonas)  bomba encendida (humedad < umbral)
+        'temp_planta'       (n,)        temperatura de la planta (°C)
+        'humedad_relativa'  (n,)        humedad relativa del entorno (%)
+    Los valores analógicos vienen redondeados a 0.1.
+    """
+    rng = np.random.default_rng(semilla)
+    temp_base, temp_amp, hum_base, hum_amp = parametros_zonas(zonas, rng)
+
+    # Ciclo día/noche
+    hora = (hora_inicio + np.arange(n, dtype=np.float64) * intervalo_min / 60.0) % 24.0
+    factor_dia = np.sin(hora * np.pi / 12.0)[:, None]
+
+    # Temperatura ambiente y humedad del suelo (inversa a la temperatura)
+    temperatura = temp_base + factor_dia * temp_amp + rng.uniform(-2, 2, (n, zonas))
+    humedad = hum_base - factor_dia * hum_amp + rng.uniform(-5, 5, (n, zonas))
+
+    # Temperatura de planta (ligeramente más baja que el ambiente)
+    temp_planta = temperatura.mean(axis=1) - 1.5 + rng.uniform(-1, 1, n)
+
+    # Humedad relativa del entorno (mayor en la noche, menor en el día)
+    humedad_relativa = 70.0 - factor_dia[:, 0] * 25.0 + rng.uniform(-8, 8, n)
+
+    temperatura = np.round(np.clip(temperatura, *LIMITES_TEMP), 1).astype(dtype, copy=False)
+    humedad = np.round(np.clip(humedad, *LIMITES_HUMEDAD), 1).astype(dtype, copy=False)
+    temp_planta = np.round(np.clip(temp_planta, *LIMITES_TEMP_PLANTA), 1).astype(dtype, copy=False)
+    humedad_relativa = np.round(np.clip(humedad_relativa, *LIMITES_HUMEDAD_RELATIVA), 1).astype(dtype, copy=False)
+
+    return {
+        'hora': hora,
+        'humedad': humedad,
+        'temperatura': temperatura,
+        'bombas': humedad < umbral_humedad,
+        'temp_planta': temp_planta,
+        'humedad_relativa': humedad_relativa,
+    }
@@ -0,0 +1,149 @@
+"""
+Buffer circular de historial con columnas por sensor
+
+Equivalente en Python a HistorialData de sistema_riego.ino: un bloque de
+memoria de capacidad fija, una columna por sensor e indice_actual que avanza
+en módulo la capacidad. Agregar una muestra es O(1) y no copia el resto
+del historial.
+
+Los observadores (p. ej. EstadisticasIncrementales) reciben cada muestra
+agregada junto con la que expulsa, dentro del mismo lock.
+
+Con sitios=S cada fila es una matriz S x columnas (simulador federado):
+todos los sitios avanzan juntos, así agregar el tick de todos es una sola
+asignación y cada sitio se lee con el parámetro sitio de ultimos/instantanea.
+
+Cada muestra tiene un número de secuencia (0, 1, ... desde el inicio; total
+es el de la siguiente). desde(seq) devuelve las posteriores a seq que siguen
+en el buffer, para que los clientes pidan solo lo nuevo, junto con la hora
+(simulada) de cada una. arranque identifica la numeración: es distinto en
+cada buffer creado, así un cliente detecta que el simulador se reinició
+aunque el nuevo total ya supere la secuencia que tenía guardada.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+
+class HistorialCircular:
+    def __init__(self, columnas, capacidad=144, dtype=np.float32, sitios=None):
+        if capacidad <= 0:
+            raise ValueError("La capacidad debe ser positiva")
+        self.columnas = list(columnas)
+        self.indices = {nombre: i for i, nombre in enumerate(self.columnas)}
+        self.capacidad = capacidad
+        self.sitios = sitios
+        forma = (capacidad, len(self.columnas)) if sitios is None else (capacidad, sitios, len(self.columnas))
+        self.datos = np.zeros(forma, dtype=dtype)
+        self.tiempos = np.full(capacidad, np.nan)   # Hora de cada fila (segundos desde epoch, NaN = sin hora)
+        self.indice_actual = -1          # Última fila escrita (como en el .ino)
+        self.historial_completo = False
+        self.total = 0                   # Muestras agregadas desde el inicio
+        self.arranque = int.from_bytes(os.urandom(4), 'big')   # Identifica esta numeración
+        self.lock = threading.Lock()
+        self.observadores = []
+
+    def __len__(self):
+        return self.capacidad if self.historial_completo else self.indice_actual + 1
+
+    def agregar(self, valores, tiempo=np.nan):
+        """Agrega una muestra (valores en el orden de las columnas) tomada a la hora 'tiempo'"""
+        with self.lock:
+            self.indice_actual = (self.indice_actual + 1) % self.capacidad
+            # La fila expulsada solo se copia si algún observador la necesita
+            # (el simulador federado sin estadísticas agrega sitios x columnas por tick)
+            expulsada = (self.datos[self.indice_actual].copy()
+                         if self.historial_completo and self.observadores else None)
+            self.datos[self.indice_actual] = valores
+            self.tiempos[self.indice_actual] = tiempo
+            if self.indice_actual == self.capacidad - 1:
+                self.historial_completo = True
+            for observador in self.observadores:
+                observador.al_agregar(self.total, self.datos[self.indice_actual], expulsada)
+            self.total += 1
+
+    def agregar_lote(self, filas, tiempos=None):
+        """Agrega varias muestras de una vez (matriz filas x columnas y, opcionalmente, la hora de cada una)"""
+        filas = np.asarray(filas, dtype=self.datos.dtype)
+        if len(filas) == 0:
+            return
+        tiempos = np.full(len(filas), np.nan) if tiempos is None else np.asarray(tiempos, dtype=np.float64)
+        with self.lock:
+            total = self.total + len(filas)
+            # Si el lote no cabe, solo sobreviven las últimas 'capacidad' filas
+            if len(filas) > self.capacidad:
+                filas = filas[-self.capacidad:]
+                tiempos = tiempos[-self.capacidad:]
+            inicio = (self.indice_actual + 1) % self.capacidad
+            posiciones = (inicio + np.arange(len(filas))) % self.capacidad
+            self.datos[posiciones] = filas
+            self.tiempos[posiciones] = tiempos
+            nuevo_indice = int(posiciones[-1])
+            if total >= self.capacidad:
+                self.historial_completo = True
+            self.indice_actual = nuevo_indice
+            self.total = total
+            if self.observadores:
+                ventana = self._ultimos_sin_lock(len(self))
+                for observador in self.observadores:
+                    observador.al_reconstruir(ventana, self.total - len(ventana))
+
+    def ultimos(self, n=None, sitio=None):
+        """Devuelve una copia de las últimas n filas en orden cronológico (de un sitio si se indica)"""
+        with self.lock:
+            disponibles = len(self)
+            n = disponibles if n is None else max(0, min(n, disponibles))
+            return self._ultimos_sin_lock(n, sitio)
+
+    def instantanea(self, n=None, sitio=None):
+        """Como ultimos(n) pero devuelve también el total agregado, leídos de forma consistente
+
+        La última fila devuelta es la muestra número total - 1 (numeración desde 0).
+        """
+        with self.lock:
+            disponibles = len(self)
+            n = disponibles if n is None else max(0, min(n, disponibles))
+            return self._ultimos_sin_lock(n, sitio), self.total
+
+    def desde(self, seq, n=None, sitio=None, arranque=None):
+        """Muestras con número de secuencia > seq que siguen en el buffer (a lo sumo las últimas n)
+
+        Devuelve (filas, tiempos, primera, total): tiempos es la hora de
+        cada fila y primera el número de secuencia de la primera. Si
+        primera > seq + 1 faltan muestras (el buffer dio la vuelta o se
+        pidieron más de n); un seq de otro arranque (arranque distinto del
+        de este buffer, o mayor que el último) devuelve todo el buffer.
+        """
+        with self.lock:
+            disponibles = len(self)
+            if seq >= self.total or (arranque is not None and arranque != self.arranque):
+                seq = -1
+            primera = max(seq + 1, self.total - disponibles)
+            if n is not None:
+                primera = max(primera, self.total - max(0, n))
+            n = self.total - primera
+            filas = self._ultimos_sin_lock(n, sitio)
+            return filas, self._ultimos_sin_lock(n, datos=self.tiempos), primera, self.total
+
+    def _ultimos_sin_lock(self, n, sitio=None, datos=None):
+        if datos is None:
+            datos = self.datos if sitio is None else self.datos[:, sitio]
+        fin = self.indice_actual + 1
+        inicio = fin - n
+        if inicio >= 0:
+            return datos[inicio:fin].copy()
+        return np.concatenate((datos[inicio:], datos[:fin]))
+
+    def columna(self, nombre, n=None):
+        """Devuelve las últimas n muestras de una columna en orden cronológico"""
+        return self.ultimos(n)[:, self.indices[nombre]]
+
+    def ultimo(self):
+        """Devuelve la fila más reciente como diccionario"""
+        with self.lock:
+            if self.indice_actual < 0:
+                return {}
+            fila = self.datos[self.indice_actual]
+            return {nombre: float(fila[i]) for i, nombre in enumerate(self.columnas)}
@@ -0,0 +1,136 @@
+"""
+Historial columnar del lado del cliente
+
+Una columna NumPy por sensor, en orden cronológico y contigua en memoria,
+para construir DataFrames/gráficos sin recorrer filas en Python. Las
+muestras nuevas se agregan al final y, al superar la capacidad, se
+descartan las más antiguas. Internamente reserva hasta el doble de la
+capacidad (empieza con RESERVA_INICIAL filas y duplica al llenarse) y solo
+compacta cuando se llena, así agregar k muestras cuesta O(k) amortizado y
+un historial corto no reserva la capacidad completa.
+
+ultima_seq guarda el número de secuencia (del simulador) de la última
+muestra recibida, para pedir solo las nuevas, y arranque el identificador
+de la ejecución del simulador que la numeró. revision cambia con cada
+modificación y no se repite en el proceso, así sirve de clave para cachear
+lo que se calcula a partir del historial (figuras del dashboard).
+
+columna() devuelve las últimas muestras de un sensor como vista sin copia
+(gráficos ASCII, estadísticas) y historial[i] / historial[-10:] dan filas
+RegistroHistorial con acceso por nombre, para el código que recorre filas.
+"""
+
+import itertools
+
+import numpy as np
+
+_revisiones = itertools.count()
+
+RESERVA_INICIAL = 1024
+
+
+def nueva_revision():
+    """Identificador de versión de datos único en el proceso"""
+    return next(_revisiones)
+
+
+class RegistroHistorial:
+    """Fila del historial con acceso por nombre (h['humedad1'], h.get('temp_planta', 0))
+
+    No copia los valores: los lee de las columnas al accederlos, así que
+    vale mientras el historial no reciba muestras nuevas.
+    """
+    __slots__ = ('buffers', 'posicion')
+
+    def __init__(self, buffers, posicion):
+        self.buffers = buffers
+        self.posicion = posicion
+
+    def __getitem__(self, nombre):
+        return self.buffers[nombre][self.posicion].item()
+
+    def __contains__(self, nombre):
+        return nombre in self.buffers
+
+    def get(self, nombre, defecto=None):
+        return self[nombre] if nombre in self.buffers else defecto
+
+    def keys(self):
+        return self.buffers.keys()
+
+
+class HistorialColumnar:
+    def __init__(self, columnas, capacidad=10_000):
+        # columnas: {nombre: dtype}
+        self.tipos = dict(columnas)
+        self.capacidad = capacidad
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Vacía el historial"""
+        reserva = min(2 * self.capacidad, RESERVA_INICIAL)
+        self.buffers = {nombre: np.empty(reserva, dtype=tipo) for nombre, tipo in self.tipos.items()}
+        self.inicio = 0
+        self.fin = 0
+        self.ultima_seq = -1
+        self.arranque = None
+        self.revision = nueva_revision()
+
+    def __len__(self):
+        return self.fin - self.inicio
+
+    def __getitem__(self, indice):
+        """Fila i (RegistroHistorial) o, con un slice, lista de filas"""
+        posiciones = range(self.inicio, self.fin)
+        if isinstance(indice, slice):
+            return [RegistroHistorial(self.buffers, p) for p in posiciones[indice]]
+        return RegistroHistorial(self.buffers, posiciones[indice])
+
+    def __iter__(self):
+        for posicion in range(self.inicio, self.fin):
+            yield RegistroHistorial(self.buffers, posicion)
+
+    @property
+    def nbytes(self):
+        """Memoria reservada por las columnas (incluye el espacio para agregar)"""
+        return sum(buffer.nbytes for buffer in self.buffers.values())
+
+    def agregar(self, columnas, seq_final=None):
+        """Agrega muestras nuevas ({nombre: array}) al final en orden cronológico"""
+        n = len(next(iter(columnas.values())))
+        if n == 0:
+            return
+        if n > self.capacidad:
+            columnas = {k: v[-self.capacidad:] for k, v in columnas.items()}
+            self.inicio = self.fin = 0
+            n = self.capacidad
+
+        # Sin espacio al final: mover las muestras que sobreviven al principio
+        # de un buffer más grande (hasta el doble de la capacidad) o del mismo
+        tamano = len(next(iter(self.buffers.values())))
+        if self.fin + n > tamano:
+            conservar = min(len(self), self.capacidad - n)
+            nuevo = min(2 * self.capacidad, max(2 * tamano, conservar + n))
+            for nombre, buffer in self.buffers.items():
+                destino = buffer if nuevo == tamano else np.empty(nuevo, dtype=buffer.dtype)
+                destino[:conservar] = buffer[self.fin - conservar:self.fin]
+                self.buffers[nombre] = destino
+            self.inicio, self.fin = 0, conservar
+
+        for nombre, buffer in self.buffers.items():
+            buffer[self.fin:self.fin + n] = columnas[nombre]
+        self.fin += n
+        if len(self) > self.capacidad:
+            self.inicio = self.fin - self.capacidad
+        self.revision = nueva_revision()
+        if seq_final is not None:
+            self.ultima_seq = seq_final
+
+    def vista(self):
+        """Columnas actuales como vistas (sin copia) en orden cronológico"""
+        return {nombre: buffer[self.inicio:self.fin] for nombre, buffer in self.buffers.items()}
+
+    def columna(self, nombre, ultimas=None):
+        """Una columna como vista (sin copia); con 'ultimas', solo las últimas n muestras"""
+        inicio = self.inicio if ultimas is None else max(self.inicio, self.fin - ultimas)
+        return self.buffers[nombre][inicio:self.fin]
@@ -0,0 +1,130 @@
+"""
+Historial en SQLite (opcional, solo biblioteca estándar)
+
+Una tabla 'muestras' con la hora simulada indexada y una columna REAL por
+sensor (mismo orden que columnas_historial). Sirve de almacén del
+simulador (--sqlite) con la misma interfaz que AlmacenSegmentos:
+agregar_lote, ultimos, rango y agrupar.
+
+agrupar() resume un rango en cubetas de tiempo con mínimo, promedio y
+máximo calculados en SQL (GROUP BY sobre el índice de tiempo), así un mes
+de muestras se responde con unas cientos de filas en lugar de enviar las
+muestras crudas.
+"""
+
+import sqlite3
+import threading
+
+import numpy as np
+
+
+class HistorialSQLite:
+    def __init__(self, ruta, columnas):
+        self.ruta = ruta
+        self.columnas = list(columnas)
+        self.lock = threading.Lock()
+        # Un hilo simula y otros atienden clientes: la conexión se comparte con el lock
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+
+        definicion = ", ".join(f'"{c}" REAL' for c in self.columnas)
+        # Tabla agrupada por tiempo (clave primaria, WITHOUT ROWID): un rango se lee
+        # en orden del disco en lugar de saltar del índice a cada fila
+        with self.conexion:
+            self.conexion.execute(f"CREATE TABLE IF NOT EXISTS muestras (tiempo REAL PRIMARY KEY, {definicion}) "
+                                  f"WITHOUT ROWID")
+        existentes = [fila[1] for fila in self.conexion.execute("PRAGMA table_info(muestras)")][1:]
+        if existentes != self.columnas:
+            raise ValueError(f"La base {ruta} tiene otras columnas ({len(existentes)} sensores)")
+
+        self.lista_columnas = ", ".join(f'"{c}"' for c in self.columnas)
+        # Un tiempo repetido (p. ej. reloj sin avanzar tras un reinicio) reemplaza la
+        # muestra anterior en lugar de romper el hilo que simula con IntegrityError
+        self.insertar = (f"INSERT OR REPLACE INTO muestras (tiempo, {self.lista_columnas}) "
+                         f"VALUES ({', '.join('?' * (len(self.columnas) + 1))})")
+        self.filas = self.conexion.execute("SELECT COUNT(*) FROM muestras").fetchone()[0]
+
+    def __len__(self):
+        return self.filas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def agregar(self, tiempo, fila):
+        """Agrega una muestra (fila en el orden de las columnas)"""
+        self.agregar_lote([tiempo], np.asarray(fila)[None, :])
+
+    def agregar_lote(self, tiempos, filas):
+        """Agrega varias muestras en una sola transacción (un tiempo ya guardado se reemplaza)"""
+        filas = np.column_stack([np.asarray(tiempos, dtype=np.float64), np.asarray(filas, dtype=np.float64)])
+        if not len(filas):
+            return
+        contar = "SELECT COUNT(*) FROM muestras WHERE tiempo BETWEEN ? AND ?"
+        limites = (filas[:, 0].min(), filas[:, 0].max())
+        with self.lock, self.conexion:
+            # Los reemplazos no suman filas: se cuentan las del rango antes y después
+            antes = self.conexion.execute(contar, limites).fetchone()[0]
+            self.conexion.executemany(self.insertar, filas.tolist())
+            self.filas += self.conexion.execute(contar, limites).fetchone()[0] - antes
+
+    def _consultar(self, sql, parametros=()):
+        with self.lock:
+            return self.conexion.execute(sql, parametros).fetchall()
+
+    def _como_arreglos(self, filas, n_columnas):
+        datos = np.array(filas, dtype=np.float64).reshape(len(filas), n_columnas + 1)
+        return datos[:, 0], datos[:, 1:]
+
+    def ultimos(self, n, columnas=None):
+        """Últimas n muestras en orden cronológico: (tiempos, matriz filas x columnas)"""
+        columnas = self.columnas if columnas is None else list(columnas)
+        lista = ", ".join(f'"{c}"' for c in columnas)
+        filas = self._consultar(f"SELECT tiempo, {lista} FROM muestras ORDER BY tiempo DESC LIMIT ?", (n,))
+        return self._como_arreglos(filas[::-1], len(columnas))
+
+    def rango(self, inicio, fin, columnas=None):
+        """Muestras con inicio <= tiempo < fin: (tiempos, matriz filas x columnas)"""
+        columnas = self.columnas if columnas is None else list(columnas)
+        lista = ", ".join(f'"{c}"' for c in columnas)
+        filas = self._consultar(f"SELECT tiempo, {lista} FROM muestras WHERE tiempo >= ? AND tiempo < ? "
+                                f"ORDER BY tiempo", (inicio, fin))
+        return self._como_arreglos(filas, len(columnas))
+
+    def agrupar(self, inicio, fin, cubeta, columnas=None):
+        """Resumen por cubetas de 'cubeta' segundos entre inicio y fin (solo cubetas con muestras)
+
+        Las cubetas empiezan en múltiplos de 'cubeta'. Devuelve un diccionario con 'tiempo' (inicio de cada cubeta),
+        'muestras' y matrices cubetas x columnas 'minimo', 'promedio' y
+        'maximo'.
+        """
+        columnas = self.columnas if columnas is None else list(columnas)
+        agregados = ", ".join(f'MIN("{c}"), AVG("{c}"), MAX("{c}")' for c in columnas)
+        filas = self._consultar(
+            f"SELECT CAST(tiempo / ? AS INTEGER) AS cubeta, COUNT(*), {agregados} "
+            f"FROM muestras WHERE tiempo >= ? AND tiempo < ? GROUP BY cubeta ORDER BY cubeta",
+            (cubeta, inicio, fin)
+        )
+        datos = np.array(filas, dtype=np.float64).reshape(len(filas), 2 + 3 * len(columnas))
+        return {
+            'tiempo': datos[:, 0] * cubeta,
+            'muestras': datos[:, 1].astype(np.int64),
+            'minimo': datos[:, 2::3],
+            'promedio': datos[:, 3::3],
+            'maximo': datos[:, 4::3],
+        }
+
+    @property
+    def primer_tiempo(self):
+        return self._consultar("SELECT MIN(tiempo) FROM muestras")[0][0]
+
+    @property
+    def ultimo_tiempo(self):
+        return self._consultar("SELECT MAX(tiempo) FROM muestras")[0][0]
+
+    def cerrar(self):
+        with self.lock:
+            self.conexion.close()
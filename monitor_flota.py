@@ -0,0 +1,181 @@
+"""
+Monitor de flota sin interfaz
+
+Consulta muchos simuladores (o gateways) a la vez con sondear_flota() de
+controlador_async.py y muestra una sola tabla con el estado actual, las
+estadísticas de 24 horas y la latencia de cada sitio, más el throughput del
+sondeo (sitios por segundo). Con --intervalo repite el sondeo reutilizando
+las conexiones.
+
+Un sitio es host:port o host:port/sitio (un sitio de simulador_federado.py).
+
+Uso:
+    python3 monitor_flota.py localhost:9999 10.0.0.2:9999
+    python3 monitor_flota.py --archivo sitios.txt --intervalo 10
+    python3 monitor_flota.py --federado localhost:9999 --sitios 1000 --max-filas 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from controlador_async import CONCURRENCIA, TIMEOUT, cerrar_conexiones, sondear_flota
+
+PUERTO = 9999
+HUMEDAD_BAJA = 30.0     # % de humedad de suelo que se marca como alerta
+
+
+def parsear_sitio(texto):
+    """'host', 'host:port' o 'host:port/sitio' -> (host, port, sitio)"""
+    direccion, _, sitio = texto.strip().partition('/')
+    host, _, port = direccion.rpartition(':') if ':' in direccion else (direccion, '', '')
+    return host, int(port) if port else PUERTO, int(sitio) if sitio else None
+
+
+def leer_sitios(args):
+    """Sitios de los argumentos, del archivo (uno por línea, # comenta) y del simulador federado"""
+    sitios = [parsear_sitio(s) for s in args.sitios]
+    if args.archivo:
+        with open(args.archivo) as f:
+            sitios += [parsear_sitio(linea) for linea in (l.split('#')[0] for l in f) if linea.strip()]
+    if args.federado:
+        host, port, _ = parsear_sitio(args.federado)
+        sitios += [(host, port, k) for k in range(args.cantidad)]
+    return sitios
+
+
+def resumir_sitio(resultado):
+    """Promedios por zona del estado y las estadísticas de un resultado de sondear_sitio"""
+    datos, stats, zonas = resultado['datos'], resultado['estadisticas'], range(1, resultado['zonas'] + 1)
+
+    def promedio(d, clave):
+        return statistics.fmean(d[clave.format(k)] for k in zonas) if zonas else 0.0
+
+    return {
+        'humedad': promedio(datos, 'humedad{}'),
+        'humedad_min': min((datos[f'humedad{k}'] for k in zonas), default=0.0),
+        'temperatura': promedio(datos, 'temperatura{}'),
+        'bombas': sum(datos[f'bomba{k}_activa'] for k in zonas),
+        'hum_24h': promedio(stats, 'hum{}_prom') if stats else None,
+        'riego_24h': promedio(stats, 'bomba{}_tiempo') if stats else None,
+    }
+
+
+def validar_resultados(resultados):
+    """Marca como caídos los sitios cuya respuesta no alcanza para resumirlos"""
+    for r in resultados:
+        if r['ok']:
+            try:
+                resumir_sitio(r)
+            except (KeyError, ValueError, TypeError) as e:
+                r.update(ok=False, error=f"respuesta incompleta ({e!r})")
+    return resultados
+
+
+def nombre_sitio(resultado):
+    sitio = "" if resultado['sitio'] is None else f"/{resultado['sitio']}"
+    return f"{resultado['host']}:{resultado['port']}{sitio}"
+
+
+def percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else 0.0
+
+
+def mostrar_tabla(resultados, duracion, ciclo, max_filas):
+    """Tabla por sitio (primero los que fallaron) y resumen de la flota"""
+    correctos = [r for r in resultados if r['ok']]
+    fallidos = [r for r in resultados if not r['ok']]
+    filas = fallidos + correctos
+    if max_filas:
+        filas = filas[:max_filas]
+
+    print("=" * 110)
+    print(f"🌐 MONITOR DE FLOTA - ciclo {ciclo} - {time.strftime('%H:%M:%S')}")
+    print("=" * 110)
+    print(f"{'Sitio':28s} | {'ms':>7s} | {'Zonas':>5s} | {'💧Hum':>6s} | {'Mín':>5s} | {'🌡️Temp':>6s} | "
+          f"{'🚿ON':>5s} | {'Hum24h':>6s} | {'Riego24h':>8s}")
+    print("-" * 110)
+    for r in filas:
+        if not r['ok']:
+            print(f"{nombre_sitio(r):28s} | {r['latencia']:7.1f} | ❌ {r['error']}")
+            continue
+        s = resumir_sitio(r)
+        alerta = " ⚠️" if s['humedad_min'] < HUMEDAD_BAJA else ""
+        hum_24h = f"{s['hum_24h']:6.1f}" if s['hum_24h'] is not None else f"{'-':>6s}"
+        riego_24h = f"{s['riego_24h']:7.1f}%" if s['riego_24h'] is not None else f"{'-':>8s}"
+        print(f"{nombre_sitio(r):28s} | {r['latencia']:7.1f} | {r['zonas']:5d} | {s['humedad']:6.1f} | "
+              f"{s['humedad_min']:5.1f} | {s['temperatura']:6.1f} | {s['bombas']:2d}/{r['zonas']:<2d} | "
+              f"{hum_24h} | {riego_24h}{alerta}")
+    if len(filas) < len(resultados):
+        print(f"... y {len(resultados) - len(filas)} sitios más (--max-filas 0 para verlos todos)")
+
+    latencias = sorted(r['latencia'] for r in correctos)
+    resumenes = [resumir_sitio(r) for r in correctos]
+    print("-" * 110)
+    print(f"✅ {len(correctos)}/{len(resultados)} sitios en {duracion:.2f} s "
+          f"({len(resultados) / duracion:,.0f} sitios/s) | latencia p50 {percentil(latencias, 0.5):.1f} ms, "
+          f"p95 {percentil(latencias, 0.95):.1f} ms, máx {percentil(latencias, 1.0):.1f} ms")
+    if resumenes:
+        print(f"💧 Humedad media {statistics.fmean(s['humedad'] for s in resumenes):.1f}% | "
+              f"🚿 Bombas encendidas {sum(s['bombas'] for s in resumenes)} | "
+              f"⚠️ Sitios con humedad < {HUMEDAD_BAJA:.0f}%: {sum(s['humedad_min'] < HUMEDAD_BAJA for s in resumenes)}")
+    print()
+
+
+async def monitorear(sitios, args):
+    """Sondea la flota una vez o cada args.intervalo segundos"""
+    conexiones = {} if args.intervalo else None
+    ciclo = 0
+    try:
+        while True:
+            ciclo += 1
+            inicio = time.perf_counter()
+            try:
+                resultados = validar_resultados(await sondear_flota(
+                    sitios, args.concurrencia, args.binario, args.timeout, conexiones=conexiones
+                ))
+                duracion = time.perf_counter() - inicio
+                mostrar_tabla(resultados, duracion, ciclo, args.max_filas)
+            except Exception as e:
+                # Un fallo inesperado no detiene la supervisión: se reintenta en el próximo ciclo
+                duracion = time.perf_counter() - inicio
+                print(f"❌ Error en el ciclo {ciclo}: {e!r}")
+                if conexiones:
+                    await cerrar_conexiones(conexiones)
+            if not args.intervalo or ciclo == args.ciclos:
+                return
+            await asyncio.sleep(max(0.0, args.intervalo - duracion))
+    finally:
+        if conexiones:
+            await cerrar_conexiones(conexiones)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor de flota: sondea muchos simuladores a la vez")
+    parser.add_argument('sitios', nargs='*', help='host:port o host:port/sitio')
+    parser.add_argument('--archivo', help='Archivo con un sitio por línea')
+    parser.add_argument('--federado', help='host:port de un simulador federado (sitios 0..--sitios-1)')
+    parser.add_argument('--sitios', dest='cantidad', type=int, default=100,
+                        help='Sitios del simulador federado (con --federado)')
+    parser.add_argument('--concurrencia', type=int, default=CONCURRENCIA)
+    parser.add_argument('--timeout', type=float, default=TIMEOUT)
+    parser.add_argument('--binario', action='store_true', help='Negociar FORMATO BINARIO')
+    parser.add_argument('--intervalo', type=float, default=0.0,
+                        help='Repetir el sondeo cada N segundos con conexiones persistentes (0 = una vez)')
+    parser.add_argument('--ciclos', type=int, default=0, help='Ciclos con --intervalo (0 = sin límite)')
+    parser.add_argument('--max-filas', type=int, default=50, help='Filas de la tabla (0 = todas)')
+    args = parser.parse_args()
+
+    sitios = leer_sitios(args)
+    if not sitios:
+        parser.error("indicar al menos un sitio (argumentos, --archivo o --federado)")
+
+    try:
+        asyncio.run(monitorear(sitios, args))
+    except KeyboardInterrupt:
+        print("👋 Monitor detenido")
+
+
+if __name__ == "__main__":
+    main()
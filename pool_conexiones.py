@@ -0,0 +1,135 @@
+"""
+Pool de conexiones persistentes a uno o varios simuladores
+
+Pensado para vivir una sola vez por proceso (st.cache_resource en el
+dashboard): las conexiones con tramas se reutilizan entre reruns, se
+verifican con STATUS si llevan tiempo inactivas y, si un simulador está
+caído, los reintentos se espacian con backoff exponencial para que ningún
+rerun quede bloqueado esperando un connect.
+"""
+
+import contextlib
+import threading
+import time
+
+from controlador_corregido import ControladorSimple
+from protocolo import ErrorProtocolo
+
+
+class EntradaPool:
+    """Estado de la conexión a un simulador (host, port)"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.controlador = None
+        # Una petición a la vez por conexión; reentrante porque marcar_caida
+        # se llama también desde dentro de conexion()
+        self.lock = threading.RLock()
+        self.fallos = 0
+        self.proximo_intento = 0.0
+        self.ultimo_uso = 0.0
+        self.ultimo_error = None
+
+    @property
+    def conectado(self):
+        return self.controlador is not None and self.controlador.connected
+
+
+class PoolConexiones:
+    def __init__(self, timeout=0.5, intervalo_salud=10.0, backoff_inicial=1.0, backoff_max=30.0, binario=False):
+        self.timeout = timeout
+        self.intervalo_salud = intervalo_salud
+        self.backoff_inicial = backoff_inicial
+        self.backoff_max = backoff_max
+        self.binario = binario
+        self.entradas = {}
+        self.lock = threading.Lock()
+
+    def entrada(self, host, port):
+        with self.lock:
+            clave = (host, int(port))
+            if clave not in self.entradas:
+                self.entradas[clave] = EntradaPool(host, int(port))
+            return self.entradas[clave]
+
+    def _abrir(self, entrada):
+        """Intenta conectar respetando el backoff; devuelve True si quedó conectada"""
+        ahora = time.monotonic()
+        if ahora < entrada.proximo_intento:
+            return False
+        controlador = ControladorSimple(entrada.host, entrada.port, binario=self.binario, timeout=self.timeout)
+        try:
+            controlador.abrir_conexion()
+        except (OSError, ErrorProtocolo) as e:
+            if hasattr(controlador, 'socket'):
+                controlador.socket.close()
+            self._registrar_fallo(entrada, e)
+            return False
+        entrada.controlador = controlador
+        entrada.fallos = 0
+        entrada.ultimo_uso = ahora
+        entrada.ultimo_error = None
+        return True
+
+    def _registrar_fallo(self, entrada, error):
+        """Cierra la conexión y programa el siguiente intento con backoff exponencial"""
+        if entrada.controlador is not None:
+            entrada.controlador.disconnect()
+            entrada.controlador = None
+        entrada.fallos += 1
+        espera = min(self.backoff_max, self.backoff_inicial * (2 ** (entrada.fallos - 1)))
+        entrada.proximo_intento = time.monotonic() + espera
+        entrada.ultimo_error = str(error)
+
+    def _saludable(self, entrada):
+        """Verifica con STATUS las conexiones inactivas más de intervalo_salud"""
+        if time.monotonic() - entrada.ultimo_uso < self.intervalo_salud:
+            return True
+        if entrada.controlador.obtener_estado():
+            entrada.ultimo_uso = time.monotonic()
+            return True
+        # Conexión muerta (p. ej. simulador reiniciado): se reintenta enseguida sin backoff
+        entrada.controlador.disconnect()
+        entrada.controlador = None
+        return False
+
+    @contextlib.contextmanager
+    def conexion(self, host, port):
+        """Presta el ControladorSimple conectado a (host, port), o None si no está disponible
+
+        Si el bloque lanza una excepción de red, la conexión se descarta y se
+        aplica backoff antes de reconectar.
+        """
+        entrada = self.entrada(host, port)
+        with entrada.lock:
+            if not (entrada.conectado and self._saludable(entrada)):
+                self._abrir(entrada)
+            if not entrada.conectado:
+                yield None
+                return
+            try:
+                yield entrada.controlador
+            except OSError as e:
+                self._registrar_fallo(entrada, e)
+                raise
+            else:
+                entrada.ultimo_uso = time.monotonic()
+
+    def marcar_caida(self, host, port, motivo="Respuesta vacía"):
+        """Descarta la conexión tras una respuesta inválida (p. ej. send_command devolvió None)"""
+        entrada = self.entrada(host, port)
+        with entrada.lock:
+            self._registrar_fallo(entrada, motivo)
+
+    def disponible(self, host, port):
+        """True si hay conexión viva o se puede reintentar ya (sin bloquear)"""
+        entrada = self.entrada(host, port)
+        return entrada.conectado or time.monotonic() >= entrada.proximo_intento
+
+    def cerrar(self):
+        with self.lock:
+            for entrada in self.entradas.values():
+                if entrada.controlador is not None:
+                    entrada.controlador.disconnect()
+                    entrada.controlador = None
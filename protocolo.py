@@ -0,0 +1,117 @@
+"""
+Protocolo con tramas del simulador de riego
+
+- Comandos (cliente -> servidor): texto UTF-8 terminado en '\n'.
+  Un cliente puede enviar varios comandos seguidos (pipelining) sin
+  esperar respuesta; el servidor responde en el mismo orden.
+- Respuestas (servidor -> cliente): cabecera de 4 bytes big-endian con la
+  longitud del cuerpo, seguida del cuerpo UTF-8. Así una respuesta grande
+  (HISTORIAL_RECIENTE) nunca se trunca ni se mezcla con la siguiente.
+"""
+
+import struct
+
+CABECERA = struct.Struct('!I')
+TAM_CABECERA = CABECERA.size
+
+# Límites de seguridad
+MAX_LINEA = 64 * 1024
+MAX_TRAMA = 64 * 1024 * 1024
+
+
+class ErrorProtocolo(Exception):
+    """Trama o línea inválida recibida"""
+
+
+def enmarcar(cuerpo):
+    """Devuelve cabecera de longitud + cuerpo listos para enviar"""
+    if isinstance(cuerpo, str):
+        cuerpo = cuerpo.encode('utf-8')
+    return CABECERA.pack(len(cuerpo)) + cuerpo
+
+
+def codificar_comando(comando):
+    """Codifica un comando como línea terminada en '\n'"""
+    return (comando.strip() + '\n').encode('utf-8')
+
+
+def codificar_comandos(comandos):
+    """Codifica varios comandos en un solo bloque (pipelining)"""
+    return b''.join(codificar_comando(c) for c in comandos)
+
+
+class LectorTramas:
+    """Lector con buffer sobre un socket bloqueante"""
+
+    def __init__(self, sock, tam_bloque=65536):
+        self.sock = sock
+        self.tam_bloque = tam_bloque
+        self.buffer = bytearray()
+
+    def _llenar(self):
+        """Lee un bloque del socket; devuelve False si se cerró"""
+        bloque = self.sock.recv(self.tam_bloque)
+        if not bloque:
+            return False
+        self.buffer += bloque
+        return True
+
+    def leer_linea(self):
+        """Devuelve el siguiente comando (sin '\n') o None si se cerró la conexión"""
+        while True:
+            fin = self.buffer.find(b'\n')
+            if fin >= 0:
+                linea = bytes(self.buffer[:fin])
+                del self.buffer[:fin + 1]
+                return linea.decode('utf-8').strip()
+            if len(self.buffer) > MAX_LINEA:
+                raise ErrorProtocolo("Línea de comando demasiado larga")
+            if not self._llenar():
+                return None
+
+    def leer_exacto(self, n):
+        """Lee exactamente n bytes o None si se cerró la conexión"""
+        while len(self.buffer) < n:
+            if not self._llenar():
+                return None
+        datos = bytes(self.buffer[:n])
+        del self.buffer[:n]
+        return datos
+
+    def leer_trama(self):
+        """Devuelve el cuerpo (bytes) de la siguiente respuesta o None"""
+        cabecera = self.leer_exacto(TAM_CABECERA)
+        if cabecera is None:
+            return None
+        (longitud,) = CABECERA.unpack(cabecera)
+        if longitud > MAX_TRAMA:
+            raise ErrorProtocolo(f"Trama demasiado grande: {longitud} bytes")
+        return self.leer_exacto(longitud)
+
+    def leer_respuesta(self):
+        """Devuelve la siguiente respuesta decodificada como texto o None (ErrorProtocolo si no es UTF-8)"""
+        cuerpo = self.leer_trama()
+        if cuerpo is None:
+            return None
+        try:
+            return cuerpo.decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise ErrorProtocolo(f"Respuesta que no es texto: {cuerpo[:20]!r}") from e
+
+
+async def leer_trama_async(reader):
+    """Versión asyncio de LectorTramas.leer_trama sobre un StreamReader"""
+    cabecera = await reader.readexactly(TAM_CABECERA)
+    (longitud,) = CABECERA.unpack(cabecera)
+    if longitud > MAX_TRAMA:
+        raise ErrorProtocolo(f"Trama demasiado grande: {longitud} bytes")
+    return await reader.readexactly(longitud)
+
+
+async def leer_respuesta_async(reader):
+    """Versión asyncio de LectorTramas.leer_respuesta"""
+    cuerpo = await leer_trama_async(reader)
+    try:
+        return cuerpo.decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise ErrorProtocolo(f"Respuesta que no es texto: {cuerpo[:20]!r}") from e
@@ -0,0 +1,93 @@
+"""
+Reducción de series para los gráficos del dashboard
+
+Plotly dibuja cada punto que recibe, así que enviar el historial completo
+hace que el JSON y el tiempo de dibujo crezcan con su longitud. Estas
+funciones eligen qué índices enviar con un presupuesto de puntos por traza:
+
+- indices_lttb: Largest-Triangle-Three-Buckets para sensores analógicos
+  (conserva la forma visual: picos y valles). Acepta una matriz muestras x
+  series con el mismo eje x y las reduce todas en el mismo recorrido.
+- indices_transiciones: para estados 0/1 (bombas) solo hacen falta el
+  primer punto, cada cambio y el último (dibujar con line_shape='hv');
+  si hay más cambios que presupuesto, mínimo y máximo por cubeta.
+- indices_minmax / cortes_cubetas: mínimo-máximo por cubeta y cubetas de
+  filas para bandas y mapas de calor.
+"""
+
+import numpy as np
+
+PUNTOS_POR_TRAZA = 2000
+
+
+def cortes_cubetas(n, puntos):
+    """Inicio de cada una de 'puntos' cubetas consecutivas de filas (para np.*.reduceat)"""
+    if n <= puntos:
+        return np.arange(n)
+    return np.linspace(0, n, puntos, endpoint=False).astype(np.intp)
+
+
+def indices_minmax(y, puntos):
+    """Índices del mínimo y el máximo de cada cubeta (puntos // 2 cubetas), en orden"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= puntos:
+        return np.arange(n)
+    cubetas = max(1, puntos // 2)
+    tamano = -(-n // cubetas)
+    bloques = np.pad(y, (0, cubetas * tamano - n), mode='edge').reshape(cubetas, tamano)
+    base = np.arange(cubetas) * tamano
+    indices = np.concatenate([base + bloques.argmin(axis=1), base + bloques.argmax(axis=1)])
+    return np.unique(np.minimum(indices, n - 1))
+
+
+def indices_transiciones(estados, puntos=PUNTOS_POR_TRAZA):
+    """Índices del primer punto, de cada cambio de estado y del último"""
+    estados = np.asarray(estados)
+    n = len(estados)
+    if n <= 2:
+        return np.arange(n)
+    cambios = np.flatnonzero(estados[1:] != estados[:-1]) + 1
+    indices = np.unique(np.r_[0, cambios, n - 1])
+    if len(indices) > puntos:
+        return indices_minmax(estados, puntos)
+    return indices
+
+
+def indices_lttb(x, y, puntos=PUNTOS_POR_TRAZA):
+    """Índices elegidos por LTTB (Largest-Triangle-Three-Buckets)
+
+    x: (n,) creciente; y: (n,) o (n, series). Devuelve (puntos,) o
+    (puntos, series) índices: siempre el primero y el último, y en cada
+    cubeta intermedia el punto que forma el triángulo de mayor área con el
+    elegido en la cubeta anterior y el promedio de la siguiente.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    matriz = y.reshape(len(y), -1)
+    n, series = matriz.shape
+    if n <= puntos or puntos < 3:
+        indices = np.arange(n) if n <= puntos else np.array([0, n - 1])
+        indices = np.repeat(indices[:, None], series, axis=1)
+        return indices if y.ndim > 1 else indices[:, 0]
+
+    # puntos - 2 cubetas con los puntos interiores; la "siguiente" de la última es el último punto
+    bordes = np.linspace(1, n - 1, puntos - 1).astype(np.intp)
+    tamanos = np.diff(bordes)[:, None]
+    prom_x = np.r_[np.add.reduceat(x[1:n - 1], bordes[:-1] - 1) / tamanos[:, 0], x[-1]]
+    prom_y = np.vstack([np.add.reduceat(matriz[1:n - 1], bordes[:-1] - 1, axis=0) / tamanos, matriz[-1]])
+
+    elegidos = np.empty((puntos, series), dtype=np.intp)
+    elegidos[0] = 0
+    elegidos[-1] = n - 1
+    columnas = np.arange(series)
+    a = np.zeros(series, dtype=np.intp)
+    for i in range(puntos - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        ax, ay = x[a], matriz[a, columnas]
+        cx, cy = prom_x[i + 1], prom_y[i + 1]
+        # Doble del área del triángulo (a, p, c) para cada punto p de la cubeta y cada serie
+        areas = np.abs((ax - cx) * (matriz[inicio:fin] - ay) - (ax[None, :] - x[inicio:fin, None]) * (cy - ay))
+        a = inicio + areas.argmax(axis=0)
+        elegidos[i + 1] = a
+    return elegidos if y.ndim > 1 else elegidos[:, 0]
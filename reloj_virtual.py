@@ -0,0 +1,62 @@
+"""
+Reloj virtual para los simuladores
+
+El tiempo simulado avanza con cada tick (avanzar) y no con el reloj de
+pared; esperar() duerme el tiempo real que corresponde según el factor de
+velocidad:
+    velocidad=1      tiempo real (un tick de 3 s tarda 3 s)
+    velocidad=3600   una hora simulada por segundo
+    velocidad=inf    tan rápido como se pueda (no duerme nunca)
+Así una semana de riego se simula en segundos y los registros muestran la
+hora simulada, no la del sistema.
+"""
+
+import math
+import time
+
+
+def parsear_velocidad(texto):
+    """'max' (o 'inf') = tan rápido como se pueda; si no, un factor positivo"""
+    if texto.lower() in ('max', 'inf'):
+        return math.inf
+    velocidad = float(texto)
+    if velocidad <= 0:
+        raise ValueError("La velocidad debe ser positiva")
+    return velocidad
+
+
+class RelojVirtual:
+    def __init__(self, velocidad=1.0, inicio=None):
+        if velocidad <= 0:
+            raise ValueError("La velocidad debe ser positiva")
+        self.velocidad = velocidad
+        # Segundos desde epoch del instante simulado actual (por defecto, ahora)
+        self.tiempo = time.time() if inicio is None else float(inicio)
+
+    @property
+    def maxima_velocidad(self):
+        return math.isinf(self.velocidad)
+
+    def ahora(self):
+        """Instante simulado actual (segundos desde epoch)"""
+        return self.tiempo
+
+    def avanzar(self, segundos):
+        """Avanza el tiempo simulado sin dormir"""
+        self.tiempo += segundos
+
+    def esperar(self, segundos, interrumpir=None):
+        """Duerme el tiempo real equivalente a 'segundos' simulados
+
+        interrumpir: threading.Event opcional que corta la espera al activarse.
+        """
+        if self.maxima_velocidad:
+            return
+        if interrumpir is None:
+            time.sleep(segundos / self.velocidad)
+        else:
+            interrumpir.wait(segundos / self.velocidad)
+
+    def strftime(self, formato='%H:%M:%S'):
+        """Hora simulada con el formato de time.strftime"""
+        return time.strftime(formato, time.localtime(self.tiempo))
@@ -0,0 +1,275 @@
+"""
+Resúmenes del historial en varios niveles de resolución
+
+Junto a las muestras crudas se mantienen, al agregar cada muestra, niveles
+de cubetas de 1 minuto, 10 minutos y 1 hora con cuenta, suma, mínimo y
+máximo por columna (el promedio de una columna de bomba 0/1 es la fracción
+de tiempo encendida). Cada nivel es un buffer circular de cubetas cerradas
+más la cubeta abierta, así agregar una muestra son unas pocas operaciones
+NumPy por nivel y consultar cualquier ventana cuesta lo mismo que el número
+de cubetas devueltas.
+
+consultar(inicio, fin) elige el nivel más fino que cubre la ventana con a
+lo sumo max_puntos cubetas: la última hora sale de las muestras crudas, una
+semana de cubetas de 10 minutos y un año de cubetas de varias horas.
+agrupar(inicio, fin, cubeta) reagrupa el nivel más grueso cuya resolución
+divide a la cubeta pedida. Las cubetas están alineadas a múltiplos de su
+tamaño (desde epoch), igual que en AlmacenSegmentos.agrupar y
+HistorialSQLite.agrupar.
+"""
+
+import math
+import threading
+
+import numpy as np
+
+# (resolución en segundos, cubetas que se conservan)
+NIVELES = (
+    (60, 7 * 24 * 60),         # 1 minuto durante una semana
+    (600, 90 * 24 * 6),        # 10 minutos durante 90 días
+    (3600, 2 * 365 * 24),      # 1 hora durante dos años
+)
+CAPACIDAD_CRUDA = 3600         # Muestras crudas (3 horas a 3 s)
+MAX_PUNTOS = 2000
+
+
+def resumen_vacio(n_columnas):
+    vacia = np.empty((0, n_columnas))
+    return {'tiempo': np.empty(0), 'muestras': np.empty(0, dtype=np.int64),
+            'minimo': vacia, 'promedio': vacia, 'maximo': vacia}
+
+
+def combinar_cubetas(resumen, cubeta):
+    """Reagrupa un resumen en cubetas de 'cubeta' segundos (múltiplo de su resolución)"""
+    if not len(resumen['tiempo']):
+        return resumen
+    indices = np.floor(resumen['tiempo'] / cubeta).astype(np.int64)
+    cortes = np.flatnonzero(np.r_[True, indices[1:] != indices[:-1]])
+    muestras = np.add.reduceat(resumen['muestras'], cortes)
+    sumas = np.add.reduceat(resumen['promedio'] * resumen['muestras'][:, None], cortes)
+    return {
+        'tiempo': indices[cortes] * float(cubeta),
+        'muestras': muestras,
+        'minimo': np.minimum.reduceat(resumen['minimo'], cortes),
+        'promedio': sumas / muestras[:, None],
+        'maximo': np.maximum.reduceat(resumen['maximo'], cortes),
+    }
+
+
+class NivelResumen:
+    """Cubetas de 'resolucion' segundos: buffer circular de cerradas más la abierta"""
+
+    def __init__(self, resolucion, capacidad, n_columnas):
+        self.resolucion = resolucion
+        self.capacidad = capacidad
+        self.inicio = np.zeros(capacidad)
+        self.cuenta = np.zeros(capacidad, dtype=np.int64)
+        self.suma = np.zeros((capacidad, n_columnas))
+        self.minimo = np.zeros((capacidad, n_columnas))
+        self.maximo = np.zeros((capacidad, n_columnas))
+        self.cerradas = 0              # Cubetas cerradas desde el inicio
+
+        # Cubeta abierta (índice = inicio / resolución; None si aún no hay muestras)
+        self.abierta = None
+        self.a_cuenta = 0
+        self.a_suma = np.zeros(n_columnas)
+        self.a_minimo = np.full(n_columnas, np.inf)
+        self.a_maximo = np.full(n_columnas, -np.inf)
+
+    def agregar_lote(self, tiempos, filas):
+        indices = np.floor(tiempos / self.resolucion).astype(np.int64)
+
+        # Caso común (una muestra de la cubeta abierta): tres operaciones
+        if len(indices) == 1 and indices[0] == self.abierta:
+            self.a_cuenta += 1
+            self.a_suma += filas[0]
+            np.minimum(self.a_minimo, filas[0], out=self.a_minimo)
+            np.maximum(self.a_maximo, filas[0], out=self.a_maximo)
+            return
+
+        cortes = np.flatnonzero(np.r_[True, indices[1:] != indices[:-1]])
+        grupos = indices[cortes]
+        cuentas = np.diff(np.r_[cortes, len(indices)])
+        sumas = np.add.reduceat(filas, cortes)
+        minimos = np.minimum.reduceat(filas, cortes)
+        maximos = np.maximum.reduceat(filas, cortes)
+
+        # El primer grupo continúa la cubeta abierta si es la misma
+        if grupos[0] == self.abierta:
+            cuentas[0] += self.a_cuenta
+            sumas[0] += self.a_suma
+            np.minimum(minimos[0], self.a_minimo, out=minimos[0])
+            np.maximum(maximos[0], self.a_maximo, out=maximos[0])
+        elif self.abierta is not None:
+            self._cerrar(np.array([self.abierta]), np.array([self.a_cuenta]), self.a_suma[None],
+                         self.a_minimo[None], self.a_maximo[None])
+
+        # Todos los grupos menos el último están completos; el último queda abierto
+        if len(grupos) > 1:
+            self._cerrar(grupos[:-1], cuentas[:-1], sumas[:-1], minimos[:-1], maximos[:-1])
+        self.abierta = int(grupos[-1])
+        self.a_cuenta = int(cuentas[-1])
+        self.a_suma = sumas[-1].copy()
+        self.a_minimo = minimos[-1].copy()
+        self.a_maximo = maximos[-1].copy()
+
+    def _cerrar(self, grupos, cuentas, sumas, minimos, maximos):
+        """Pasa cubetas completas al buffer circular (si no caben, quedan las últimas)"""
+        total = self.cerradas + len(grupos)
+        if len(grupos) > self.capacidad:
+            grupos, cuentas, sumas, minimos, maximos = (
+                a[-self.capacidad:] for a in (grupos, cuentas, sumas, minimos, maximos))
+        posiciones = (total - len(grupos) + np.arange(len(grupos))) % self.capacidad
+        self.inicio[posiciones] = grupos * float(self.resolucion)
+        self.cuenta[posiciones] = cuentas
+        self.suma[posiciones] = sumas
+        self.minimo[posiciones] = minimos
+        self.maximo[posiciones] = maximos
+        self.cerradas = total
+
+    def _orden(self):
+        """Posiciones de las cubetas cerradas en orden cronológico"""
+        if self.cerradas <= self.capacidad:
+            return np.arange(self.cerradas)
+        return (self.cerradas + np.arange(self.capacidad)) % self.capacidad
+
+    def desde(self):
+        """Inicio de la cubeta más antigua conservada (None si está vacío)"""
+        if self.cerradas:
+            return float(self.inicio[self._orden()[0]])
+        return None if self.abierta is None else self.abierta * float(self.resolucion)
+
+    def cubetas(self, inicio, fin):
+        """Cubetas que se solapan con [inicio, fin), incluida la abierta"""
+        orden = self._orden()
+        inicios = self.inicio[orden]
+        desde = np.searchsorted(inicios, inicio - self.resolucion, side='right')
+        hasta = np.searchsorted(inicios, fin, side='left')
+        sel = orden[desde:hasta]
+        resumen = {
+            'tiempo': self.inicio[sel],
+            'muestras': self.cuenta[sel],
+            'minimo': self.minimo[sel],
+            'promedio': self.suma[sel] / self.cuenta[sel][:, None],
+            'maximo': self.maximo[sel],
+        }
+        t_abierta = None if self.abierta is None else self.abierta * float(self.resolucion)
+        if t_abierta is not None and inicio - self.resolucion < t_abierta < fin:
+            resumen = {
+                'tiempo': np.r_[resumen['tiempo'], t_abierta],
+                'muestras': np.r_[resumen['muestras'], self.a_cuenta],
+                'minimo': np.vstack([resumen['minimo'], self.a_minimo]),
+                'promedio': np.vstack([resumen['promedio'], self.a_suma / self.a_cuenta]),
+                'maximo': np.vstack([resumen['maximo'], self.a_maximo]),
+            }
+        return resumen
+
+
+class ResumenesTiempo:
+    def __init__(self, columnas, capacidad_cruda=CAPACIDAD_CRUDA, niveles=NIVELES):
+        self.columnas = list(columnas)
+        n = len(self.columnas)
+        self.lock = threading.Lock()
+
+        # Nivel crudo: últimas muestras con su hora
+        self.capacidad_cruda = capacidad_cruda
+        self.tiempos = np.zeros(capacidad_cruda)
+        self.filas = np.zeros((capacidad_cruda, n))
+        self.total = 0
+        self.primer_tiempo = None
+
+        self.niveles = [NivelResumen(resolucion, capacidad, n) for resolucion, capacidad in niveles]
+
+    def __len__(self):
+        return self.total
+
+    def agregar(self, tiempo, fila):
+        self.agregar_lote(np.array([tiempo]), np.asarray(fila, dtype=np.float64)[None, :])
+
+    def agregar_lote(self, tiempos, filas):
+        """Agrega muestras (tiempos crecientes) a las crudas y a todos los niveles"""
+        tiempos = np.asarray(tiempos, dtype=np.float64)
+        filas = np.asarray(filas, dtype=np.float64)
+        if not len(tiempos):
+            return
+        with self.lock:
+            if self.primer_tiempo is None:
+                self.primer_tiempo = float(tiempos[0])
+            recientes = slice(-self.capacidad_cruda, None)
+            posiciones = (self.total + np.arange(len(tiempos)))[recientes] % self.capacidad_cruda
+            self.tiempos[posiciones] = tiempos[recientes]
+            self.filas[posiciones] = filas[recientes]
+            self.total += len(tiempos)
+            for nivel in self.niveles:
+                nivel.agregar_lote(tiempos, filas)
+
+    def _orden_crudo(self):
+        if self.total <= self.capacidad_cruda:
+            return np.arange(self.total)
+        return (self.total + np.arange(self.capacidad_cruda)) % self.capacidad_cruda
+
+    def _crudas(self, inicio, fin):
+        orden = self._orden_crudo()
+        tiempos = self.tiempos[orden]
+        sel = orden[np.searchsorted(tiempos, inicio, side='left'):np.searchsorted(tiempos, fin, side='left')]
+        filas = self.filas[sel]
+        return {'tiempo': self.tiempos[sel], 'muestras': np.ones(len(sel), dtype=np.int64),
+                'minimo': filas, 'promedio': filas, 'maximo': filas}
+
+    def _cubre(self, desde, inicio):
+        """¿Un nivel que conserva datos desde 'desde' cubre una ventana que empieza en inicio?"""
+        return desde is not None and desde <= max(inicio, self.primer_tiempo)
+
+    def _crudas_desde(self):
+        return float(self.tiempos[self._orden_crudo()[0]]) if self.total else None
+
+    def elegir_nivel(self, inicio, fin, max_puntos=MAX_PUNTOS):
+        """Cubeta en segundos para [inicio, fin) con a lo sumo max_puntos puntos
+
+        0 (muestras crudas) si caben, si no la resolución del nivel más fino
+        que cubre la ventana; para ventanas más largas que max_puntos cubetas
+        del nivel más grueso, un múltiplo de su resolución.
+        """
+        with self.lock:
+            if self._cubre(self._crudas_desde(), inicio):
+                tiempos = self.tiempos[self._orden_crudo()]
+                if np.searchsorted(tiempos, fin) - np.searchsorted(tiempos, inicio) <= max_puntos:
+                    return 0
+            ventana = fin - inicio
+            for nivel in self.niveles:
+                if self._cubre(nivel.desde(), inicio) and ventana / nivel.resolucion <= max_puntos:
+                    return nivel.resolucion
+            gruesa = self.niveles[-1].resolucion
+            return gruesa * max(1, math.ceil(ventana / gruesa / max_puntos))
+
+    def consultar(self, inicio, fin, max_puntos=MAX_PUNTOS):
+        """Resumen de [inicio, fin) con la cubeta elegida por elegir_nivel (clave 'cubeta')"""
+        cubeta = self.elegir_nivel(inicio, fin, max_puntos)
+        resumen = self.agrupar(inicio, fin, cubeta, parcial=True)
+        resumen['cubeta'] = cubeta
+        return resumen
+
+    def agrupar(self, inicio, fin, cubeta, parcial=False):
+        """Resumen en cubetas de 'cubeta' segundos (0 = muestras crudas) desde el nivel más grueso que la divide
+
+        Devuelve None si ningún nivel conserva toda la ventana (el llamador
+        puede recurrir al almacén en disco); con parcial=True devuelve lo que
+        haya. Las cubetas de los extremos pueden incluir muestras de hasta
+        una resolución del nivel fuera del rango.
+        """
+        with self.lock:
+            if not self.total:
+                return resumen_vacio(len(self.columnas)) if parcial else None
+            crudas_desde = self._crudas_desde()
+            if cubeta == 0:
+                return self._crudas(inicio, fin) if parcial or self._cubre(crudas_desde, inicio) else None
+            candidatos = [nivel for nivel in reversed(self.niveles) if cubeta % nivel.resolucion == 0]
+            for nivel in candidatos:
+                if self._cubre(nivel.desde(), inicio):
+                    return combinar_cubetas(nivel.cubetas(inicio, fin), cubeta)
+            if self._cubre(crudas_desde, inicio):
+                return combinar_cubetas(self._crudas(inicio, fin), cubeta)
+            if parcial:
+                fuente = candidatos[0].cubetas(inicio, fin) if candidatos else self._crudas(inicio, fin)
+                return combinar_cubetas(fuente, cubeta)
+        return None
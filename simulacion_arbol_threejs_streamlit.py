@@ -1,11 +1,80 @@
 import streamlit as st
 import streamlit.components.v1 as components
+import json
 import os
 
-def crear_simulacion_arbol_threejs():
+ARBOLES = 8
+
+# Puente de datos: un iframe mínimo que guarda el estado acumulado en la página
+# (para escenas que se montan después) y envía por postMessage solo los cambios a
+# la escena Three.js, que sigue montada con el mismo HTML
+PUENTE_ARBOLES = """<script>
+const mensaje = %s;
+try {
+    const padre = window.parent;
+    const estado = padre.__estadoArboles || {tipo: 'arboles', seq: -1, arboles: {}};
+    for (const [arbol, cambios] of Object.entries(mensaje.arboles)) {
+        estado.arboles[arbol] = Object.assign(estado.arboles[arbol] || {}, cambios);
+    }
+    estado.seq = mensaje.seq;
+    padre.__estadoArboles = estado;
+    for (const marco of padre.document.querySelectorAll('iframe')) {
+        if (marco.contentWindow !== window) marco.contentWindow.postMessage(mensaje, '*');
+    }
+} catch (e) {
+    // Sin acceso al documento padre: la escena sigue con sus controles locales
+}
+</script>"""
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _leer_html(ruta, mtime_ns):
+    with open(ruta, 'r', encoding='utf-8') as file:
+        return file.read()
+
+def cargar_html_threejs(ruta):
+    """Contenido del HTML de la simulación, leído una vez y releído solo si cambia su mtime
+
+    El contenido no cambia entre reruns, así Streamlit no vuelve a montar el
+    iframe y lo envía al navegador una sola vez por sesión.
+    """
+    return _leer_html(ruta, os.stat(ruta).st_mtime_ns)
+
+def estado_arboles(datos):
+    """Estado de cada árbol (tree1..tree8) a partir de los datos por zona del dashboard"""
+    estado = {}
+    for k in range(1, ARBOLES + 1):
+        if f'humedad{k}' not in datos:
+            break
+        estado[f'tree{k}'] = {
+            'temp': round(float(datos[f'temperatura{k}']), 1),
+            'humidity': round(float(datos[f'humedad{k}']), 1),
+            'watering': bool(datos.get(f'bomba{k}_activa', False)),
+        }
+    return estado
+
+def enviar_datos_arboles(datos):
+    """Envía a la escena los valores de los árboles que cambiaron desde el último envío de la sesión"""
+    seq, enviado = st.session_state.get('arboles_enviados', (-1, {}))
+    actual = estado_arboles(datos)
+    cambios = {}
+    for arbol, valores in actual.items():
+        diferentes = {c: v for c, v in valores.items() if enviado.get(arbol, {}).get(c) != v}
+        if diferentes:
+            cambios[arbol] = diferentes
+    if not cambios:
+        return
+    seq += 1
+    st.session_state['arboles_enviados'] = (seq, actual)
+    mensaje = json.dumps({'tipo': 'arboles', 'seq': seq, 'arboles': cambios})
+    components.html(PUENTE_ARBOLES % mensaje, height=0)
+
+def crear_simulacion_arbol_threejs(datos=None):
     """
     Crea una simulación 3D de árboles realistas usando Three.js
     integrada en Streamlit como componente personalizado.
+    
+    datos: lecturas por zona (humedad1, temperatura1, bomba1_activa, ...)
+    que se envían a los árboles sin recargar la escena.
     """
     
     st.subheader("🌳 Simulación 3D de 8 Árboles Realistas")
@@ -16,12 +85,13 @@ def crear_simulacion_arbol_threejs():
     
     # Verificar si el archivo existe
     if os.path.exists(html_file_path):
-        # Leer el contenido del archivo HTML
-        with open(html_file_path, 'r', encoding='utf-8') as file:
-            html_content = file.read()
+        # Contenido cacheado (se relee solo si el archivo cambia)
+        html_content = cargar_html_threejs(html_file_path)
         
         # Mostrar el componente HTML en Streamlit
         components.html(html_content, height=800, scrolling=True)
+        if datos:
+            enviar_datos_arboles(datos)
         
         # Información adicional
         with st.expander("ℹ️ Información de la Simulación 3D de 8 Árboles"):
@@ -2,186 +2,422 @@
 Simulador de Sistema de Riego con Historial - VERSION CORREGIDA
 """
 
+import argparse
+import asyncio
+import math
 import socket
 import threading
-import time
-import random
-import math
+import re
+
+import numpy as np
+
+from almacen_segmentos import AlmacenSegmentos
+from codificacion_binaria import codificar_estado, codificar_historial, codificar_historial_desde
+from estadisticas_incrementales import EstadisticasIncrementales
+from generador_historial import generar_historial
+from historial_circular import HistorialCircular
+from historial_sqlite import HistorialSQLite
+from protocolo import LectorTramas, enmarcar, MAX_LINEA
+from reloj_virtual import RelojVirtual, parsear_velocidad
+from resumenes_tiempo import ResumenesTiempo
+from suscripciones import Publicador, Suscriptor, POLITICAS
+
+# Motores de servidor disponibles
+MOTORES_SERVIDOR = ('hilos', 'asyncio')
+
+# Valores iniciales de las dos zonas originales (se repiten para las demás)
+HUMEDAD_INICIAL = [45.2, 38.7]
+TEMPERATURA_INICIAL = [24.5, 26.1]
+
+# Comandos manuales de bomba: BOMBA<k>_ON / BOMBA<k>_OFF
+COMANDO_BOMBA = re.compile(r"BOMBA(\d+)_(ON|OFF)")
+
+# HISTORIAL_DESDE <seq> [n [arranque]]
+COMANDO_DESDE = re.compile(r"HISTORIAL_DESDE (-?\d+)(?: (\d+)(?: (\d+))?)?")
+
+# Máximo de cubetas en una respuesta de HISTORIAL <inicio> <fin> [cubeta]
+MAX_CUBETAS = 10_000
+
+# Variación por tick de cada sensor: (amplitud del ruido, mínimo, máximo)
+VARIACION_SENSORES = {
+    'humedad': (1.0, 0.0, 100.0),
+    'temperatura': (0.3, 15.0, 40.0),
+    'temp_planta': (0.2, 12.0, 35.0),
+    'humedad_relativa': (2.0, 30.0, 95.0),
+}
+
+
+def columnas_historial(zonas=2):
+    """Columnas del historial (una por sensor, bombas como 0/1)
+
+    Orden: humedades, temperaturas, temp_planta, humedad_relativa, bombas.
+    Con 2 zonas coincide con el formato original.
+    """
+    return ([f'humedad{k}' for k in range(1, zonas + 1)]
+            + [f'temperatura{k}' for k in range(1, zonas + 1)]
+            + ['temp_planta', 'humedad_relativa']
+            + [f'bomba{k}_estados' for k in range(1, zonas + 1)])
+
+
+def vectores_variacion(zonas=2):
+    """Amplitud, mínimo y máximo por columna analógica (orden de columnas_historial)"""
+    repeticiones = [zonas, zonas, 1, 1]
+    tabla = np.repeat(np.array(list(VARIACION_SENSORES.values())), repeticiones, axis=0)
+    return tabla[:, 0], tabla[:, 1], tabla[:, 2]
 
-class SistemaRiegoSimulator:
-    def __init__(self, host='localhost', port=9999):
+
+def formatear_estado(humedad, temperatura, bombas, temp_planta, humedad_relativa):
+    """DATOS:h1..hN,t1..tN,b1..bN,temp_planta,hum_relativa"""
+    valores = ([f"{v:.1f}" for v in humedad]
+               + [f"{v:.1f}" for v in temperatura]
+               + ['1' if b else '0' for b in bombas]
+               + [f"{temp_planta:.1f}", f"{humedad_relativa:.1f}"])
+    return "DATOS:" + ",".join(valores)
+
+
+def formatear_historial(filas, zonas, seq_final, primera=None, tiempos=None, arranque=None):
+    """Respuesta de HISTORIAL_RECIENTE para filas en el orden de columnas_historial(zonas)
+
+    La cabecera lleva el número de secuencia de la última muestra para que
+    los clientes apliquen solo lo nuevo. Con primera (HISTORIAL_DESDE) la
+    cabecera es HISTORIAL_DESDE_INICIO:<primera>,<seq_final>,<arranque>, el
+    índice de cada línea es su número de secuencia y le sigue la hora
+    simulada de la muestra (tiempos, segundos desde epoch).
+    """
+    # Cada línea: HR:idx,h1..hN,t1..tN,b1..bN,temp_planta,hum_relativa
+    # (en HISTORIAL_DESDE: HR:seq,tiempo,h1..hN,...)
+    z = zonas
+    comando = "HISTORIAL_RECIENTE" if primera is None else "HISTORIAL_DESDE"
+    lineas = [f"HISTORIAL_RECIENTE_INICIO:{seq_final}" if primera is None
+              else f"HISTORIAL_DESDE_INICIO:{primera},{seq_final},{arranque}"]
+    horas = [""] * len(filas) if tiempos is None else [f"{t:.3f}," for t in tiempos.tolist()]
+    for idx, (fila, hora) in enumerate(zip(filas.tolist(), horas), start=primera or 0):
+        valores = ([f"{v:.1f}" for v in fila[:2 * z]]
+                   + [str(int(b)) for b in fila[2 * z + 2:]]
+                   + [f"{fila[2 * z]:.1f}", f"{fila[2 * z + 1]:.1f}"])
+        lineas.append(f"HR:{idx},{hora}" + ",".join(valores))
+    lineas.append(f"{comando}_FIN")
+    return "\n".join(lineas)
+
+
+def formatear_historial_agrupado(resumen, zonas, cubeta):
+    """Respuesta de HISTORIAL <inicio> <fin> [cubeta] a partir de un resumen por cubetas
+
+    Cada línea: HB:inicio_cubeta,muestras, (mín, prom, máx) de cada sensor
+    analógico en el orden de columnas_historial y fracción de tiempo de cada
+    bomba encendida.
+    """
+    n = 2 * zonas + 2
+    lineas = [f"HISTORIAL_INICIO:{len(resumen['tiempo'])},{cubeta:g}"]
+    for t, muestras, minimos, promedios, maximos in zip(
+        resumen['tiempo'].tolist(), resumen['muestras'].tolist(), resumen['minimo'].tolist(),
+        resumen['promedio'].tolist(), resumen['maximo'].tolist()
+    ):
+        valores = [f"{t:.3f}", str(muestras)]
+        for k in range(n):
+            valores += [f"{minimos[k]:.1f}", f"{promedios[k]:.1f}", f"{maximos[k]:.1f}"]
+        valores += [f"{v:.3f}" for v in promedios[n:]]
+        lineas.append("HB:" + ",".join(valores))
+    lineas.append("HISTORIAL_FIN")
+    return "\n".join(lineas)
+
+
+def formatear_estadisticas(promedios, minimos, maximos, porcentajes):
+    """STATS: promedios h/t, (mín, máx) por sensor, % de tiempo de cada bomba"""
+    valores = list(promedios)
+    for minimo, maximo in zip(minimos, maximos):
+        valores += [minimo, maximo]
+    valores += list(porcentajes)
+    return "STATS:" + ",".join(f"{v:.1f}" for v in valores)
+
+
+class ComandosRiego:
+    """Comandos de un sitio de riego
+
+    Las subclases generan las respuestas (generar_respuesta_*,
+    generar_historial_*, generar_estadisticas), y definen zonas, activar_bomba() y
+    evaluar_riego_automatico().
+    """
+    
+    def procesar_comando(self, comando, sesion=None):
+        """Procesa comandos (sesion guarda el formato negociado por la conexión)"""
+        cmd = comando.upper().strip()
+        binario = sesion is not None and sesion.get('formato') == 'binario'
+        
+        if cmd == "STATUS":
+            return self.generar_respuesta_estado_binaria() if binario else self.generar_respuesta_estado()
+        elif cmd.startswith("HISTORIAL_RECIENTE"):
+            # HISTORIAL_RECIENTE [n]: últimas n entradas (24 por defecto)
+            partes = cmd.split()
+            if partes[0] != "HISTORIAL_RECIENTE" or len(partes) > 2 or (len(partes) > 1 and not partes[1].isdigit()):
+                return "COMANDO_DESCONOCIDO"
+            num_entradas = int(partes[1]) if len(partes) > 1 else 24
+            return self.generar_respuesta_historial_binaria(num_entradas) if binario else self.generar_respuesta_historial(num_entradas)
+        elif cmd.startswith("HISTORIAL_DESDE"):
+            # HISTORIAL_DESDE <seq> [n [arranque]]: muestras posteriores a la secuencia seq (a lo sumo
+            # las últimas n); si arranque no es el actual, seq es de otra ejecución y se envía todo
+            coincidencia = COMANDO_DESDE.fullmatch(" ".join(cmd.split()))
+            if not coincidencia:
+                return "USO: HISTORIAL_DESDE <seq> [n [arranque]]"
+            seq, n, arranque = coincidencia.groups()
+            n = None if n is None else int(n)
+            arranque = None if arranque is None else int(arranque)
+            if binario:
+                return self.generar_historial_desde_binario(int(seq), n, arranque)
+            return self.generar_historial_desde(int(seq), n, arranque)
+        elif cmd == "HISTORIAL" or cmd.startswith("HISTORIAL "):
+            # HISTORIAL <inicio> <fin> [cubeta]: resumen por cubetas (tiempos <= 0 relativos a ahora;
+            # sin cubeta se elige el nivel de resumen según el rango)
+            partes = cmd.split()[1:]
+            try:
+                if len(partes) not in (2, 3):
+                    raise ValueError
+                inicio, fin, *cubeta = (float(v) for v in partes)
+            except ValueError:
+                return "USO: HISTORIAL <inicio> <fin> [cubeta]"
+            return self.generar_historial_agrupado(inicio, fin, cubeta[0] if cubeta else None)
+        elif cmd in ("FORMATO BINARIO", "FORMATO TEXTO"):
+            if sesion is None:
+                return "FORMATO_NO_SOPORTADO"
+            sesion['formato'] = cmd.split()[1].lower()
+            return f"FORMATO_{cmd.split()[1]}"
+        elif cmd == "ESTADISTICAS":
+            return self.generar_estadisticas()
+        elif COMANDO_BOMBA.fullmatch(cmd):
+            return self.comando_bomba(cmd)
+        elif cmd == "AUTO":
+            self.evaluar_riego_automatico()
+            return "MODO_AUTO_ACTIVADO"
+        else:
+            return "COMANDO_DESCONOCIDO"
+    
+    def comando_bomba(self, cmd):
+        """BOMBA<k>_ON / BOMBA<k>_OFF para k entre 1 y el número de zonas"""
+        zona, accion = COMANDO_BOMBA.fullmatch(cmd).groups()
+        k = int(zona)
+        if not 1 <= k <= self.zonas:
+            return "COMANDO_DESCONOCIDO"
+        self.activar_bomba(k - 1, accion == "ON")
+        if accion == "ON":
+            print(f"🚿 BOMBA {k} ACTIVADA MANUALMENTE")
+            return f"BOMBA{k}_ACTIVADA"
+        print(f"⏹️ BOMBA {k} DESACTIVADA MANUALMENTE")
+        return f"BOMBA{k}_DESACTIVADA"
+
+
+class SistemaRiegoSimulator(ComandosRiego):
+    def __init__(self, host='localhost', port=9999, verbose=True, capacidad_historial=144, precarga=144, zonas=2,
+                 intervalo=3.0, velocidad=1.0, semilla=None, inicio=None, en_segundo_plano=True,
+                 almacen=None):
+        """intervalo: segundos simulados entre muestras; velocidad: factor del
+        reloj virtual (math.inf = sin esperas); con la misma semilla la
+        simulación se repite bit a bit; en_segundo_plano=False no lanza el hilo
+        de sensores (la simulación avanza con tick()/ejecutar()); almacen:
+        directorio donde se guarda cada muestra (ver almacen_segmentos.py) o
+        un almacén ya abierto con la misma interfaz (p. ej. HistorialSQLite)
+        """
         self.host = host
         self.port = port
         self.running = True
+        self.detenido = threading.Event()   # Corta la espera entre ticks al detener
+        self.hilo_sensores = None
+        self.verbose = verbose
+        self.zonas = zonas
+        self.intervalo = intervalo
+        self.reloj = RelojVirtual(velocidad, inicio)
         
-        # Datos actuales
+        # Semilla: una secuencia para el ruido de los ticks y otra para el historial inicial
+        self.semilla = semilla
+        semilla_ruido, self.semilla_historial = np.random.SeedSequence(semilla).spawn(2)
+        
+        # Estado actual: un vector en el orden de columnas_historial (bombas como 0/1)
+        self.columnas = columnas_historial(zonas)
+        self.n_analogicas = 2 * zonas + 2
+        self.estado = np.concatenate([
+            np.resize(HUMEDAD_INICIAL, zonas), np.resize(TEMPERATURA_INICIAL, zonas),
+            [23.8, 65.2], np.zeros(zonas)
+        ])
+        # Vistas por magnitud sobre el vector (escribir en ellas modifica el estado)
+        n = self.n_analogicas
         self.datos = {
-            'humedad1': 45.2,              # Humedad suelo zona 1
-            'humedad2': 38.7,              # Humedad suelo zona 2
-            'temperatura1': 24.5,          # Temperatura ambiente zona 1
-            'temperatura2': 26.1,          # Temperatura ambiente zona 2
-            'temp_planta': 23.8,           # Temperatura de la planta (nueva)
-            'humedad_relativa': 65.2,      # Humedad relativa del entorno (nueva)
-            'bomba1_activa': False,
-            'bomba2_activa': False
+            'humedad': self.estado[:zonas],                  # Humedad suelo por zona
+            'temperatura': self.estado[zonas:2 * zonas],     # Temperatura ambiente por zona
+            'temp_planta': self.estado[n - 2:n - 1],         # Temperatura de la planta
+            'humedad_relativa': self.estado[n - 1:n],        # Humedad relativa del entorno
+            'bombas': self.estado[n:]                        # Bombas (0/1) por zona
         }
+        self.amplitud, self.minimo, self.maximo = vectores_variacion(zonas)
+        self.rng = np.random.default_rng(semilla_ruido)
         
-        # Historial - listas simples
-        self.historial = {
-            'humedad1': [],
-            'humedad2': [],
-            'temperatura1': [],
-            'temperatura2': [],
-            'temp_planta': [],             # Nueva: temperatura planta
-            'humedad_relativa': [],        # Nueva: humedad relativa
-            'bomba1_estados': [],
-            'bomba2_estados': []
-        }
+        # Historial - buffer circular de capacidad fija (como HistorialData en el .ino)
+        self.historial = HistorialCircular(self.columnas, capacidad_historial)
+        # Estadísticas mantenidas al agregar/expulsar muestras (ESTADISTICAS en O(1))
+        self.estadisticas = EstadisticasIncrementales(
+            self.historial, columnas_extremos=self.columnas[:2 * zonas]
+        )
+        
+        # Resúmenes en memoria (crudas, 1 min, 10 min, 1 h) actualizados en cada tick
+        self.resumenes = ResumenesTiempo(self.columnas)
+        
+        # Almacén en disco (opcional): cada muestra simulada con su hora simulada
+        self.almacen = AlmacenSegmentos(almacen, self.columnas) if isinstance(almacen, str) else almacen
+        
+        # Clientes suscritos con SUBSCRIBE (reciben cada muestra nueva)
+        self.publicador = Publicador()
         
         # Umbrales
         self.UMBRAL_HUMEDAD_MIN = 30.0
         self.UMBRAL_HUMEDAD_MAX = 70.0
         
-        # Generar historial
-        self.generar_historial_ficticio()
+        # Generar historial (o continuar el guardado en disco)
+        if self.almacen is not None and len(self.almacen):
+            self.restaurar_historial()
+        else:
+            self.generar_historial_ficticio(precarga)
         print("📊 SIMULADOR CON HISTORIAL LISTO")
-        print(f"📈 Historial generado: {len(self.historial['humedad1'])} entradas")
+        print(f"📈 Historial generado: {len(self.historial)} entradas (capacidad {self.historial.capacidad}, {zonas} zonas)")
         
         # Iniciar simulación
-        self.iniciar_simulacion_sensores()
+        if en_segundo_plano:
+            self.iniciar_simulacion_sensores()
     
-    def generar_historial_ficticio(self):
-        """Genera 144 entradas de historial (24 horas)"""
+    def generar_historial_ficticio(self, num_entradas=144):
+        """Genera historial ficticio (144 entradas = 24 horas, una cada 10 min)"""
         print("🔄 Generando historial...")
         
-        for i in range(144):  # 144 entradas = 24 horas
-            # Ciclo día/noche
-            hora = (i * 10.0 / 60.0)  # Cada entrada = 10 min
-            factor_dia = math.sin((hora * math.pi) / 12.0)
-            
-            # Temperatura ambiente con ciclo día/noche
-            temp1 = 22.0 + (factor_dia * 8.0) + random.uniform(-2, 2)
-            temp2 = 24.0 + (factor_dia * 6.0) + random.uniform(-2, 2)
-            
-            # Temperatura de planta (ligeramente más baja que ambiente)
-            temp_planta = (temp1 + temp2) / 2 - 1.5 + random.uniform(-1, 1)
-            
-            # Humedad del suelo (inversa a temperatura)
-            hum1 = 50.0 - (factor_dia * 15.0) + random.uniform(-5, 5)
-            hum2 = 45.0 - (factor_dia * 12.0) + random.uniform(-5, 5)
-            
-            # Humedad relativa del entorno (mayor en la noche, menor en el día)
-            hum_relativa = 70.0 - (factor_dia * 25.0) + random.uniform(-8, 8)
-            
-            # Aplicar límites realistas
-            temp1 = max(15.0, min(40.0, temp1))
-            temp2 = max(15.0, min(40.0, temp2))
-            temp_planta = max(12.0, min(35.0, temp_planta))
-            hum1 = max(10.0, min(90.0, hum1))
-            hum2 = max(10.0, min(90.0, hum2))
-            hum_relativa = max(30.0, min(95.0, hum_relativa))
-            
-            # Estados de bombas
-            bomba1 = hum1 < self.UMBRAL_HUMEDAD_MIN
-            bomba2 = hum2 < self.UMBRAL_HUMEDAD_MIN
-            
-            # Agregar al historial
-            self.historial['temperatura1'].append(round(temp1, 1))
-            self.historial['temperatura2'].append(round(temp2, 1))
-            self.historial['temp_planta'].append(round(temp_planta, 1))
-            self.historial['humedad1'].append(round(hum1, 1))
-            self.historial['humedad2'].append(round(hum2, 1))
-            self.historial['humedad_relativa'].append(round(hum_relativa, 1))
-            self.historial['bomba1_estados'].append(bomba1)
-            self.historial['bomba2_estados'].append(bomba2)
+        # Solo hace falta generar lo que cabe en el buffer
+        num_entradas = min(num_entradas, self.historial.capacidad)
+        if num_entradas <= 0:
+            return
+        h = generar_historial(num_entradas, zonas=self.zonas, semilla=self.semilla_historial,
+                              umbral_humedad=self.UMBRAL_HUMEDAD_MIN)
+        
+        # Agregar al historial de una vez (mismo orden que columnas_historial)
+        filas = np.column_stack([
+            h['humedad'], h['temperatura'], h['temp_planta'], h['humedad_relativa'], h['bombas']
+        ])
+        # Horas simuladas: una entrada cada 10 min terminando ahora
+        tiempos = self.reloj.ahora() - 600.0 * np.arange(num_entradas)[::-1]
+        self.historial.agregar_lote(filas, tiempos)
+        self.resumenes.agregar_lote(tiempos, filas)
         
         # Establecer datos actuales como los más recientes
-        self.datos['temperatura1'] = self.historial['temperatura1'][-1]
-        self.datos['temperatura2'] = self.historial['temperatura2'][-1]
-        self.datos['temp_planta'] = self.historial['temp_planta'][-1]
-        self.datos['humedad1'] = self.historial['humedad1'][-1]
-        self.datos['humedad2'] = self.historial['humedad2'][-1]
-        self.datos['humedad_relativa'] = self.historial['humedad_relativa'][-1]
-        self.datos['bomba1_activa'] = self.historial['bomba1_estados'][-1]
-        self.datos['bomba2_activa'] = self.historial['bomba2_estados'][-1]
+        self.estado[:] = filas[-1]
+    
+    def tick(self, pasos=1):
+        """Avanza la simulación 'pasos' muestras (ruido, límites y riego sobre el vector de estado)
+        
+        Cada paso son unas pocas operaciones NumPy sobre todas las columnas, así
+        que el costo no crece con el número de zonas. Con pasos > 1 el ruido se
+        sortea de una vez y las muestras entran al historial en un solo lote.
+        """
+        analogicos = self.estado[:self.n_analogicas]
+        ruido = self.rng.uniform(-1.0, 1.0, (pasos, self.n_analogicas)) * self.amplitud
+        bloque = np.empty((pasos, len(self.estado)))
+        tiempos = np.empty(pasos)
+        for i in range(pasos):
+            self.reloj.avanzar(self.intervalo)
+            tiempos[i] = self.reloj.ahora()
+            analogicos += ruido[i]
+            np.clip(analogicos, self.minimo, self.maximo, out=analogicos)
+            np.round(analogicos, 1, out=analogicos)
+            self.evaluar_riego_automatico()
+            bloque[i] = self.estado
+        
+        # Agregar al historial (el buffer circular descarta las muestras más antiguas)
+        if pasos == 1:
+            self.historial.agregar(bloque[0], tiempos[0])
+        else:
+            self.historial.agregar_lote(bloque, tiempos)
+        self.resumenes.agregar_lote(tiempos, bloque)
+        if self.almacen is not None:
+            self.almacen.agregar_lote(tiempos, bloque)
+    
+    def restaurar_historial(self):
+        """Carga las últimas muestras del almacén en disco para continuar tras un reinicio"""
+        tiempos, filas = self.almacen.ultimos(self.historial.capacidad)
+        self.historial.agregar_lote(filas, tiempos)
+        self.estado[:] = np.round(filas[-1].astype(float), 1)
+        # El reloj simulado no retrocede respecto a lo ya guardado
+        self.reloj.tiempo = max(self.reloj.tiempo, float(tiempos[-1]))
+        # Los resúmenes se reconstruyen con lo que conserva el nivel más fino
+        # (para ventanas más antiguas HISTORIAL consulta el disco)
+        fino = self.resumenes.niveles[0]
+        ultimo = float(tiempos[-1])
+        self.resumenes.agregar_lote(*self.almacen.rango(ultimo - fino.resolucion * fino.capacidad, ultimo + 1))
+        print(f"💾 Historial restaurado ({len(self.almacen)} muestras en disco)")
     
     def iniciar_simulacion_sensores(self):
-        """Simula variaciones de sensores"""
+        """Simula variaciones de sensores (un tick cada 'intervalo' segundos)"""
         def simular():
             while self.running:
-                # Pequeñas variaciones
-                self.datos['humedad1'] += random.uniform(-1, 1)
-                self.datos['humedad2'] += random.uniform(-1, 1)
-                self.datos['temperatura1'] += random.uniform(-0.3, 0.3)
-                self.datos['temperatura2'] += random.uniform(-0.3, 0.3)
-                self.datos['temp_planta'] += random.uniform(-0.2, 0.2)
-                self.datos['humedad_relativa'] += random.uniform(-2, 2)
-                
-                # Límites
-                self.datos['humedad1'] = max(0, min(100, self.datos['humedad1']))
-                self.datos['humedad2'] = max(0, min(100, self.datos['humedad2']))
-                self.datos['temperatura1'] = max(15, min(40, self.datos['temperatura1']))
-                self.datos['temperatura2'] = max(15, min(40, self.datos['temperatura2']))
-                self.datos['temp_planta'] = max(12, min(35, self.datos['temp_planta']))
-                self.datos['humedad_relativa'] = max(30, min(95, self.datos['humedad_relativa']))
+                self.tick()
                 
-                # Redondear
-                for key in self.datos:
-                    if isinstance(self.datos[key], (int, float)) and not isinstance(self.datos[key], bool):
-                        self.datos[key] = round(self.datos[key], 1)
+                # Empujar la muestra a los suscriptores
+                self.publicador.publicar(self.generar_muestra_push)
                 
-                # Evaluar riego automático
-                self.evaluar_riego_automatico()
-                
-                # Agregar al historial (mantener solo las últimas 144)
-                if len(self.historial['humedad1']) >= 144:
-                    for key in self.historial:
-                        self.historial[key].pop(0)
-                
-                for key in ['humedad1', 'humedad2', 'temperatura1', 'temperatura2', 'temp_planta', 'humedad_relativa']:
-                    self.historial[key].append(self.datos[key])
-                self.historial['bomba1_estados'].append(self.datos['bomba1_activa'])
-                self.historial['bomba2_estados'].append(self.datos['bomba2_activa'])
-                
-                time.sleep(3)
+                self.reloj.esperar(self.intervalo, self.detenido)
         
-        thread = threading.Thread(target=simular)
-        thread.daemon = True
-        thread.start()
+        self.hilo_sensores = threading.Thread(target=simular)
+        self.hilo_sensores.daemon = True
+        self.hilo_sensores.start()
+    
+    def ejecutar(self, duracion, lote=1000):
+        """Avanza 'duracion' segundos simulados sin esperar (ticks por lotes); devuelve las muestras generadas"""
+        pasos = int(duracion // self.intervalo)
+        for inicio in range(0, pasos, lote):
+            self.tick(min(lote, pasos - inicio))
+        return pasos
+    
+    def fila_actual(self):
+        """Estado actual como fila del historial (mismo orden que columnas_historial)"""
+        return self.estado.copy()
     
     def evaluar_riego_automatico(self):
-        """Evalúa riego automático"""
-        # Zona 1
-        if self.datos['humedad1'] < self.UMBRAL_HUMEDAD_MIN and not self.datos['bomba1_activa']:
-            self.datos['bomba1_activa'] = True
-            print(f"[{time.strftime('%H:%M:%S')}] 🚿 BOMBA 1 ON - Humedad: {self.datos['humedad1']:.1f}%")
-        elif self.datos['humedad1'] > self.UMBRAL_HUMEDAD_MAX and self.datos['bomba1_activa']:
-            self.datos['bomba1_activa'] = False
-            print(f"[{time.strftime('%H:%M:%S')}] ⏹️ BOMBA 1 OFF - Humedad: {self.datos['humedad1']:.1f}%")
+        """Evalúa riego automático en todas las zonas a la vez (máscaras de umbral)"""
+        humedad = self.datos['humedad']
+        bombas = self.datos['bombas']
+        encender = (humedad < self.UMBRAL_HUMEDAD_MIN) & (bombas == 0)
+        apagar = (humedad > self.UMBRAL_HUMEDAD_MAX) & (bombas == 1)
+        if not (encender.any() or apagar.any()):
+            return
+        bombas[encender] = 1
+        bombas[apagar] = 0
+        # Solo se recorren las zonas que cambiaron
+        for i in np.flatnonzero(encender):
+            print(f"[{self.reloj.strftime()}] 🚿 BOMBA {i + 1} ON - Humedad: {humedad[i]:.1f}%")
+        for i in np.flatnonzero(apagar):
+            print(f"[{self.reloj.strftime()}] ⏹️ BOMBA {i + 1} OFF - Humedad: {humedad[i]:.1f}%")
+    
+    def log(self, mensaje):
+        """Imprime mensajes por conexión salvo en modo silencioso"""
+        if self.verbose:
+            print(mensaje)
+    
+    def start_server(self, motor='hilos'):
+        """Inicia el servidor con el motor elegido ('hilos' o 'asyncio')"""
+        if motor == 'asyncio':
+            try:
+                asyncio.run(self.start_server_asyncio())
+            except Exception as e:
+                print(f"❌ Error: {e}")
+            return
+        if motor != 'hilos':
+            raise ValueError(f"Motor desconocido: {motor} (opciones: {', '.join(MOTORES_SERVIDOR)})")
         
-        # Zona 2
-        if self.datos['humedad2'] < self.UMBRAL_HUMEDAD_MIN and not self.datos['bomba2_activa']:
-            self.datos['bomba2_activa'] = True
-            print(f"[{time.strftime('%H:%M:%S')}] 🚿 BOMBA 2 ON - Humedad: {self.datos['humedad2']:.1f}%")
-        elif self.datos['humedad2'] > self.UMBRAL_HUMEDAD_MAX and self.datos['bomba2_activa']:
-            self.datos['bomba2_activa'] = False
-            print(f"[{time.strftime('%H:%M:%S')}] ⏹️ BOMBA 2 OFF - Humedad: {self.datos['humedad2']:.1f}%")
-    
-    def start_server(self):
-        """Inicia el servidor"""
         self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         
         try:
             self.server.bind((self.host, self.port))
             self.server.listen(5)
-            print(f"\n🔌 Servidor iniciado en {self.host}:{self.port}")
+            print(f"\n🔌 Servidor iniciado en {self.host}:{self.port} (motor: hilos)")
             print("⏳ Esperando conexiones...\n")
             
             while self.running:
                 try:
                     client, addr = self.server.accept()
-                    print(f"📱 Cliente conectado: {addr}")
+                    self.log(f"📱 Cliente conectado: {addr}")
                     
                     thread = threading.Thread(target=self.handle_client, args=(client, addr))
                     thread.daemon = True
@@ -195,112 +431,317 @@ class SistemaRiegoSimulator:
         finally:
             self.server.close()
     
+    async def start_server_asyncio(self):
+        """Inicia el servidor asyncio: un solo hilo atiende todas las conexiones"""
+        self.loop = asyncio.get_running_loop()
+        self.server_asyncio = await asyncio.start_server(
+            self.handle_client_async, self.host, self.port,
+            reuse_address=True, backlog=1024, limit=MAX_LINEA
+        )
+        print(f"\n🔌 Servidor iniciado en {self.host}:{self.port} (motor: asyncio)")
+        print("⏳ Esperando conexiones...\n")
+        
+        async with self.server_asyncio:
+            try:
+                await self.server_asyncio.serve_forever()
+            except asyncio.CancelledError:
+                pass
+    
     def handle_client(self, client, addr):
-        """Maneja cliente"""
+        """Maneja cliente: comandos por línea, respuestas con longitud"""
+        lector = LectorTramas(client)
+        sesion = {'formato': 'texto'}
         try:
             # Enviar estado inicial
             response = self.generar_respuesta_estado()
-            client.send(response.encode('utf-8'))
+            client.sendall(enmarcar(response))
             
             while self.running:
-                data = client.recv(1024).decode('utf-8').strip()
-                if not data:
+                data = lector.leer_linea()
+                if data is None:
                     break
+                if not data:
+                    continue
                 
-                print(f"📨 Comando: {data}")
-                response = self.procesar_comando(data)
-                client.send(response.encode('utf-8'))
-                print(f"📤 Respuesta enviada ({len(response)} chars)")
+                self.log(f"📨 Comando: {data}")
+                if data.upper().startswith("SUBSCRIBE"):
+                    suscriptor = self.crear_suscriptor(data, sesion)
+                    client.sendall(enmarcar(self.respuesta_suscripcion(suscriptor)))
+                    if suscriptor:
+                        self.servir_suscripcion(client, suscriptor)
+                        break
+                    continue
+                
+                response = self.procesar_comando(data, sesion)
+                client.sendall(enmarcar(response))
+                self.log(f"📤 Respuesta enviada ({len(response)} chars)")
                 
         except Exception as e:
-            print(f"❌ Error con cliente: {e}")
+            self.log(f"❌ Error con cliente: {e}")
         finally:
             client.close()
-            print(f"🔌 Cliente {addr} desconectado")
+            self.log(f"🔌 Cliente {addr} desconectado")
     
-    def procesar_comando(self, comando):
-        """Procesa comandos"""
-        cmd = comando.upper().strip()
+    async def handle_client_async(self, reader, writer):
+        """Maneja cliente en el motor asyncio (misma semántica que handle_client)"""
+        addr = writer.get_extra_info('peername')
+        self.log(f"📱 Cliente conectado: {addr}")
+        sesion = {'formato': 'texto'}
+        try:
+            # Enviar estado inicial
+            response = self.generar_respuesta_estado()
+            writer.write(enmarcar(response))
+            await writer.drain()
+            
+            while self.running:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                data = linea.decode('utf-8').strip()
+                if not data:
+                    continue
+                
+                self.log(f"📨 Comando: {data}")
+                if data.upper().startswith("SUBSCRIBE"):
+                    suscriptor = self.crear_suscriptor(data, sesion)
+                    writer.write(enmarcar(self.respuesta_suscripcion(suscriptor)))
+                    await writer.drain()
+                    if suscriptor:
+                        await self.servir_suscripcion_async(reader, writer, suscriptor)
+                        break
+                    continue
+                
+                response = self.procesar_comando(data, sesion)
+                writer.write(enmarcar(response))
+                await writer.drain()
+                self.log(f"📤 Respuesta enviada ({len(response)} chars)")
+                
+        except Exception as e:
+            self.log(f"❌ Error con cliente: {e}")
+        finally:
+            writer.close()
+            self.log(f"🔌 Cliente {addr} desconectado")
+    
+    def crear_suscriptor(self, comando, sesion):
+        """Crea un suscriptor a partir de 'SUBSCRIBE [politica] [capacidad]' o None si es inválido"""
+        partes = comando.split()
+        politica = partes[1].lower() if len(partes) > 1 else 'descartar'
+        try:
+            capacidad = int(partes[2]) if len(partes) > 2 else 64
+        except ValueError:
+            return None
+        if politica not in POLITICAS or capacidad <= 0:
+            return None
+        return Suscriptor(politica, capacidad, formato=sesion['formato'])
+    
+    def respuesta_suscripcion(self, suscriptor):
+        if suscriptor is None:
+            return f"SUSCRIPCION_INVALIDA (uso: SUBSCRIBE [{'|'.join(POLITICAS)}] [capacidad])"
+        return f"SUSCRITO:{suscriptor.politica},{suscriptor.cola.maxlen}"
+    
+    def generar_muestra_push(self, formato):
+        """Trama lista para enviar con el estado actual en el formato del suscriptor"""
+        if formato == 'binario':
+            return enmarcar(self.generar_respuesta_estado_binaria())
+        return enmarcar(self.generar_respuesta_estado())
+    
+    def servir_suscripcion(self, client, suscriptor):
+        """Empuja muestras al cliente hasta que se desconecte (motor de hilos)"""
+        self.publicador.agregar(suscriptor)
+        self.log(f"📡 Suscriptor agregado ({len(self.publicador)} activos)")
+        try:
+            while self.running and suscriptor.activo:
+                muestras = suscriptor.esperar(timeout=1.0)
+                if muestras:
+                    client.sendall(b''.join(muestras))
+        finally:
+            self.publicador.quitar(suscriptor)
+            self.log(f"📡 Suscriptor retirado ({suscriptor.descartadas} muestras descartadas)")
+    
+    async def servir_suscripcion_async(self, reader, writer, suscriptor):
+        """Empuja muestras al cliente hasta que se desconecte (motor asyncio)"""
+        loop = asyncio.get_running_loop()
+        evento = asyncio.Event()
+        suscriptor.notificar = lambda: loop.call_soon_threadsafe(evento.set)
+        self.publicador.agregar(suscriptor)
+        self.log(f"📡 Suscriptor agregado ({len(self.publicador)} activos)")
         
-        if cmd == "STATUS":
-            return self.generar_respuesta_estado()
-        elif cmd == "HISTORIAL_RECIENTE":
-            return self.generar_respuesta_historial(24)
-        elif cmd == "ESTADISTICAS":
-            return self.generar_estadisticas()
-        elif cmd == "BOMBA1_ON":
-            self.datos['bomba1_activa'] = True
-            print("🚿 BOMBA 1 ACTIVADA MANUALMENTE")
-            return "BOMBA1_ACTIVADA"
-        elif cmd == "BOMBA1_OFF":
-            self.datos['bomba1_activa'] = False
-            print("⏹️ BOMBA 1 DESACTIVADA MANUALMENTE")
-            return "BOMBA1_DESACTIVADA"
-        elif cmd == "BOMBA2_ON":
-            self.datos['bomba2_activa'] = True
-            print("🚿 BOMBA 2 ACTIVADA MANUALMENTE")
-            return "BOMBA2_ACTIVADA"
-        elif cmd == "BOMBA2_OFF":
-            self.datos['bomba2_activa'] = False
-            print("⏹️ BOMBA 2 DESACTIVADA MANUALMENTE")
-            return "BOMBA2_DESACTIVADA"
-        elif cmd == "AUTO":
-            self.evaluar_riego_automatico()
-            return "MODO_AUTO_ACTIVADO"
-        else:
-            return "COMANDO_DESCONOCIDO"
+        # Una lectura pendiente detecta el cierre de la conexión
+        lectura = asyncio.ensure_future(reader.read(1024))
+        try:
+            while self.running and suscriptor.activo:
+                espera = asyncio.ensure_future(evento.wait())
+                hechas, _ = await asyncio.wait({espera, lectura}, return_when=asyncio.FIRST_COMPLETED)
+                if lectura in hechas:
+                    espera.cancel()
+                    if not lectura.result():
+                        break
+                    # En modo push se ignoran otros comandos
+                    lectura = asyncio.ensure_future(reader.read(1024))
+                    continue
+                evento.clear()
+                muestras = suscriptor.extraer_todas()
+                if muestras:
+                    writer.write(b''.join(muestras))
+                    await writer.drain()
+        finally:
+            lectura.cancel()
+            self.publicador.quitar(suscriptor)
+            self.log(f"📡 Suscriptor retirado ({suscriptor.descartadas} muestras descartadas)")
+    
+    def activar_bomba(self, indice, encendida):
+        """Cambia la bomba de la zona indice (0..N-1)"""
+        self.datos['bombas'][indice] = encendida
     
     def generar_respuesta_estado(self):
-        """Genera respuesta de estado"""
-        return f"DATOS:{self.datos['humedad1']},{self.datos['humedad2']},{self.datos['temperatura1']},{self.datos['temperatura2']},{1 if self.datos['bomba1_activa'] else 0},{1 if self.datos['bomba2_activa'] else 0},{self.datos['temp_planta']},{self.datos['humedad_relativa']}"
+        """Genera respuesta de estado: DATOS:h1..hN,t1..tN,b1..bN,temp_planta,hum_relativa"""
+        return formatear_estado(self.datos['humedad'].tolist(), self.datos['temperatura'].tolist(),
+                                self.datos['bombas'].tolist(), self.datos['temp_planta'][0],
+                                self.datos['humedad_relativa'][0])
     
     def generar_respuesta_historial(self, num_entradas=24):
         """Genera respuesta con historial"""
-        if not self.historial['humedad1']:
+        if not len(self.historial):
             return "SIN_HISTORIAL"
         
-        # Tomar las últimas entradas
-        start_idx = max(0, len(self.historial['humedad1']) - num_entradas)
-        
-        respuesta = "HISTORIAL_RECIENTE_INICIO\n"
+        # Tomar las últimas entradas; la cabecera lleva el número de secuencia
+        # de la última muestra para que los clientes apliquen solo lo nuevo
+        filas, total = self.historial.instantanea(num_entradas)
+        return formatear_historial(filas, self.zonas, total - 1)
+    
+    def generar_historial_desde(self, seq, n=None, arranque=None):
+        """Genera la respuesta de HISTORIAL_DESDE: muestras posteriores a seq que siguen en el buffer"""
+        filas, tiempos, primera, total = self.historial.desde(seq, n, arranque=arranque)
+        return formatear_historial(filas, self.zonas, total - 1, primera, tiempos, self.historial.arranque)
+    
+    def generar_historial_agrupado(self, inicio, fin, cubeta=None):
+        """Genera el resumen por cubetas de HISTORIAL desde los resúmenes en memoria o el almacén en disco
         
-        for i in range(start_idx, len(self.historial['humedad1'])):
-            idx = i - start_idx
-            respuesta += f"HR:{idx},{self.historial['humedad1'][i]},{self.historial['humedad2'][i]},{self.historial['temperatura1'][i]},{self.historial['temperatura2'][i]},{1 if self.historial['bomba1_estados'][i] else 0},{1 if self.historial['bomba2_estados'][i] else 0},{self.historial['temp_planta'][i]},{self.historial['humedad_relativa'][i]}\n"
+        Sin cubeta se usa la que elige ResumenesTiempo para el rango (0 =
+        muestras crudas), así cualquier ventana cabe en unos miles de puntos.
+        """
+        ahora = self.reloj.ahora()
+        inicio = inicio + ahora if inicio <= 0 else inicio
+        fin = fin + ahora if fin <= 0 else fin
+        if (not all(math.isfinite(v) for v in (inicio, fin)) or fin <= inicio
+                or (cubeta is not None and not (math.isfinite(cubeta) and cubeta > 0))):
+            return "RANGO_INVALIDO"
+        if cubeta is None:
+            cubeta = self.resumenes.elegir_nivel(inicio, fin)
+        elif (fin - inicio) / cubeta > MAX_CUBETAS:
+            return f"DEMASIADAS_CUBETAS (máximo {MAX_CUBETAS})"
         
-        respuesta += "HISTORIAL_RECIENTE_FIN"
-        return respuesta
+        # Los niveles en memoria sirven si conservan toda la ventana; si no, el disco
+        resumen = self.resumenes.agrupar(inicio, fin, cubeta)
+        if resumen is None and self.almacen is not None:
+            resumen = self.almacen.agrupar(inicio, fin, cubeta)
+        if resumen is None:
+            resumen = self.resumenes.agrupar(inicio, fin, cubeta, parcial=True)
+        return formatear_historial_agrupado(resumen, self.zonas, cubeta)
+    
+    def generar_respuesta_estado_binaria(self):
+        """Genera respuesta de estado en formato binario (ver codificacion_binaria.py)"""
+        return codificar_estado(self.estado[:self.n_analogicas], self.datos['bombas'])
+    
+    def generar_respuesta_historial_binaria(self, num_entradas=24):
+        """Genera respuesta con historial en formato binario por columnas"""
+        filas = self.historial.ultimos(num_entradas)
+        n = self.n_analogicas
+        return codificar_historial(filas[:, :n], filas[:, n:])
+    
+    def generar_historial_desde_binario(self, seq, n=None, arranque=None):
+        """Genera la respuesta de HISTORIAL_DESDE en formato binario"""
+        filas, tiempos, primera, total = self.historial.desde(seq, n, arranque=arranque)
+        a = self.n_analogicas
+        return codificar_historial_desde(primera, total - 1, self.historial.arranque, tiempos,
+                                         filas[:, :a], filas[:, a:])
     
     def generar_estadisticas(self):
-        """Genera estadísticas"""
-        if not self.historial['humedad1']:
+        """Genera estadísticas a partir de los acumuladores incrementales"""
+        if not len(self.historial):
             return "SIN_DATOS"
         
-        h1 = self.historial['humedad1']
-        h2 = self.historial['humedad2']
-        t1 = self.historial['temperatura1']
-        t2 = self.historial['temperatura2']
-        b1 = self.historial['bomba1_estados']
-        b2 = self.historial['bomba2_estados']
+        e = self.estadisticas
+        z = self.zonas
+        with self.historial.lock:
+            promedios = e.promedios()
+            minimos = e.minimos()
+            maximos = e.maximos()
+        return formatear_estadisticas(promedios[:2 * z], minimos, maximos, promedios[-z:] * 100)
+    
+    def generar_estadisticas_completas(self):
+        """Genera estadísticas recorriendo todo el historial (referencia para verificar)"""
+        if not len(self.historial):
+            return "SIN_DATOS"
         
-        stats = f"STATS:{sum(h1)/len(h1):.1f},{sum(h2)/len(h2):.1f},{sum(t1)/len(t1):.1f},{sum(t2)/len(t2):.1f},{min(h1):.1f},{max(h1):.1f},{min(h2):.1f},{max(h2):.1f},{min(t1):.1f},{max(t1):.1f},{min(t2):.1f},{max(t2):.1f},{(sum(b1)/len(b1)*100):.1f},{(sum(b2)/len(b2)*100):.1f}"
-        return stats
+        z = self.zonas
+        filas = self.historial.ultimos().astype(float)
+        sensores = filas[:, :2 * z]
+        bombas = filas[:, self.n_analogicas:]
+        return formatear_estadisticas(sensores.mean(axis=0), sensores.min(axis=0),
+                                      sensores.max(axis=0), bombas.mean(axis=0) * 100)
     
     def stop(self):
         """Detiene el simulador"""
         self.running = False
+        self.detenido.set()
+        # Esperar el tick en curso: no debe escribir en el almacén ya cerrado
+        if self.hilo_sensores is not None and self.hilo_sensores is not threading.current_thread():
+            self.hilo_sensores.join()
+        if self.almacen is not None:
+            self.almacen.cerrar()
         if hasattr(self, 'server'):
             self.server.close()
+        if hasattr(self, 'server_asyncio'):
+            self.loop.call_soon_threadsafe(self.server_asyncio.close)
+
+def parsear_argumentos(argv=None):
+    """Parsea los argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Simulador de sistema de riego")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=9999)
+    parser.add_argument('--motor', choices=MOTORES_SERVIDOR, default='hilos',
+                        help="hilos: un hilo por cliente | asyncio: un solo hilo para miles de conexiones")
+    parser.add_argument('--silencioso', action='store_true',
+                        help="No imprimir mensajes por conexión/comando")
+    parser.add_argument('--capacidad-historial', type=int, default=144,
+                        help="Muestras que conserva el buffer circular (144 = 24h a 10 min)")
+    parser.add_argument('--precarga', type=int, default=144,
+                        help="Muestras de historial sintético generadas al arrancar")
+    parser.add_argument('--zonas', type=int, default=2,
+                        help="Zonas de riego simuladas (humedad, temperatura y bomba por zona)")
+    parser.add_argument('--intervalo', type=float, default=3.0,
+                        help="Segundos entre muestras simuladas (admite milisegundos, p. ej. 0.005)")
+    parser.add_argument('--velocidad', type=parsear_velocidad, default=1.0,
+                        help="Factor del reloj simulado (3600 = una hora por segundo, 'max' = sin esperas)")
+    parser.add_argument('--semilla', type=int, default=None,
+                        help="Semilla del ruido y del historial inicial (misma semilla = misma simulación)")
+    almacenes = parser.add_mutually_exclusive_group()
+    almacenes.add_argument('--almacen', default=None,
+                           help="Directorio donde guardar el historial en disco (se continúa al reiniciar)")
+    almacenes.add_argument('--sqlite', default=None,
+                           help="Base SQLite donde guardar el historial (habilita HISTORIAL por cubetas)")
+    return parser.parse_args(argv)
 
 def main():
+    args = parsear_argumentos()
+    
     print("=" * 70)
     print("🌱 SIMULADOR DE RIEGO CON HISTORIAL - VERSION CORREGIDA")
     print("=" * 70)
     
-    simulator = SistemaRiegoSimulator()
+    almacen = args.almacen
+    if args.sqlite:
+        almacen = HistorialSQLite(args.sqlite, columnas_historial(args.zonas))
+    
+    simulator = SistemaRiegoSimulator(args.host, args.port, verbose=not args.silencioso,
+                                      capacidad_historial=args.capacidad_historial,
+                                      precarga=args.precarga, zonas=args.zonas,
+                                      intervalo=args.intervalo, velocidad=args.velocidad,
+                                      semilla=args.semilla, almacen=almacen)
     
     try:
-        simulator.start_server()
+        simulator.start_server(args.motor)
     except KeyboardInterrupt:
         print("\n⏹️ Deteniendo...")
         simulator.stop()
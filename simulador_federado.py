@@ -0,0 +1,328 @@
+"""
+Simulador federado: muchos sitios de riego en un solo proceso
+
+Cada sitio tiene sus propias zonas, umbrales, semilla e historial, pero el
+estado de todos vive en matrices NumPy (sitios x zonas) y un tick avanza
+todos los sitios con unas pocas operaciones vectorizadas. Los sitios con
+menos zonas que el máximo usan solo sus primeras columnas (el resto queda
+enmascarado). El historial es un único buffer circular con una matriz
+sitios x columnas por muestra.
+
+El servidor (motores, tramas, FORMATO, SUBSCRIBE) es el de
+SistemaRiegoSimulator; el protocolo agrega:
+    SITIOS               -> SITIOS:<n>
+    SITIO <id>           -> selecciona el sitio de la conexión (SITIO:<id>,<zonas>)
+    SITIO <id> <comando> -> ejecuta un comando en otro sitio sin cambiar la selección
+Al conectar la conexión usa el sitio 0.
+
+Uso:
+    python3 simulador_federado.py --sitios 10000 --motor asyncio --silencioso
+"""
+
+import argparse
+import threading
+
+import numpy as np
+
+from codificacion_binaria import codificar_estado, codificar_historial, codificar_historial_desde
+from generador_historial import generar_historial
+from historial_circular import HistorialCircular
+from protocolo import enmarcar
+from reloj_virtual import RelojVirtual, parsear_velocidad
+from simulador_corregido import (
+    MOTORES_SERVIDOR, VARIACION_SENSORES, ComandosRiego, SistemaRiegoSimulator, columnas_historial,
+    formatear_estadisticas, formatear_estado, formatear_historial,
+)
+from suscripciones import Publicador
+
+
+class VistaSitio(ComandosRiego):
+    """Un sitio del simulador federado con la interfaz de comandos de un simulador simple"""
+
+    def __init__(self, federado, sitio):
+        self.federado = federado
+        self.sitio = sitio
+        self.zonas = int(federado.zonas_sitio[sitio])
+        # Columnas del historial federado que corresponden a este sitio
+        self.indices = federado.indices_columnas(self.zonas)
+
+    def activar_bomba(self, indice, encendida):
+        self.federado.bombas[self.sitio, indice] = encendida
+
+    def evaluar_riego_automatico(self):
+        self.federado.evaluar_riego_automatico(slice(self.sitio, self.sitio + 1))
+
+    def generar_respuesta_estado(self):
+        f, s, z = self.federado, self.sitio, self.zonas
+        return formatear_estado(f.humedad[s, :z].tolist(), f.temperatura[s, :z].tolist(),
+                                f.bombas[s, :z].tolist(), f.temp_planta[s], f.humedad_relativa[s])
+
+    def generar_respuesta_estado_binaria(self):
+        f, s, z = self.federado, self.sitio, self.zonas
+        analogicos = np.concatenate([f.humedad[s, :z], f.temperatura[s, :z], [f.temp_planta[s], f.humedad_relativa[s]]])
+        return codificar_estado(analogicos, f.bombas[s, :z])
+
+    def generar_respuesta_historial(self, num_entradas=24):
+        if not len(self.federado.historial):
+            return "SIN_HISTORIAL"
+        filas, total = self.federado.historial.instantanea(num_entradas, sitio=self.sitio)
+        return formatear_historial(filas[:, self.indices], self.zonas, total - 1)
+
+    def generar_respuesta_historial_binaria(self, num_entradas=24):
+        filas = self.federado.historial.ultimos(num_entradas, sitio=self.sitio)[:, self.indices]
+        n = 2 * self.zonas + 2
+        return codificar_historial(filas[:, :n], filas[:, n:])
+
+    def generar_historial_desde(self, seq, n=None, arranque=None):
+        historial = self.federado.historial
+        filas, tiempos, primera, total = historial.desde(seq, n, sitio=self.sitio, arranque=arranque)
+        return formatear_historial(filas[:, self.indices], self.zonas, total - 1, primera, tiempos,
+                                   historial.arranque)
+
+    def generar_historial_desde_binario(self, seq, n=None, arranque=None):
+        historial = self.federado.historial
+        filas, tiempos, primera, total = historial.desde(seq, n, sitio=self.sitio, arranque=arranque)
+        filas = filas[:, self.indices]
+        a = 2 * self.zonas + 2
+        return codificar_historial_desde(primera, total - 1, historial.arranque, tiempos,
+                                         filas[:, :a], filas[:, a:])
+
+    def generar_historial_agrupado(self, inicio, fin, cubeta):
+        return "HISTORIAL_NO_DISPONIBLE"
+
+    def generar_estadisticas(self):
+        """Estadísticas de la ventana del sitio (O(capacidad) por consulta, sin acumuladores por sitio)"""
+        if not len(self.federado.historial):
+            return "SIN_DATOS"
+        z = self.zonas
+        filas = self.federado.historial.ultimos(sitio=self.sitio)[:, self.indices].astype(float)
+        sensores = filas[:, :2 * z]
+        bombas = filas[:, 2 * z + 2:]
+        return formatear_estadisticas(sensores.mean(axis=0), sensores.min(axis=0),
+                                      sensores.max(axis=0), bombas.mean(axis=0) * 100)
+
+
+class SimuladorFederado(SistemaRiegoSimulator):
+    def __init__(self, host='localhost', port=9999, sitios=100, zonas=2, semilla=0,
+                 capacidad_historial=144, precarga=144, intervalo=3.0, verbose=True,
+                 configuracion=None, velocidad=1.0, inicio=None, en_segundo_plano=True):
+        """configuracion: lista opcional de diccionarios por sitio con
+        'zonas', 'umbral_min', 'umbral_max' y 'semilla' (los que falten toman
+        los valores comunes; la semilla por defecto es semilla + id del sitio).
+        velocidad, inicio y en_segundo_plano como en SistemaRiegoSimulator.
+        """
+        self.host = host
+        self.port = port
+        self.running = True
+        self.detenido = threading.Event()
+        self.hilo_sensores = None
+        self.verbose = verbose
+        self.intervalo = intervalo
+        self.reloj = RelojVirtual(velocidad, inicio)
+
+        configuracion = configuracion or [{} for _ in range(sitios)]
+        self.num_sitios = len(configuracion)
+        self.zonas_sitio = np.array([c.get('zonas', zonas) for c in configuracion], dtype=np.int32)
+        self.umbral_min = np.array([c.get('umbral_min', 30.0) for c in configuracion])
+        self.umbral_max = np.array([c.get('umbral_max', 70.0) for c in configuracion])
+        self.semillas = [c.get('semilla', semilla + i) for i, c in enumerate(configuracion)]
+        self.zonas = int(self.zonas_sitio.max())
+        self.validas = np.arange(self.zonas) < self.zonas_sitio[:, None]
+        self._indices = {}
+
+        # Estado actual de todos los sitios (sitios x zonas)
+        forma = (self.num_sitios, self.zonas)
+        self.humedad = np.zeros(forma)
+        self.temperatura = np.zeros(forma)
+        self.bombas = np.zeros(forma, dtype=bool)
+        self.temp_planta = np.full(self.num_sitios, 23.8)
+        self.humedad_relativa = np.full(self.num_sitios, 65.2)
+
+        # Ruido del tick: un solo generador para todos los sitios, derivado de sus semillas
+        self.rng = np.random.default_rng(np.random.SeedSequence(self.semillas))
+
+        self.historial = HistorialCircular(columnas_historial(self.zonas), capacidad_historial,
+                                           sitios=self.num_sitios)
+        self.publicador = Publicador()
+        self.almacen = None
+
+        self.generar_historial_ficticio(precarga)
+        print("📊 SIMULADOR FEDERADO LISTO")
+        print(f"🏡 {self.num_sitios} sitios, hasta {self.zonas} zonas, historial de {len(self.historial)} muestras "
+              f"(capacidad {self.historial.capacidad})")
+
+        if en_segundo_plano:
+            self.iniciar_simulacion_sensores()
+
+    def indices_columnas(self, zonas):
+        """Columnas del historial federado de un sitio con 'zonas' zonas (orden de columnas_historial)"""
+        if zonas not in self._indices:
+            z = self.zonas
+            self._indices[zonas] = np.r_[0:zonas, z:z + zonas, 2 * z, 2 * z + 1, 2 * z + 2:2 * z + 2 + zonas]
+        return self._indices[zonas]
+
+    def sitio(self, sitio):
+        return VistaSitio(self, sitio)
+
+    def generar_historial_ficticio(self, num_entradas=144):
+        """Historial inicial de cada sitio con su propia semilla, zonas y umbral"""
+        num_entradas = min(num_entradas, self.historial.capacidad)
+        if num_entradas <= 0:
+            return
+        print(f"🔄 Generando historial de {self.num_sitios} sitios...")
+
+        z = self.zonas
+        bloque = np.zeros((num_entradas, self.num_sitios, len(self.historial.columnas)), dtype=np.float32)
+        for s in range(self.num_sitios):
+            zs = int(self.zonas_sitio[s])
+            h = generar_historial(num_entradas, zonas=zs, semilla=self.semillas[s],
+                                  umbral_humedad=self.umbral_min[s], dtype=np.float32)
+            bloque[:, s, :zs] = h['humedad']
+            bloque[:, s, z:z + zs] = h['temperatura']
+            bloque[:, s, 2 * z] = h['temp_planta']
+            bloque[:, s, 2 * z + 1] = h['humedad_relativa']
+            bloque[:, s, 2 * z + 2:2 * z + 2 + zs] = h['bombas']
+        # Horas simuladas: una entrada cada 10 min terminando ahora (como el simulador simple)
+        self.historial.agregar_lote(bloque, self.reloj.ahora() - 600.0 * np.arange(num_entradas)[::-1])
+
+        # Estado actual = última muestra de cada sitio
+        ultima = bloque[-1].astype(float)
+        self.humedad[:] = ultima[:, :z].round(1)
+        self.temperatura[:] = ultima[:, z:2 * z].round(1)
+        self.temp_planta[:] = ultima[:, 2 * z].round(1)
+        self.humedad_relativa[:] = ultima[:, 2 * z + 1].round(1)
+        self.bombas[:] = ultima[:, 2 * z + 2:] > 0
+
+    def tick(self, pasos=1):
+        """Avanza 'pasos' muestras en todos los sitios (ruido, límites, riego e historial vectorizados)"""
+        for _ in range(pasos):
+            self.reloj.avanzar(self.intervalo)
+            for sensor, (amplitud, minimo, maximo) in VARIACION_SENSORES.items():
+                valores = getattr(self, sensor)
+                valores += self.rng.uniform(-amplitud, amplitud, valores.shape)
+                np.clip(valores, minimo, maximo, out=valores)
+                np.round(valores, 1, out=valores)
+
+            encendidas, apagadas = self.evaluar_riego_automatico()
+            if encendidas or apagadas:
+                self.log(f"[{self.reloj.strftime()}] 🚿 {encendidas} bombas ON, ⏹️ {apagadas} bombas OFF "
+                         f"({self.num_sitios} sitios)")
+
+            self.historial.agregar(np.concatenate([
+                self.humedad, self.temperatura,
+                self.temp_planta[:, None], self.humedad_relativa[:, None],
+                self.bombas
+            ], axis=1), self.reloj.ahora())
+
+    def evaluar_riego_automatico(self, sitios=slice(None)):
+        """Enciende/apaga bombas según los umbrales de cada sitio (máscaras sobre sitios x zonas)"""
+        humedad = self.humedad[sitios]
+        bombas = self.bombas[sitios]
+        encender = (humedad < self.umbral_min[sitios, None]) & ~bombas & self.validas[sitios]
+        apagar = (humedad > self.umbral_max[sitios, None]) & bombas
+        self.bombas[sitios] = (bombas | encender) & ~apagar
+        return int(encender.sum()), int(apagar.sum())
+
+    def iniciar_simulacion_sensores(self):
+        """Un hilo avanza todos los sitios cada 'intervalo' segundos"""
+        def simular():
+            while self.running:
+                self.tick()
+                self.publicador.publicar(self.generar_muestra_push)
+                self.reloj.esperar(self.intervalo, self.detenido)
+
+        self.hilo_sensores = threading.Thread(target=simular)
+        self.hilo_sensores.daemon = True
+        self.hilo_sensores.start()
+
+    def procesar_comando(self, comando, sesion=None):
+        """SITIOS / SITIO <id> [comando]; el resto se aplica al sitio de la conexión"""
+        partes = comando.strip().split(None, 2)
+        primera = partes[0].upper() if partes else ""
+
+        if primera == "SITIOS":
+            return f"SITIOS:{self.num_sitios}"
+        if primera == "SITIO":
+            if len(partes) < 2 or not partes[1].isdigit() or int(partes[1]) >= self.num_sitios:
+                return f"SITIO_INVALIDO (0-{self.num_sitios - 1})"
+            sitio = int(partes[1])
+            if len(partes) == 3:
+                return self.sitio(sitio).procesar_comando(partes[2], sesion)
+            if sesion is not None:
+                sesion['sitio'] = sitio
+            return f"SITIO:{sitio},{self.zonas_sitio[sitio]}"
+
+        sitio = sesion.get('sitio', 0) if sesion else 0
+        return self.sitio(sitio).procesar_comando(comando, sesion)
+
+    def generar_respuesta_estado(self):
+        """Estado inicial que recibe cada conexión (sitio 0)"""
+        return self.sitio(0).generar_respuesta_estado()
+
+    def crear_suscriptor(self, comando, sesion):
+        """Como en el simulador simple, pero el suscriptor queda ligado al sitio de la conexión"""
+        suscriptor = super().crear_suscriptor(comando, sesion)
+        if suscriptor:
+            # El publicador agrupa por 'formato': se usa (sitio, formato) como clave
+            suscriptor.formato = (sesion.get('sitio', 0), suscriptor.formato)
+        return suscriptor
+
+    def generar_muestra_push(self, clave):
+        sitio, formato = clave
+        vista = self.sitio(sitio)
+        if formato == 'binario':
+            return enmarcar(vista.generar_respuesta_estado_binaria())
+        return enmarcar(vista.generar_respuesta_estado())
+
+
+def parsear_argumentos(argv=None):
+    """Parsea los argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Simulador federado: muchos sitios de riego en un proceso")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=9999)
+    parser.add_argument('--motor', choices=MOTORES_SERVIDOR, default='asyncio')
+    parser.add_argument('--silencioso', action='store_true',
+                        help="No imprimir mensajes por conexión/comando")
+    parser.add_argument('--sitios', type=int, default=100)
+    parser.add_argument('--zonas', type=int, default=2,
+                        help="Zonas por sitio (máximo si se usa --zonas-variables)")
+    parser.add_argument('--zonas-variables', action='store_true',
+                        help="Sortear entre 1 y --zonas zonas para cada sitio")
+    parser.add_argument('--semilla', type=int, default=0,
+                        help="Semilla base (el sitio i usa semilla + i)")
+    parser.add_argument('--capacidad-historial', type=int, default=144)
+    parser.add_argument('--precarga', type=int, default=144)
+    parser.add_argument('--intervalo', type=float, default=3.0,
+                        help="Segundos simulados entre ticks")
+    parser.add_argument('--velocidad', type=parsear_velocidad, default=1.0,
+                        help="Factor del reloj simulado (3600 = una hora por segundo, 'max' = sin esperas)")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parsear_argumentos()
+
+    print("=" * 70)
+    print("🌱 SIMULADOR DE RIEGO FEDERADO")
+    print("=" * 70)
+
+    configuracion = None
+    if args.zonas_variables:
+        rng = np.random.default_rng(args.semilla)
+        configuracion = [{'zonas': int(z)} for z in rng.integers(1, args.zonas + 1, args.sitios)]
+
+    simulator = SimuladorFederado(args.host, args.port, sitios=args.sitios, zonas=args.zonas,
+                                  semilla=args.semilla, capacidad_historial=args.capacidad_historial,
+                                  precarga=args.precarga, intervalo=args.intervalo,
+                                  verbose=not args.silencioso, configuracion=configuracion,
+                                  velocidad=args.velocidad)
+
+    try:
+        simulator.start_server(args.motor)
+    except KeyboardInterrupt:
+        print("\n⏹️ Deteniendo...")
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
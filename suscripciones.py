@@ -0,0 +1,98 @@
+"""
+Suscripciones push del simulador (comando SUBSCRIBE)
+
+Cada suscriptor tiene una cola acotada. El hilo de simulación publica cada
+muestra nueva sin bloquearse nunca por un cliente lento:
+
+- 'descartar': cola de hasta 'capacidad' muestras; si se llena se descarta
+  la más antigua.
+- 'coalescer': solo se conserva la última muestra pendiente (el cliente
+  lento siempre recibe el estado más reciente).
+"""
+
+import threading
+from collections import deque
+
+POLITICAS = ('descartar', 'coalescer')
+
+
+class Suscriptor:
+    def __init__(self, politica='descartar', capacidad=64, formato='texto', notificar=None):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política desconocida: {politica}")
+        self.politica = politica
+        self.formato = formato
+        self.cola = deque(maxlen=1 if politica == 'coalescer' else max(1, capacidad))
+        self.descartadas = 0
+        self.activo = True
+        self.condicion = threading.Condition()
+        # Callback adicional (p. ej. despertar una tarea asyncio)
+        self.notificar = notificar
+
+    def publicar(self, muestra):
+        """Encola una muestra (llamado desde el hilo de simulación)"""
+        if not self.activo:
+            return
+        with self.condicion:
+            if len(self.cola) == self.cola.maxlen:
+                self.descartadas += 1
+            self.cola.append(muestra)
+            self.condicion.notify()
+        if self.notificar:
+            self.notificar()
+
+    def extraer_todas(self):
+        """Saca todas las muestras pendientes sin bloquear"""
+        with self.condicion:
+            muestras = list(self.cola)
+            self.cola.clear()
+            return muestras
+
+    def esperar(self, timeout=None):
+        """Bloquea hasta que haya muestras (motor de hilos); devuelve la lista"""
+        with self.condicion:
+            if not self.cola and self.activo:
+                self.condicion.wait(timeout)
+            muestras = list(self.cola)
+            self.cola.clear()
+            return muestras
+
+    def cerrar(self):
+        with self.condicion:
+            self.activo = False
+            self.condicion.notify()
+        if self.notificar:
+            self.notificar()
+
+
+class Publicador:
+    """Conjunto de suscriptores al que el simulador publica cada muestra"""
+
+    def __init__(self):
+        self.suscriptores = set()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.suscriptores)
+
+    def agregar(self, suscriptor):
+        with self.lock:
+            self.suscriptores.add(suscriptor)
+
+    def quitar(self, suscriptor):
+        with self.lock:
+            self.suscriptores.discard(suscriptor)
+        suscriptor.cerrar()
+
+    def publicar(self, generar_muestra):
+        """Publica a todos; generar_muestra(formato) se evalúa una vez por formato"""
+        with self.lock:
+            suscriptores = list(self.suscriptores)
+        if not suscriptores:
+            return
+        por_formato = {}
+        for suscriptor in suscriptores:
+            formato = suscriptor.formato
+            if formato not in por_formato:
+                por_formato[formato] = generar_muestra(formato)
+            suscriptor.publicar(por_formato[formato])